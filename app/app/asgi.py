@@ -0,0 +1,104 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.2 has no ASGI handler of its own, so the WSGI application is
+wrapped with asgiref's adapter. The stock adapter runs every request on
+one shared thread, so the wrapper below hands requests to a pool of
+GUNICORN_THREADS threads instead, the same concurrency a gthread worker
+gets. It also ends responses when the client disconnects.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """Run one request of the wrapped WSGI app on the pool
+
+    asgiref's adapter never reads http.disconnect and never closes the
+    WSGI response. Here the response stops at the next chunk once the
+    client has gone and is always closed, so streams give their worker
+    thread and live stream slot back.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(self.watched(wsgi_application))
+        self.executor = executor
+        self.disconnected = False
+        self.response = None
+
+    def watched(self, wsgi_application):
+        """Wrap the app so its response stops once the client is gone"""
+        def application(environ, start_response):
+            self.response = wsgi_application(environ, start_response)
+            return self.until_disconnected(self.response)
+        return application
+
+    def until_disconnected(self, response):
+        """Yield the response chunks while the client is connected"""
+        for chunk in response:
+            if self.disconnected:
+                return
+            yield chunk
+
+    async def __call__(self, scope, receive, send):
+        self.receive = receive
+        await super().__call__(scope, receive, send)
+
+    async def watch_disconnect(self):
+        """Note the client going away while the response is sent"""
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                self.disconnected = True
+                return
+
+    async def run_wsgi_app(self, body):
+        """Run the WSGI app on a pool thread"""
+        watcher = asyncio.ensure_future(self.watch_disconnect())
+        try:
+            await asyncio.get_event_loop().run_in_executor(
+                self.executor, self.run_wsgi_app_sync, body
+            )
+        finally:
+            watcher.cancel()
+
+    def run_wsgi_app_sync(self, body):
+        """Run asgiref's request loop, then close the response"""
+        # The undecorated body of asgiref's run_wsgi_app
+        run = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+        try:
+            run(self, body)
+        finally:
+            close = getattr(self.response, 'close', None)
+            if close is not None:
+                close()
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """Wrap a WSGI app so concurrent requests run on a thread pool"""
+
+    def __init__(self, wsgi_application, max_workers):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='wsgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        instance = ThreadPoolWsgiToAsgiInstance(
+            self.wsgi_application, self.executor
+        )
+        await instance(scope, receive, send)
+
+
+application = ThreadPoolWsgiToAsgi(
+    get_wsgi_application(), int(os.environ.get('GUNICORN_THREADS', 4))
+)
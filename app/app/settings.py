@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -19,13 +21,26 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
+# 'development' runs with DEBUG for manage.py runserver, 'production' is
+# selected by manage.py serve and runs under gunicorn with whitenoise
+SERVING_PROFILE = os.environ.get('SERVING_PROFILE', 'development')
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '*l+bsivf5ys&7312!n#tgz(o2oj5a=@qrh%q=z8jk&5h5b^%l5'
+# It signs sessions and sync tokens, so production must bring its own.
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    if SERVING_PROFILE == 'production':
+        raise ImproperlyConfigured(
+            'SECRET_KEY must be set in the environment in production'
+        )
+    SECRET_KEY = '*l+bsivf5ys&7312!n#tgz(o2oj5a=@qrh%q=z8jk&5h5b^%l5'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = SERVING_PROFILE == 'development'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host
+]
 
 
 # Application definition
@@ -46,6 +61,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ConnectionMetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,6 +74,23 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Most queries a view may run per request, keyed by method and view name. Going over is logged, and
+# fails the request under the test runner so regressions break the build.
+QUERY_BUDGETS = {
+    'GET blazing:tournament-list': 2,
+    'GET blazing:game-list': 2,
+    'GET blazing:scoreline-list': 2,
+    'GET blazing:scoreline-changes': 2,
+    'GET blazing:game-stats-list': 6,
+    'GET blazing:game-stats-detail': 6,
+    'GET blazing:game-stats-me': 7,
+    'GET blazing:leaderboard-list': 4,
+    'GET blazing:head-to-head-list': 2,
+}
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'log')
+
+TEST_RUNNER = 'core.runner.QueryBudgetTestRunner'
+
 # CORS Config
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = False
@@ -84,16 +119,113 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and pinged before
+# reuse once idle for DB_HEALTH_CHECK_INTERVAL seconds. DB_POOL=pgbouncer
+# connects through a transaction pooler instead, which cannot hold the
+# server side cursors used by iterator().
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECK_INTERVAL': int(
+            os.environ.get('DB_HEALTH_CHECK_INTERVAL', 30)
+        ),
     }
 }
 
+DB_POOL = os.environ.get('DB_POOL', '')
+
+if DB_POOL == 'pgbouncer':
+    DATABASES['default'].update({
+        'HOST': os.environ.get('DB_POOL_HOST', 'pgbouncer'),
+        'PORT': os.environ.get('DB_POOL_PORT', '6432'),
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    })
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+STATS_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+
+# Every gunicorn worker has its own locmem cache, so a write would only
+# invalidate the stats cached by the worker that served it. Production
+# needs a backend shared between the workers.
+STATS_CACHE = os.environ.get(
+    'STATS_CACHE', 'db' if SERVING_PROFILE == 'production' else 'locmem'
+)
+if SERVING_PROFILE == 'production' and STATS_CACHE == 'locmem':
+    raise ImproperlyConfigured(
+        'STATS_CACHE=locmem is not shared between workers, '
+        'use a shared backend such as db in production'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'stats': {
+        'BACKEND': STATS_CACHE_BACKENDS[STATS_CACHE],
+        'LOCATION': os.environ.get(
+            'STATS_CACHE_LOCATION',
+            'game_stats_cache' if STATS_CACHE == 'db' else 'game-stats',
+        ),
+        'TIMEOUT': int(os.environ.get('STATS_CACHE_TIMEOUT', 60 * 60)),
+    },
+}
+
+# Live standings pushed to /api/blazing/live/ subscribers. LocalBroker
+# only reaches subscribers in the publishing process, so production
+# shares events between workers through the database.
+LIVE_BROKER = os.environ.get(
+    'LIVE_BROKER',
+    'blazing.live.DatabaseBroker' if SERVING_PROFILE == 'production'
+    else 'blazing.live.LocalBroker',
+)
+LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', 100))
+LIVE_HEARTBEAT = int(os.environ.get('LIVE_HEARTBEAT', 15))
+LIVE_MAX_DURATION = int(os.environ.get('LIVE_MAX_DURATION', 5 * 60))
+# Streams open at once in one process, each holds a worker thread
+LIVE_MAX_STREAMS = int(os.environ.get('LIVE_MAX_STREAMS', 2))
+LIVE_POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', 1))
+LIVE_EVENT_RETENTION = int(os.environ.get('LIVE_EVENT_RETENTION', 1000))
+# Shared between workers, DatabaseBroker only stores events while a
+# worker with subscribers has marked itself listening here
+LIVE_LISTENER_CACHE = 'stats'
+
+# Response compression by core.middleware.CompressionMiddleware. Encodings
+# are tried in order, br only when the brotli library is installed.
+COMPRESSION_ENCODINGS = ('br', 'gzip')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5)
+)
+# HTML is left out: the browsable API and admin pages put CSRF tokens
+# next to text echoed from the request, which BREACH can recover
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'text/plain',
+    'text/csv',
+    'application/x-ndjson',
+)
+
+# Token lookups cached per process by user.authentication, checked on
+# every hit against a per user generation kept in a cache shared between
+# workers so deleted tokens and changed users are dropped everywhere
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+TOKEN_GENERATION_CACHE = 'stats'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -113,6 +245,39 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/2.2/topics/auth/passwords/
+# The first hasher is used for new hashes; the rest are kept so existing
+# hashes still verify and are upgraded on the next login.
+
+PASSWORD_HASHER_POLICIES = {
+    'argon2': 'user.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'user.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'user.hashers.TunedPBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_POLICIES[PASSWORD_HASHER]] + [
+    hasher for policy, hasher in PASSWORD_HASHER_POLICIES.items()
+    if policy != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptPasswordHasher',
+]
+
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 512)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 150000)
+)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.1/topics/i18n/
@@ -135,5 +300,19 @@ STATIC_URL = '/static/'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media/'
-STATIC_ROOT = '/vol/web/static/'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', '/vol/web/static/')
 AUTH_USER_MODEL = 'core.User'
+
+# Static files are served by whitenoise in production. Hashed names are
+# cached by clients for ten years and gzip copies are made at collectstatic
+# time, so no work is done per request.
+WHITENOISE_MAX_AGE = int(os.environ.get('WHITENOISE_MAX_AGE', 60 * 60))
+
+if SERVING_PROFILE == 'production':
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+    )
+    STATICFILES_STORAGE = (
+        'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    )
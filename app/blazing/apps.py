@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BlazingConfig(AppConfig):
     name = 'blazing'
+
+    def ready(self):
+        from blazing import signals  # noqa: F401
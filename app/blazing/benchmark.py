@@ -0,0 +1,339 @@
+import json
+import math
+import os
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.league import generate_league
+from core.models import Scoreline, Tournament
+from blazing import fast_serializers, serializers
+
+
+PERCENTILES = (50, 95, 99)
+
+BULK_ROWS = 50
+
+
+class BenchmarkError(Exception):
+    """Raised when an endpoint fails while being benchmarked"""
+
+
+def percentile(values, percent):
+    """Return the nearest rank percentile of the values"""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def git_commit():
+    """Return the commit being benchmarked"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        ).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def seed(gamers, tournaments, games, scorelines, seed=0):
+    """Create a league and the users that drive the benchmark"""
+    user_ids, tournament_ids, game_ids = generate_league(
+        gamers, tournaments, games, scorelines, seed=seed
+    )
+    gamer = get_user_model().objects.get(id=user_ids[0])
+    superuser = get_user_model().objects.create_superuser(
+        'admin@league.test', 'testpass'
+    )
+    return {
+        'user_ids': user_ids,
+        'tournament_ids': tournament_ids,
+        'game_ids': game_ids,
+        'gamer': gamer,
+        'superuser': superuser,
+    }
+
+
+def client_for(user=None):
+    """Return an API client authenticated with the user's token"""
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def write_tournament():
+    """Create an empty tournament for write benchmarks"""
+    count = Tournament.objects.filter(name__startswith='Bench ').count()
+    return Tournament.objects.create(name=f'Bench {count}').id
+
+
+def endpoint_cases(league):
+    """Return the requests made against every blazing and user endpoint
+
+    Each case builds its URL and payload from the request index so writes
+    never collide. Reads come first so the league is unchanged while they
+    are measured.
+    """
+    users = league['user_ids']
+    player_a, player_b = users[0], users[1 % len(users)]
+    tournament, game = league['tournament_ids'][0], league['game_ids'][0]
+    pairs = [
+        (first, second) for first in users for second in users
+        if first != second
+    ]
+
+    def get(path, **params):
+        return lambda index: (path, params)
+
+    def scoreline(tournament_id, first, second):
+        return {
+            'tournament': tournament_id,
+            'game': game,
+            'first_player': first,
+            'second_player': second,
+            'first_player_score': 3,
+            'second_player_score': 2,
+            'draw_score': 1,
+        }
+
+    scoreline_tournament = {}
+
+    def create_scoreline(index):
+        if not scoreline_tournament:
+            scoreline_tournament['id'] = write_tournament()
+        first, second = pairs[index % len(pairs)]
+        return reverse('blazing:scoreline-list'), scoreline(
+            scoreline_tournament['id'], first, second
+        )
+
+    def bulk_scorelines(index):
+        tournament_id = write_tournament()
+        return reverse('blazing:scoreline-bulk'), [
+            scoreline(tournament_id, first, second)
+            for first, second in pairs[:BULK_ROWS]
+        ]
+
+    return [
+        {'name': 'tournaments', 'request': get(
+            reverse('blazing:tournament-list'))},
+        {'name': 'games', 'request': get(reverse('blazing:game-list'))},
+        {'name': 'scorelines', 'request': get(
+            reverse('blazing:scoreline-list'))},
+        {'name': 'scorelines by player', 'request': get(
+            reverse('blazing:scoreline-list'), player=player_a)},
+        {'name': 'scorelines export', 'request': get(
+            reverse('blazing:scoreline-export', args=['csv']))},
+        {'name': 'game stats', 'request': get(
+            reverse('blazing:game-stats-list'))},
+        {'name': 'game stats uncached', 'cold': True, 'request': get(
+            reverse('blazing:game-stats-list'))},
+        {'name': 'game stats page', 'cold': True, 'request': get(
+            reverse('blazing:game-stats-list'), page_size=20)},
+        {'name': 'game stats player', 'cold': True, 'request': get(
+            reverse('blazing:game-stats-detail', args=[player_a]))},
+        {'name': 'game stats me', 'user': 'gamer', 'cold': True,
+         'request': get(reverse('blazing:game-stats-me'))},
+        {'name': 'game stats export', 'request': get(
+            reverse('blazing:game-stats-export', args=['ndjson']))},
+        {'name': 'leaderboard', 'cold': True, 'request': get(
+            reverse('blazing:leaderboard-list'),
+            tournament=tournament, game=game, user=player_a)},
+        {'name': 'head to head', 'cold': True, 'request': get(
+            reverse('blazing:head-to-head-list'),
+            player_a=player_a, player_b=player_b)},
+        {'name': 'user me', 'user': 'gamer', 'request': get(
+            reverse('user:me'))},
+        {'name': 'user token', 'method': 'post', 'request': lambda index: (
+            reverse('user:token'),
+            {'email': league['gamer'].email, 'password': 'testpass'},
+        )},
+        {'name': 'user create', 'method': 'post', 'request': lambda index: (
+            reverse('user:create'), {
+                'email': f'new{index}@bench.test',
+                'password': 'testpass',
+                'name': f'New {index}',
+            },
+        )},
+        {'name': 'tournament create', 'method': 'post', 'user': 'superuser',
+         'request': lambda index: (
+             reverse('blazing:tournament-list'), {'name': f'New {index}'},
+         )},
+        {'name': 'game create', 'method': 'post', 'user': 'superuser',
+         'request': lambda index: (
+             reverse('blazing:game-list'), {'name': f'New {index}'},
+         )},
+        {'name': 'scoreline create', 'method': 'post', 'user': 'superuser',
+         'request': create_scoreline},
+        {'name': 'scoreline bulk', 'method': 'post', 'user': 'superuser',
+         'request': bulk_scorelines},
+    ]
+
+
+def send(client, case, index):
+    """Make one request for a case and return its response"""
+    path, data = case['request'](index)
+    method = case.get('method', 'get')
+    if case.get('cold'):
+        caches['stats'].clear()
+    if method == 'get':
+        response = client.get(path, data)
+    else:
+        response = getattr(client, method)(path, data, format='json')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    if response.status_code >= 400:
+        raise BenchmarkError(
+            f"{case['name']} returned {response.status_code}: "
+            f"{response.content[:200]!r}"
+        )
+    return response
+
+
+def measure(client, case, requests):
+    """Return latency, query and memory figures for a case"""
+    send(client, case, 0)
+    timings = []
+    queries = []
+    for index in range(1, requests + 1):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            send(client, case, index)
+            timings.append(time.perf_counter() - start)
+        queries.append(len(captured))
+
+    # Memory is traced in a separate request as tracing slows everything
+    tracemalloc.start()
+    try:
+        send(client, case, requests + 1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        f'p{percent}_ms': round(percentile(timings, percent) * 1000, 3)
+        for percent in PERCENTILES
+    }
+    result['queries'] = max(queries)
+    result['peak_kib'] = round(peak / 1024, 1)
+    return result
+
+
+def run_benchmark(league, requests=20, only=None):
+    """Drive every endpoint and return the results by case name"""
+    clients = {
+        None: client_for(),
+        'gamer': client_for(league['gamer']),
+        'superuser': client_for(league['superuser']),
+    }
+    results = {}
+    for case in endpoint_cases(league):
+        if only and case['name'] not in only:
+            continue
+        results[case['name']] = measure(
+            clients[case.get('user')], case, requests
+        )
+    return results
+
+
+def best_of(repeat, build):
+    """Return the fastest of repeated calls and the last result"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = build()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def compare_serializers(rows, repeat=3):
+    """Time the DRF serializer against the read plan for scorelines
+
+    Both paths read the first rows scorelines and render them with the
+    API's JSON renderer, so the figures cover the query, the per row
+    work and the encoding. The rendered bytes are compared too.
+    """
+    renderer = JSONRenderer()
+    plan = fast_serializers.SCORELINE
+    scorelines = Scoreline.objects.select_related(
+        'tournament', 'game', 'first_player', 'second_player'
+    ).order_by('id')[:rows]
+    values = plan.values(Scoreline.objects.order_by('id'))[:rows]
+
+    drf_time, drf_content = best_of(repeat, lambda: renderer.render(
+        serializers.ScorelineSerializer(scorelines, many=True).data
+    ))
+    plan_time, plan_content = best_of(repeat, lambda: renderer.render(
+        plan.dump(values)
+    ))
+    return {
+        'rows': rows,
+        'drf_ms': round(drf_time * 1000, 1),
+        'plan_ms': round(plan_time * 1000, 1),
+        'speedup': round(drf_time / plan_time, 2),
+        'bytes': len(plan_content),
+        'identical': drf_content == plan_content,
+    }
+
+
+def load_runs(path):
+    """Return the stored benchmark runs, oldest first"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as runs:
+        return [json.loads(line) for line in runs if line.strip()]
+
+
+def save_run(path, params, results):
+    """Append a run to the results file and return it"""
+    run = {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'params': params,
+        'results': results,
+    }
+    with open(path, 'a') as runs:
+        runs.write(json.dumps(run, sort_keys=True) + '\n')
+    return run
+
+
+def previous_run(runs, params):
+    """Return the latest stored run made with the same parameters"""
+    for run in reversed(runs):
+        if run['params'] == params:
+            return run
+    return None
+
+
+def regressions(previous, results, threshold=0.2):
+    """Return the cases that got slower or run more queries than before"""
+    found = []
+    for name, result in results.items():
+        before = previous['results'].get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            found.append(
+                f"{name}: {before['queries']} -> {result['queries']} queries"
+            )
+        if result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            found.append(
+                f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms"
+            )
+    return found
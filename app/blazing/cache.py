@@ -0,0 +1,129 @@
+import time
+from hashlib import md5
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+
+from core import compression
+
+
+GENERATION_KEY = 'game-stats:generation'
+
+
+def stats_cache():
+    """Return the cache backend used for stats payloads"""
+    return caches['stats']
+
+
+def new_generation():
+    """Return a generation that has never been used before"""
+    return f'{time.time_ns():x}{uuid4().hex[:8]}'
+
+
+def get_generation():
+    """Return the current stats generation
+
+    add only stores a generation when there is none, so workers racing to
+    start a missing counter all end up reading the same one.
+    """
+    cache = stats_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, new_generation(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Invalidate every cached stats payload
+
+    The db and file backends increment with a separate get and set, so
+    two writers bumping a counter at once could both store the same
+    value and one bump would be lost. A fresh generation is stored
+    instead. Whichever of two racing bumps lands last, the generation
+    ends up at a value no payload was ever cached under.
+    """
+    stats_cache().set(GENERATION_KEY, new_generation(), None)
+
+
+def invalidate():
+    """Invalidate cached stats for a write in the current transaction
+
+    The generation is bumped again on commit so a read racing the write
+    cannot cache the old data under the new generation.
+    """
+    bump_generation()
+    transaction.on_commit(bump_generation)
+
+
+def fragment_key(generation, kind, key):
+    """Return the cache key of an encoded fragment of a stats payload"""
+    return f'game-stats:{generation}:{kind}:' + ':'.join(map(str, key))
+
+
+def variant_key(request, vary=()):
+    """Return a key for the representation a request asks for"""
+    variant = '|'.join((
+        request.get_full_path(),
+        request.accepted_media_type or '',
+        *[str(value) for value in vary],
+    ))
+    return md5(variant.encode('utf-8')).hexdigest()
+
+
+def cached_response(request, build_response, vary=()):
+    """Serve a rendered JSON response from the stats cache
+
+    The cache is keyed on the stats generation so any write to the
+    underlying models makes old entries unreachable. Values in vary are
+    added to the key for responses that depend on more than the URL. Non
+    JSON renderers, such as the browsable API, always build a fresh
+    response. Compressed bodies are kept in the entry next to the plain
+    one, so a hit never compresses the same payload twice.
+    """
+    if request.accepted_renderer.format != 'json':
+        return build_response()
+
+    variant = variant_key(request, vary)
+    generation = get_generation()
+    etag = f'"{generation}-{variant}"'
+    key = f'game-stats:{generation}:{variant}'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    if etag in tags or f'W/{etag}' in tags:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    cached = stats_cache().get(key)
+    if cached is not None:
+        response = HttpResponse(
+            cached['content'], content_type=cached['content_type']
+        )
+        response['ETag'] = etag
+        encoded = cached.setdefault('encoded', {})
+        encodings = len(encoded)
+        compression.compress_response(request, response, encoded)
+        if len(encoded) > encodings:
+            stats_cache().set(key, cached)
+        return response
+
+    def store(response):
+        if response.status_code == 200:
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'encoded': {},
+            }
+            compression.compress_response(
+                request, response, entry['encoded']
+            )
+            stats_cache().set(key, entry)
+
+    response = build_response()
+    response['ETag'] = etag
+    response.add_post_render_callback(store)
+    return response
@@ -0,0 +1,88 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+
+from core.standings import STANDING_FIELDS
+
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+SCORELINE_COLUMNS = (
+    ('id', 'id'),
+    ('tournament', 'tournament_id'),
+    ('tournament_name', 'tournament__name'),
+    ('game', 'game_id'),
+    ('game_name', 'game__name'),
+    ('first_player', 'first_player_id'),
+    ('first_player_email', 'first_player__email'),
+    ('first_player_name', 'first_player__name'),
+    ('second_player', 'second_player_id'),
+    ('second_player_email', 'second_player__email'),
+    ('second_player_name', 'second_player__name'),
+    ('first_player_score', 'first_player_score'),
+    ('second_player_score', 'second_player_score'),
+    ('first_player_score_goals', 'first_player_score_goals'),
+    ('second_player_score_goals', 'second_player_score_goals'),
+    ('draw_score', 'draw_score'),
+)
+
+STANDING_COLUMNS = (
+    ('user', 'user_id'),
+    ('email', 'user__email'),
+    ('name', 'user__name'),
+    ('tournament', 'tournament_id'),
+    ('tournament_name', 'tournament__name'),
+    ('game', 'game_id'),
+    ('game_name', 'game__name'),
+) + tuple((field, field) for field in STANDING_FIELDS)
+
+
+class Echo:
+    """File-like object that hands back what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers, rows):
+    """Yield CSV lines for the rows, starting with the headers"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(headers, rows):
+    """Yield one JSON object per row"""
+    for row in rows:
+        yield json.dumps(
+            dict(zip(headers, row)), separators=(',', ':')
+        ) + '\n'
+
+
+def export_response(queryset, columns, fmt, filename):
+    """Stream a queryset as CSV or NDJSON
+
+    Rows are read in chunks through a server-side cursor so memory stays
+    flat however many rows are exported, and the first bytes are sent
+    before the query has been fully read.
+    """
+    headers = [header for header, field in columns]
+    rows = queryset.values_list(
+        *[field for header, field in columns]
+    ).iterator(chunk_size=CHUNK_SIZE)
+    lines = csv_lines if fmt == 'csv' else ndjson_lines
+
+    response = StreamingHttpResponse(
+        lines(headers, rows), content_type=CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{fmt}"'
+    )
+    return response
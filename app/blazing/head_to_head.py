@@ -0,0 +1,54 @@
+from core.models import HeadToHead
+
+
+RECORD_FIELDS = (
+    'games_played',
+    'player_a_won',
+    'player_b_won',
+    'draws',
+    'player_a_goals',
+    'player_b_goals',
+)
+
+
+def matchup(player_a, player_b, tournament=None, game=None):
+    """Return how player A has done against player B
+
+    Records are stored once per unordered pair, so this is one indexed
+    query whichever order the players are asked for in.
+    """
+    low, high = sorted((player_a, player_b))
+    rows = HeadToHead.objects.filter(
+        player_low_id=low, player_high_id=high
+    ).select_related('tournament', 'game').order_by('tournament_id', 'game_id')
+    if tournament is not None:
+        rows = rows.filter(tournament_id=tournament)
+    if game is not None:
+        rows = rows.filter(game_id=game)
+
+    a_side, b_side = ('low', 'high') if player_a == low else ('high', 'low')
+    totals = dict.fromkeys(RECORD_FIELDS, 0)
+    records = []
+    for row in rows:
+        record = {
+            'tournament': {
+                'id': row.tournament_id, 'name': row.tournament.name,
+            },
+            'game': {'id': row.game_id, 'name': row.game.name},
+            'games_played': row.games_played,
+            'player_a_won': getattr(row, f'{a_side}_won'),
+            'player_b_won': getattr(row, f'{b_side}_won'),
+            'draws': row.draws,
+            'player_a_goals': getattr(row, f'{a_side}_goals'),
+            'player_b_goals': getattr(row, f'{b_side}_goals'),
+        }
+        for field in RECORD_FIELDS:
+            totals[field] += record[field]
+        records.append(record)
+
+    return {
+        'player_a': player_a,
+        'player_b': player_b,
+        'totals': totals,
+        'records': records,
+    }
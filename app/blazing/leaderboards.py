@@ -0,0 +1,88 @@
+from django.db.models import Q
+
+from core.models import PlayerStanding, PlayerTournamentStanding, \
+    PlayerGameStanding
+
+
+RANK_FIELDS = ('points', 'goal_difference', 'goals_for')
+
+RANK_ORDER = ('-points', '-goal_difference', '-goals_for', 'user_id')
+
+ENTRY_FIELDS = (
+    'points',
+    'goal_difference',
+    'goals_for',
+    'goals_against',
+    'won',
+    'lost',
+    'draws',
+    'games_played',
+)
+
+
+def standings_for(tournament=None, game=None):
+    """Return the precomputed standings that rank a tournament and/or game"""
+    if tournament is not None and game is not None:
+        return PlayerStanding.objects.filter(
+            tournament_id=tournament, game_id=game
+        )
+    if tournament is not None:
+        return PlayerTournamentStanding.objects.filter(
+            tournament_id=tournament
+        )
+    return PlayerGameStanding.objects.filter(game_id=game)
+
+
+def entry(standing, rank):
+    """Return the leaderboard entry for a standing"""
+    data = {
+        'rank': rank,
+        'user': standing.user_id,
+        'name': standing.user.name,
+        'email': standing.user.email,
+    }
+    for field in ENTRY_FIELDS:
+        data[field] = getattr(standing, field)
+    return data
+
+
+def top(standings, limit):
+    """Return the first entries of a leaderboard
+
+    Players level on points, goal difference and goals for share a rank.
+    """
+    rows = standings.select_related('user').order_by(*RANK_ORDER)[:limit]
+    entries = []
+    previous = None
+    rank = 0
+    for position, standing in enumerate(rows, start=1):
+        key = tuple(getattr(standing, field) for field in RANK_FIELDS)
+        if key != previous:
+            rank = position
+            previous = key
+        entries.append(entry(standing, rank))
+    return entries
+
+
+def rank_of(standings, user):
+    """Return the leaderboard entry for a user, or None if they never played
+
+    The rank is one more than the number of players strictly ahead, which
+    is a single count over the ranking index.
+    """
+    standing = standings.select_related('user').filter(user=user).first()
+    if standing is None:
+        return None
+    points, goal_difference, goals_for = (
+        getattr(standing, field) for field in RANK_FIELDS
+    )
+    ahead = standings.filter(
+        Q(points__gt=points) |
+        Q(points=points, goal_difference__gt=goal_difference) |
+        Q(
+            points=points,
+            goal_difference=goal_difference,
+            goals_for__gt=goals_for,
+        )
+    ).count()
+    return entry(standing, ahead + 1)
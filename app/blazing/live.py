@@ -0,0 +1,355 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+from django.utils.module_loading import import_string
+
+from core.db import lock_for_writes
+from core.models import LiveEvent, PlayerStanding
+from core.standings import STANDING_FIELDS
+
+
+logger = logging.getLogger(__name__)
+
+LAGGED = object()
+
+
+class Subscription:
+    """Events waiting for one subscriber, optionally for one tournament"""
+
+    def __init__(self, tournament=None, max_events=100):
+        self.tournament = tournament
+        self.events = queue.Queue(max_events)
+        self.lagged = False
+
+    def wants(self, event):
+        """Return whether the event is for this subscriber"""
+        return self.tournament is None or \
+            self.tournament == event['tournament']
+
+    def put(self, event):
+        """Queue an event, marking the subscriber lagged when it is full"""
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.lagged = True
+
+    def get(self, timeout):
+        """Return the next event, LAGGED or None after the timeout
+
+        A subscriber that fell behind loses its queued events and gets
+        LAGGED so it can start again from a snapshot.
+        """
+        if self.lagged:
+            self.lagged = False
+            while not self.events.empty():
+                self.events.get_nowait()
+            return LAGGED
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalBroker:
+    """Fan events out to the subscribers in this process
+
+    Events only reach subscribers in the process that published them, so
+    this broker is for a single process such as runserver. Use
+    DatabaseBroker when serving with more than one worker.
+    """
+
+    def __init__(self, max_events=100):
+        self.max_events = max_events
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def subscribe(self, tournament=None):
+        """Return a new subscription"""
+        subscription = Subscription(tournament, self.max_events)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop sending events to a subscription"""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(self):
+        """Return whether anyone is listening"""
+        return bool(self._subscriptions)
+
+    def publish(self, event):
+        """Number an event and send it to every interested subscriber"""
+        with self._lock:
+            self._sequence += 1
+            event = dict(event, id=self._sequence)
+        self.deliver(event)
+
+    def deliver(self, event):
+        """Send a numbered event to every interested subscriber"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.wants(event):
+                subscription.put(event)
+
+
+class DatabaseBroker(LocalBroker):
+    """Share events between worker processes through the LiveEvent table
+
+    publish stores the event. While a process has subscribers, a thread
+    reads the events stored since its last look every LIVE_POLL_INTERVAL
+    seconds and delivers them the way LocalBroker does. Writers lock the
+    table, so events become visible in id order and none are stepped
+    over. Only the newest LIVE_EVENT_RETENTION events are kept.
+
+    Processes with subscribers keep a key fresh in the LIVE_LISTENER_CACHE,
+    and nothing is stored while no process has set it lately.
+    """
+
+    listening_key = 'live:listening'
+
+    def __init__(self, max_events=100, interval=None, retention=None):
+        super().__init__(max_events)
+        self.interval = settings.LIVE_POLL_INTERVAL if interval is None \
+            else interval
+        self.retention = settings.LIVE_EVENT_RETENTION if retention is None \
+            else retention
+        self._last = None
+        self._poller = None
+
+    def subscribe(self, tournament=None):
+        """Return a new subscription, polling for events while there are any
+
+        The poller starts from the newest stored event, the snapshot the
+        subscriber reads next already has everything before it.
+        """
+        subscription = Subscription(tournament, self.max_events)
+        self.mark_listening()
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._poller is None:
+                self._last = LiveEvent.objects.aggregate(
+                    last=Max('id')
+                )['last'] or 0
+                self._poller = threading.Thread(
+                    target=self._poll_forever, name='live-poller', daemon=True
+                )
+                self._poller.start()
+        return subscription
+
+    def mark_listening(self):
+        """Tell every process that this one has subscribers"""
+        caches[settings.LIVE_LISTENER_CACHE].set(
+            self.listening_key, True, max(int(self.interval * 10), 5)
+        )
+
+    def has_subscribers(self):
+        """Return whether any process has had subscribers lately"""
+        return bool(self._subscriptions) or caches[
+            settings.LIVE_LISTENER_CACHE
+        ].get(self.listening_key, False)
+
+    def publish(self, event):
+        """Store an event for the pollers in every process"""
+        with transaction.atomic():
+            lock_for_writes(LiveEvent)
+            stored = LiveEvent.objects.create(
+                tournament_id=event['tournament'],
+                standings=json.dumps(
+                    event['standings'], cls=DjangoJSONEncoder
+                ),
+            )
+            LiveEvent.objects.filter(
+                id__lte=stored.id - self.retention
+            ).delete()
+
+    def poll(self):
+        """Deliver the events stored since the last poll"""
+        for event_id, tournament, standings in LiveEvent.objects.filter(
+            id__gt=self._last
+        ).order_by('id').values_list('id', 'tournament_id', 'standings'):
+            self._last = event_id
+            self.deliver({
+                'id': event_id,
+                'tournament': tournament,
+                'standings': json.loads(standings),
+            })
+
+    def _poll_forever(self):
+        """Poll until the last subscriber of this process has gone"""
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscriptions:
+                        self._poller = None
+                        return
+                try:
+                    self.mark_listening()
+                    self.poll()
+                except DatabaseError:
+                    # Try again on a fresh connection next time round
+                    logger.exception('Polling live events failed')
+                    connection.close()
+                time.sleep(self.interval)
+        finally:
+            with self._lock:
+                if self._poller is threading.current_thread():
+                    self._poller = None
+            connection.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the broker configured by LIVE_BROKER"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIVE_BROKER)(
+                max_events=settings.LIVE_QUEUE_SIZE
+            )
+        return _broker
+
+
+_streams = set()
+_streams_lock = threading.Lock()
+
+
+class EventStream:
+    """An event_stream holding one of the LIVE_MAX_STREAMS of this process
+
+    The response closes it when the client goes away, even before the
+    stream started, which gives the slot back.
+    """
+
+    def __init__(self, tournament=None):
+        self.events = event_stream(tournament)
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        """Stop the stream and give its slot back"""
+        self.events.close()
+        with _streams_lock:
+            _streams.discard(self)
+
+
+def open_stream(tournament=None):
+    """Return an EventStream, or None when this process has no slot left
+
+    Every stream keeps a worker thread busy for up to LIVE_MAX_DURATION
+    seconds, so the number open at once is capped to leave threads for
+    the other requests.
+    """
+    with _streams_lock:
+        if len(_streams) >= settings.LIVE_MAX_STREAMS:
+            return None
+        stream = EventStream(tournament)
+        _streams.add(stream)
+    return stream
+
+
+def snapshot(tournament=None):
+    """Return the current standings grouped by tournament"""
+    standings = PlayerStanding.objects.order_by(
+        'tournament_id', 'game_id', 'user_id'
+    )
+    if tournament is not None:
+        standings = standings.filter(tournament_id=tournament)
+    grouped = defaultdict(list)
+    for row in standings.values(
+        'tournament_id', 'user_id', 'game_id', *STANDING_FIELDS
+    ):
+        grouped[row.pop('tournament_id')].append({
+            'user': row.pop('user_id'), 'game': row.pop('game_id'), **row,
+        })
+    return [
+        {'tournament': key, 'standings': rows}
+        for key, rows in grouped.items()
+    ]
+
+
+def publish_standings(keys):
+    """Publish the current totals of the standings that changed
+
+    Rows carry totals rather than increments, so applying one twice or
+    after a snapshot that already has it is harmless. A row that no
+    longer exists is sent with zeroed totals.
+    """
+    broker = get_broker()
+    if not broker.has_subscribers() or not keys:
+        return
+    keys = set(keys)
+    current = {}
+    for row in PlayerStanding.objects.filter(
+        user_id__in={key[0] for key in keys},
+        tournament_id__in={key[1] for key in keys},
+        game_id__in={key[2] for key in keys},
+    ).values('user_id', 'tournament_id', 'game_id', *STANDING_FIELDS):
+        current[row['user_id'], row['tournament_id'], row['game_id']] = row
+
+    grouped = defaultdict(list)
+    for user, tournament, game in sorted(keys):
+        row = current.get((user, tournament, game))
+        grouped[tournament].append({
+            'user': user,
+            'game': game,
+            **{field: row[field] if row else 0 for field in STANDING_FIELDS},
+        })
+    for tournament, rows in grouped.items():
+        broker.publish({'tournament': tournament, 'standings': rows})
+
+
+def server_sent_event(name, data, event_id=None):
+    """Format one server sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def event_stream(tournament=None, heartbeat=None, max_duration=None):
+    """Yield a snapshot of the standings, then changes as they happen
+
+    The stream holds a worker thread until it ends after max_duration
+    seconds; EventSource clients reconnect on their own and get a fresh
+    snapshot. Comments are sent while idle so dropped clients are found.
+    """
+    heartbeat = settings.LIVE_HEARTBEAT if heartbeat is None else heartbeat
+    if max_duration is None:
+        max_duration = settings.LIVE_MAX_DURATION
+    broker = get_broker()
+    subscription = broker.subscribe(tournament)
+    try:
+        yield server_sent_event('snapshot', snapshot(tournament))
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            event = subscription.get(heartbeat)
+            if event is None:
+                yield ': heartbeat\n\n'
+            elif event is LAGGED:
+                yield server_sent_event('snapshot', snapshot(tournament))
+            else:
+                yield server_sent_event('standings', {
+                    'tournament': event['tournament'],
+                    'standings': event['standings'],
+                }, event['id'])
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,121 @@
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from blazing import benchmark
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API against a seeded test database"""
+    help = 'Report latency, queries and memory for every API endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gamers', type=int, default=50)
+        parser.add_argument('--tournaments', type=int, default=4)
+        parser.add_argument('--games', type=int, default=3)
+        parser.add_argument('--scorelines', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Timed requests per endpoint',
+        )
+        parser.add_argument(
+            '--case',
+            action='append',
+            help='Only benchmark the named endpoint',
+        )
+        parser.add_argument(
+            '--output',
+            default=os.path.join(settings.BASE_DIR, 'benchmark-results.jsonl'),
+            help='File the results are appended to',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Slowdown of the p95 latency reported as a regression',
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when a regression is found',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        params = {
+            name: options[name] for name in (
+                'gamers', 'tournaments', 'games', 'scorelines', 'seed',
+                'requests',
+            )
+        }
+        self.stdout.write(f'Seeding league: {params}')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            caches['stats'].clear()
+            league = benchmark.seed(
+                params['gamers'],
+                params['tournaments'],
+                params['games'],
+                params['scorelines'],
+                seed=params['seed'],
+            )
+            results = benchmark.run_benchmark(
+                league, params['requests'], only=options['case']
+            )
+        except benchmark.BenchmarkError as exc:
+            raise CommandError(str(exc))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        previous = benchmark.previous_run(
+            benchmark.load_runs(options['output']), params
+        )
+        run = benchmark.save_run(options['output'], params, results)
+        self.report(run, previous)
+
+        if previous is None:
+            return
+        found = benchmark.regressions(
+            previous, results, options['threshold']
+        )
+        for regression in found:
+            self.stdout.write(self.style.WARNING(f'Regression {regression}'))
+        if found and options['fail_on_regression']:
+            raise CommandError(
+                f"{len(found)} regressions since {previous['commit']}"
+            )
+
+    def report(self, run, previous):
+        """Write the results as a table"""
+        self.stdout.write(
+            f"{'endpoint':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'peak KiB':>10}{'p95 before':>12}"
+        )
+        for name, result in run['results'].items():
+            before = '-'
+            if previous and name in previous['results']:
+                before = str(previous['results'][name]['p95_ms'])
+            self.stdout.write(
+                f"{name:<24}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['p99_ms']:>10}{result['queries']:>9}"
+                f"{result['peak_kib']:>10}{before:>12}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Results for {run['commit']} saved"
+        ))
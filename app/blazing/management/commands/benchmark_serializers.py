@@ -0,0 +1,74 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core.league import generate_league
+from blazing import benchmark
+
+
+TOURNAMENTS = 10
+
+GAMES = 5
+
+
+def gamers_for(rows):
+    """Return the fewest gamers whose league has room for rows scorelines"""
+    pairs = math.ceil(rows / (TOURNAMENTS * GAMES))
+    return max(math.ceil((1 + math.sqrt(1 + 4 * pairs)) / 2), 2)
+
+
+class Command(BaseCommand):
+    """Django command to compare the scoreline read paths"""
+    help = 'Compare the DRF scoreline serializer with the read plan'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            action='append',
+            help='Scorelines serialized per run, 10000 and 100000 by default',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        sizes = sorted(options['rows'] or [10000, 100000])
+        self.stdout.write(f'Seeding {sizes[-1]} scorelines')
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            generate_league(
+                gamers_for(sizes[-1]), TOURNAMENTS, GAMES, sizes[-1],
+                seed=options['seed'], batch_size=5000,
+            )
+            results = [
+                benchmark.compare_serializers(rows, options['repeat'])
+                for rows in sizes
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'rows':>8}{'drf ms':>10}{'plan ms':>10}{'speedup':>9}"
+            f"{'KiB':>10}{'identical':>11}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['rows']:>8}{result['drf_ms']:>10}"
+                f"{result['plan_ms']:>10}{result['speedup']:>9}"
+                f"{round(result['bytes'] / 1024):>10}"
+                f"{str(result['identical']):>11}"
+            )
+        if not all(result['identical'] for result in results):
+            raise CommandError('The read plan output differs from DRF')
@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class GamerCursorPagination(CursorPagination):
+    """Cursor pagination over gamers, used when a page size is asked for"""
+    ordering = 'id'
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination ordered by id, so deep pages stay cheap"""
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,128 @@
+import json
+import re
+from collections.abc import Sequence
+from uuid import uuid4
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """Return data as-is, for views that build their own response
+
+    Error responses raised before the view builds its response still
+    carry serializable data, which is rendered as JSON.
+    """
+    media_type = '*/*'
+    format = ''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (dict, list)):
+            return renderers.JSONRenderer().render(data)
+        return data
+
+
+def encode(data):
+    """Return data encoded the way the JSON renderer encodes it"""
+    return renderers.JSONRenderer().render(data)
+
+
+class Fragment(Sequence):
+    """A JSON list that has already been encoded
+
+    FragmentJSONRenderer splices the bytes into the response as they
+    are. Anything else reading the fragment sees the decoded list, which
+    is only decoded when first needed.
+    """
+
+    def __init__(self, content, data=None):
+        self.content = content
+        self._data = data
+
+    @property
+    def data(self):
+        """Return the decoded list"""
+        if self._data is None:
+            self._data = json.loads(self.content.decode('utf-8'))
+        return self._data
+
+    def tolist(self):
+        """Return the decoded list, read by DRF's JSON encoder"""
+        return self.data
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __eq__(self, other):
+        if isinstance(other, Fragment):
+            return self.content == other.content
+        return self.data == other
+
+    def __repr__(self):
+        return f'Fragment({self.content!r})'
+
+
+class FragmentEncoder(JSONEncoder):
+    """Encode fragments as placeholders to be replaced after encoding"""
+
+    def __init__(self, *args, placeholder, fragments, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placeholder = placeholder
+        self.fragments = fragments
+
+    def default(self, obj):
+        if isinstance(obj, Fragment):
+            if self.indent is not None:
+                return obj.data
+            self.fragments.append(obj.content)
+            return f'{self.placeholder}:{len(self.fragments) - 1}'
+        return super().default(obj)
+
+
+class FragmentJSONRenderer(renderers.JSONRenderer):
+    """JSON renderer that splices in pre-encoded fragments
+
+    Output is the same as JSONRenderer for the decoded data. Fragments
+    are left in place of unique placeholder strings and swapped in once
+    the rest of the document is encoded, so their contents are never
+    encoded again. Indented output decodes them instead.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent is None:
+            separators = (
+                renderers.SHORT_SEPARATORS if self.compact
+                else renderers.LONG_SEPARATORS
+            )
+        else:
+            separators = renderers.INDENT_SEPARATORS
+
+        placeholder = uuid4().hex
+        fragments = []
+        ret = FragmentEncoder(
+            placeholder=placeholder,
+            fragments=fragments,
+            indent=indent,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=separators,
+        ).encode(data)
+
+        # See JSONRenderer, fragments were escaped when they were encoded
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        ret = ret.encode('utf-8')
+        if not fragments:
+            return ret
+        return re.sub(
+            f'"{placeholder}:(\\d+)"'.encode(),
+            lambda match: fragments[int(match.group(1))],
+            ret,
+        )
@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 
-from core.models import Game, Tournament, Scoreline
-from user.serializers import UserSerializer
+from core import changes
+from core import standings
+from core.models import Game, Tournament, Scoreline, ScorelineChange
 
 class GameSerializer(serializers.ModelSerializer):
     """Serializer for tag object"""
@@ -22,14 +25,35 @@ class TournamentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+def validate_scoreline_total(data):
+    """Check the scores of a scoreline do not add up to more than 10"""
+    total = (
+        data['first_player_score']
+        + data['draw_score']
+        + data['second_player_score']
+    )
+    if total > 10:
+        raise serializers.ValidationError("Scoreline cannot be grater than 10")
+    return data
+
+
+class PlayerSerializer(serializers.ModelSerializer):
+    """Read only serializer for the public fields of a player"""
+
+    class Meta:
+        model = get_user_model()
+        fields = ('email', 'name')
+        read_only_fields = ('email', 'name')
+
+
 class ScorelineSerializer(serializers.ModelSerializer):
     """Serializer for Scoreline object"""
     # tournament =  serializers.StringRelatedField(many=True)
     # game =  serializers.StringRelatedField(many=True)
-    tournament =  TournamentSerializer()
-    game =  GameSerializer()
-    first_player =  UserSerializer()
-    second_player =  UserSerializer()
+    tournament =  TournamentSerializer(read_only=True)
+    game =  GameSerializer(read_only=True)
+    first_player =  PlayerSerializer(read_only=True)
+    second_player =  PlayerSerializer(read_only=True)
     # tournament = serializers.PrimaryKeyRelatedField(
     #     # many=True,
     #     queryset=Tournament.objects.all()
@@ -41,9 +65,7 @@ class ScorelineSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         """Check that the start is before the stop."""
-        if data['first_player_score'] + data['draw_score'] + data['second_player_score'] > 10:
-            raise serializers.ValidationError("Scoreline cannot be grater than 10")
-        return data
+        return validate_scoreline_total(data)
 
     class Meta:
         model = Scoreline
@@ -71,4 +93,146 @@ class ScorelineCreateSerializer(ScorelineSerializer):
     )
     second_player =  serializers.PrimaryKeyRelatedField(
         queryset=get_user_model().objects.all()
-    )
\ No newline at end of file
+    )
+
+
+class ScorelineBulkItemSerializer(serializers.Serializer):
+    """Serializer for a single row of a bulk scoreline upload"""
+    tournament = serializers.IntegerField()
+    game = serializers.IntegerField()
+    first_player = serializers.IntegerField()
+    second_player = serializers.IntegerField()
+    first_player_score = serializers.IntegerField(default=0)
+    second_player_score = serializers.IntegerField(default=0)
+    first_player_score_goals = serializers.IntegerField(default=0)
+    second_player_score_goals = serializers.IntegerField(default=0)
+    draw_score = serializers.IntegerField(default=0)
+
+    def validate(self, data):
+        """Check the scoreline total for the row"""
+        return validate_scoreline_total(data)
+
+
+class ScorelineBulkSerializer(serializers.ListSerializer):
+    """Serializer for creating many scorelines at once
+
+    Related objects for every row are resolved with one query per model
+    and errors are reported per row, in the order they were sent.
+    """
+    child = ScorelineBulkItemSerializer()
+    max_rows = 1000
+    related_fields = (
+        ('tournament', Tournament),
+        ('game', Game),
+        ('first_player', get_user_model()),
+        ('second_player', get_user_model()),
+    )
+    key_fields = ('tournament', 'game', 'first_player', 'second_player')
+
+    def to_internal_value(self, data):
+        """Validate every row before anything is written"""
+        if not isinstance(data, list) or not data:
+            raise serializers.ValidationError({
+                'non_field_errors': ['Expected a non empty list of scorelines']
+            })
+        if len(data) > self.max_rows:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    f'Cannot create more than {self.max_rows} scorelines '
+                    'at once'
+                ]
+            })
+
+        rows = []
+        errors = []
+        for item in data:
+            try:
+                rows.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                rows.append(None)
+                errors.append(exc.detail)
+
+        self._check_related(rows, errors)
+        self._check_unique(rows, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
+    def _check_related(self, rows, errors):
+        """Check related objects exist using one query per model"""
+        wanted = {}
+        for field, model in self.related_fields:
+            wanted.setdefault(model, set()).update(
+                row[field] for row in rows if row is not None
+            )
+        existing = {
+            model: set(model.objects.filter(pk__in=ids).values_list(
+                'pk', flat=True
+            ))
+            for model, ids in wanted.items()
+        }
+        message = serializers.PrimaryKeyRelatedField.default_error_messages[
+            'does_not_exist'
+        ]
+        for row, row_errors in zip(rows, errors):
+            if row is None:
+                continue
+            for field, model in self.related_fields:
+                if row[field] not in existing[model]:
+                    row_errors[field] = [message.format(pk_value=row[field])]
+
+    def _check_unique(self, rows, errors):
+        """Check rows are unique against each other and stored scorelines"""
+        valid = [
+            row for row, row_errors in zip(rows, errors)
+            if row is not None and not row_errors
+        ]
+        if not valid:
+            return
+        lookup = {
+            f'{field}__in': {row[field] for row in valid}
+            for field in self.key_fields
+        }
+        taken = set(Scoreline.objects.filter(**lookup).values_list(
+            *self.key_fields
+        ))
+        message = UniqueTogetherValidator.message.format(
+            field_names=', '.join(self.key_fields)
+        )
+        for row, row_errors in zip(rows, errors):
+            if row is None or row_errors:
+                continue
+            key = tuple(row[field] for field in self.key_fields)
+            if key in taken:
+                row_errors['non_field_errors'] = [message]
+            taken.add(key)
+
+    def create(self, validated_data):
+        """Insert every row in a single transaction
+
+        Uniqueness is checked before the transaction, so a scoreline
+        inserted concurrently can still fail the insert. The rows it
+        clashes with are then reported the same way validation does.
+        """
+        try:
+            with transaction.atomic():
+                scorelines = Scoreline.objects.bulk_create([
+                    Scoreline(**{
+                        f'{field}_id' if field in self.key_fields else field:
+                        value
+                        for field, value in row.items()
+                    })
+                    for row in validated_data
+                ])
+                standings.apply_scorelines(scorelines)
+                changes.record(
+                    changes.saved_ids(scorelines), ScorelineChange.CREATE
+                )
+        except IntegrityError:
+            errors = [{} for row in validated_data]
+            self._check_unique(validated_data, errors)
+            if not any(errors):
+                raise
+            raise serializers.ValidationError(errors)
+        return scorelines
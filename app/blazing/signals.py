@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from core.changes import scorelines_loaded
+from core.models import Game, Tournament
+from core.standings import standings_changed
+from blazing import cache
+from blazing import live
+
+
+def invalidate_stats(sender, instance, update_fields=None, **kwargs):
+    """Invalidate cached game stats when their source data changes
+
+    Scoreline writes are left to invalidate_standings, every one of
+    them changes the standings.
+    """
+    if sender is get_user_model():
+        if update_fields and set(update_fields) <= {'last_login', 'password'}:
+            return
+        if not instance.is_gamer and kwargs.get('created'):
+            return
+    cache.invalidate()
+
+
+for model in (Game, Tournament, get_user_model()):
+    post_save.connect(invalidate_stats, sender=model)
+    post_delete.connect(invalidate_stats, sender=model)
+
+
+def invalidate_loaded(sender, **kwargs):
+    """Invalidate cached stats when scorelines are loaded in bulk"""
+    cache.invalidate()
+
+
+scorelines_loaded.connect(invalidate_loaded)
+
+
+def invalidate_standings(sender, **kwargs):
+    """Invalidate cached stats when standings change outside a model save"""
+    cache.invalidate()
+
+
+def publish_standings(sender, keys, **kwargs):
+    """Push changed standings to live subscribers once committed"""
+    transaction.on_commit(lambda: live.publish_standings(keys))
+
+
+standings_changed.connect(invalidate_standings)
+standings_changed.connect(publish_standings)
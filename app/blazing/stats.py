@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+from django.db.models import Q
+
+from core.models import PlayerStanding, PlayerTournamentStanding, Scoreline
+from core.standings import STANDING_FIELDS, empty_stats
+from blazing import cache, fast_serializers
+from blazing.renderers import Fragment, encode
+
+
+def standing_totals(model, keys, **filters):
+    """Return standing stats keyed by the given fields"""
+    rows = model.objects.filter(**filters).values(*keys, *STANDING_FIELDS)
+    return {tuple(row[key] for key in keys): row for row in rows}
+
+
+def group_scorelines(scorelines):
+    """Return encoded scoreline lists keyed by (user, tournament, game)"""
+    plan = fast_serializers.SCORELINE
+    rows = plan.values(
+        scorelines.order_by('id'),
+        'first_player_id', 'second_player_id', 'tournament_id', 'game_id'
+    )
+    grouped = defaultdict(list)
+    for row in rows:
+        data = plan.build(row)
+        for player in {row['first_player_id'], row['second_player_id']}:
+            key = (player, row['tournament_id'], row['game_id'])
+            grouped[key].append(data)
+    return {
+        key: Fragment(encode(items), items) for key, items in grouped.items()
+    }
+
+
+def scoreline_fragments(keys):
+    """Return encoded scoreline lists for (user, tournament, game) keys
+
+    The lists of each user are kept together in the stats cache under the
+    current generation, so the game stats list, its pages, filters and
+    the player views all share them. Scorelines are only read and encoded
+    for users missing from the cache, across every tournament and game so
+    the entry serves any filter.
+    """
+    generation = cache.get_generation()
+    names = {
+        user: cache.fragment_key(generation, 'scorelines', (user,))
+        for user in {key[0] for key in keys}
+    }
+    stored = cache.stats_cache().get_many(list(names.values()))
+    blocks = {
+        user: stored[name] for user, name in names.items() if name in stored
+    }
+    missing = {user for user in names if user not in blocks}
+    built = {}
+    if missing:
+        built = group_scorelines(Scoreline.objects.filter(
+            Q(first_player__in=missing) | Q(second_player__in=missing)
+        ))
+        for user in missing:
+            blocks[user] = {}
+        for key, fragment in built.items():
+            if key[0] in missing:
+                blocks[key[0]][key[1:]] = fragment.content
+        cache.stats_cache().set_many({
+            names[user]: blocks[user] for user in missing
+        })
+
+    fragments = {}
+    for key in keys:
+        if key in built:
+            fragments[key] = built[key]
+        else:
+            fragments[key] = Fragment(blocks[key[0]].get(key[1:], b'[]'))
+    return fragments
+
+
+def game_data(game, totals, scoreline):
+    """Build the stats block for a single game"""
+    gameData = {}
+    gameData['name'] = game.name
+    gameData['scoreline'] = scoreline
+    gameData['total_won'] = totals['won']
+    gameData['total_goals_for'] = totals['goals_for']
+    gameData['total_goals_against'] = totals['goals_against']
+    gameData['total_goals_avg'] = totals['goal_difference']
+    gameData['total_draws'] = totals['draws']
+    gameData['total_lost'] = totals['lost']
+    gameData['total_points'] = totals['points']
+    gameData['games_played'] = totals['games_played']
+    return gameData
+
+
+def build_game_stats(users, tournaments, games, include_scorelines=True,
+                     played_only=False):
+    """Build the game stats tree for the given users, tournaments and games
+
+    Only rows for the requested users are read, so the work done scales
+    with the size of the response rather than the size of the league.
+    With played_only, tournaments and games without a standing for the
+    user are left out.
+    """
+    users = list(users)
+    tournaments = list(tournaments)
+    games = list(games)
+    totals = standing_totals(
+        PlayerStanding,
+        ('user_id', 'tournament_id', 'game_id'),
+        user__in=users,
+        tournament__in=tournaments,
+        game__in=games,
+    )
+    tour_totals = standing_totals(
+        PlayerTournamentStanding,
+        ('user_id', 'tournament_id'),
+        user__in=users,
+        tournament__in=tournaments,
+    )
+    grouped = {}
+    if include_scorelines:
+        grouped = scoreline_fragments(list(totals))
+    empty = empty_stats()
+
+    data = []
+    for user in users:
+        userData = {}
+        userData['name'] = user.name
+        userData['tournaments'] = []
+
+        for tournament in tournaments:
+            if played_only and (user.id, tournament.id) not in tour_totals:
+                continue
+            tour = tour_totals.get((user.id, tournament.id), empty)
+            tournamentData = {}
+            tournamentData['name'] = tournament.name
+            tournamentData['tour_games_played'] = tour['games_played']
+            tournamentData['tour_total_won'] = tour['won']
+            tournamentData['tour_total_lost'] = tour['lost']
+            tournamentData['tour_total_draws'] = tour['draws']
+            tournamentData['games'] = []
+            userData['tournaments'].append(tournamentData)
+
+            for game in games:
+                key = (user.id, tournament.id, game.id)
+                if played_only and key not in totals:
+                    continue
+                gameData = game_data(
+                    game, totals.get(key, empty), grouped.get(key, [])
+                )
+                if not include_scorelines:
+                    del gameData['scoreline']
+                tournamentData['games'].append(gameData)
+
+        data.append(userData)
+
+    return data
+
+
+def build_player_stats(user, tournaments, games, include_scorelines=True):
+    """Build the game stats for a single user
+
+    Only the tournaments and games the user has played are read.
+    """
+    return build_game_stats(
+        [user],
+        tournaments.filter(standings__user=user).distinct(),
+        games.filter(standings__user=user).distinct(),
+        include_scorelines=include_scorelines,
+        played_only=True,
+    )[0]
@@ -0,0 +1,75 @@
+from django.core import signing
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import ValidationError
+
+from core.models import Scoreline, ScorelineChange
+from blazing import fast_serializers
+
+
+TOKEN_SALT = 'blazing.scoreline-sync'
+
+
+def make_token(sequence):
+    """Return an opaque sync token for a change sequence"""
+    return signing.dumps(sequence, salt=TOKEN_SALT)
+
+
+def read_token(token):
+    """Return the change sequence in a sync token"""
+    try:
+        sequence = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise ValidationError({'since': [_('Invalid sync token')]})
+    if not isinstance(sequence, int):
+        raise ValidationError({'since': [_('Invalid sync token')]})
+    return sequence
+
+
+def changes_since(sequence, limit):
+    """Return the scorelines created, updated and deleted after a sequence
+
+    Reads at most limit change log entries with a range scan on the
+    primary key, folds repeated changes to one scoreline together and
+    serializes only the scorelines still alive. changes.record commits
+    sequences in order, so none can appear later below the new token.
+    """
+    entries = list(ScorelineChange.objects.filter(
+        id__gt=sequence
+    ).order_by('id').values_list('id', 'scoreline_id', 'operation')[
+        :limit + 1
+    ])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    first = {}
+    last = {}
+    for entry_id, scoreline_id, operation in entries:
+        first.setdefault(scoreline_id, operation)
+        last[scoreline_id] = operation
+
+    alive = [
+        scoreline_id for scoreline_id, operation in last.items()
+        if operation != ScorelineChange.DELETE
+    ]
+    plan = fast_serializers.SCORELINE
+    rows = plan.values(
+        Scoreline.objects.filter(id__in=alive).order_by('id')
+    ) if alive else []
+    created = []
+    updated = []
+    for row in rows:
+        if first[row['id']] == ScorelineChange.CREATE:
+            created.append(plan.build(row))
+        else:
+            updated.append(plan.build(row))
+
+    return {
+        'created': created,
+        'updated': updated,
+        'deleted': sorted(
+            scoreline_id for scoreline_id, operation in last.items()
+            if operation == ScorelineChange.DELETE
+        ),
+        'next': make_token(entries[-1][0] if entries else sequence),
+        'has_more': has_more,
+    }
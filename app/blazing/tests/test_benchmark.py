@@ -0,0 +1,128 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import F
+from django.test import TestCase
+
+from blazing import benchmark
+from core.league import generate_league
+from core.models import Game, PlayerStanding, Scoreline, Tournament
+from core.standings import aggregate_totals
+
+
+def league_rows():
+    """Return the generated scorelines by name rather than id"""
+    return list(Scoreline.objects.order_by(
+        'tournament__name', 'game__name',
+        'first_player__email', 'second_player__email',
+    ).values_list(
+        'tournament__name', 'game__name',
+        'first_player__email', 'second_player__email',
+        'first_player_score', 'second_player_score', 'draw_score',
+    ))
+
+
+class LeagueGeneratorTests(TestCase):
+    """Test the deterministic league generator"""
+
+    def test_generate_league_counts(self):
+        """Test the requested rows are created with standings"""
+        user_ids, tournament_ids, game_ids = generate_league(6, 2, 2, 40)
+
+        self.assertEqual(len(user_ids), 6)
+        self.assertEqual(Tournament.objects.count(), 2)
+        self.assertEqual(Game.objects.count(), 2)
+        self.assertEqual(Scoreline.objects.count(), 40)
+        self.assertFalse(Scoreline.objects.filter(
+            first_player=F('second_player')
+        ).exists())
+        standings = {
+            (row.user_id, row.tournament_id, row.game_id): row.points
+            for row in PlayerStanding.objects.all()
+        }
+        self.assertEqual(standings, {
+            key: stats['points'] for key, stats in aggregate_totals().items()
+        })
+
+    def test_generate_league_is_capped(self):
+        """Test no more scorelines are made than there are slots"""
+        generate_league(3, 1, 1, 100)
+
+        self.assertEqual(Scoreline.objects.count(), 6)
+
+    def test_generate_league_is_deterministic(self):
+        """Test the same seed gives the same league"""
+        generate_league(5, 2, 2, 30, seed=7)
+        first = league_rows()
+        Scoreline.objects.all().delete()
+        get_user_model().objects.all().delete()
+        Tournament.objects.all().delete()
+        Game.objects.all().delete()
+
+        generate_league(5, 2, 2, 30, seed=7)
+
+        self.assertEqual(league_rows(), first)
+
+
+class BenchmarkTests(TestCase):
+    """Test the API benchmark harness"""
+
+    def setUp(self):
+        caches['stats'].clear()
+
+    def test_percentile(self):
+        """Test percentiles use the nearest rank"""
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([3], 95), 3)
+
+    def test_run_benchmark_drives_every_endpoint(self):
+        """Test every endpoint answers and is measured"""
+        league = benchmark.seed(6, 2, 2, 30)
+
+        results = benchmark.run_benchmark(league, requests=2)
+
+        names = [case['name'] for case in benchmark.endpoint_cases(league)]
+        self.assertEqual(list(results), names)
+        for result in results.values():
+            self.assertGreaterEqual(result['p99_ms'], result['p50_ms'])
+            self.assertGreater(result['peak_kib'], 0)
+        self.assertEqual(results['game stats uncached']['queries'], 6)
+        self.assertEqual(results['game stats']['queries'], 0)
+
+    def test_results_are_compared_with_previous_run(self):
+        """Test stored runs are used to find regressions"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'results.jsonl')
+        params = {'gamers': 6}
+        benchmark.save_run(path, params, {
+            'games': {'p95_ms': 2.0, 'queries': 1},
+        })
+        benchmark.save_run(path, {'gamers': 8}, {
+            'games': {'p95_ms': 1.0, 'queries': 1},
+        })
+
+        previous = benchmark.previous_run(benchmark.load_runs(path), params)
+        found = benchmark.regressions(previous, {
+            'games': {'p95_ms': 3.0, 'queries': 2},
+        })
+
+        self.assertEqual(previous['results']['games']['p95_ms'], 2.0)
+        self.assertEqual(found, [
+            'games: 1 -> 2 queries', 'games: p95 2.0 -> 3.0 ms',
+        ])
+
+    def test_compare_serializers(self):
+        """Test the read plan is timed against identical DRF output"""
+        generate_league(5, 2, 2, 30)
+
+        result = benchmark.compare_serializers(20, repeat=1)
+
+        self.assertEqual(result['rows'], 20)
+        self.assertTrue(result['identical'])
+        self.assertGreater(result['bytes'], 0)
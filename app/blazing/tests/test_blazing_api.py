@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
@@ -5,10 +7,11 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Game, Tournament, Scoreline
-from blazing.serializers import GameSerializer, TournamentSerializer, ScorelineSerializer
+from core.models import Game, Tournament, Scoreline, PlayerTournamentStanding
+from blazing.serializers import GameSerializer, TournamentSerializer, ScorelineSerializer, ScorelineBulkSerializer
 
 SCORELINE_URL = reverse('blazing:scoreline-list')
+SCORELINE_BULK_URL = reverse('blazing:scoreline-bulk')
 
 
 def sample_user(email='test@londonappdev.com', password='testpass'):
@@ -48,10 +51,72 @@ class PublicScorelineTests(TestCase):
         sample_scoreline(user1=user1, user2=user3, tournament_name = "FIFA 20", game_name="FIFA 20")
 
         res = self.client.get(SCORELINE_URL)
-        scoreline = Scoreline.objects.all()
+        scoreline = Scoreline.objects.all().order_by('id')
         serializer = ScorelineSerializer(scoreline, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_retrieve_scorelines_query_count(self):
+        """Test listing scorelines costs the same queries for any size"""
+        user1 = sample_user()
+        user2 = sample_user(email="here@mail.com")
+        sample_scoreline(user1=user1, user2=user2)
+
+        with self.assertNumQueries(1):
+            self.client.get(SCORELINE_URL)
+
+        user3 = sample_user(email="test2@mail.com")
+        sample_scoreline(user1=user1, user2=user3, tournament_name = "FIFA 20", game_name="FIFA 20")
+        sample_scoreline(user1=user3, user2=user2, tournament_name = "FIFA 21", game_name="FIFA 21")
+
+        with self.assertNumQueries(1):
+            self.client.get(SCORELINE_URL)
+
+    def test_scorelines_cursor_pagination(self):
+        """Test scorelines are returned a page at a time by id"""
+        user1 = sample_user()
+        user2 = sample_user(email="here@mail.com")
+        first = sample_scoreline(user1=user1, user2=user2)
+        second = sample_scoreline(user1=user1, user2=user2, tournament_name = "FIFA 20", game_name="FIFA 20")
+
+        res = self.client.get(SCORELINE_URL, {'page_size': 1})
+
+        self.assertEqual([row['id'] for row in res.data['results']], [first.id])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual([row['id'] for row in res.data['results']], [second.id])
+        self.assertIsNone(res.data['next'])
+
+    def test_filter_scorelines_by_tournament_and_game(self):
+        """Test returning scorelines for a tournament and game"""
+        user1 = sample_user()
+        user2 = sample_user(email="here@mail.com")
+        scoreline = sample_scoreline(user1=user1, user2=user2)
+        sample_scoreline(user1=user1, user2=user2, tournament_name = "FIFA 20", game_name="FIFA 20")
+
+        res = self.client.get(SCORELINE_URL, {
+            'tournament': f'{scoreline.tournament.id}',
+            'game': f'{scoreline.game.id}',
+        })
+
+        self.assertEqual([row['id'] for row in res.data['results']], [scoreline.id])
+
+    def test_filter_scorelines_by_player(self):
+        """Test returning scorelines where a player is on either side"""
+        user1 = sample_user()
+        user2 = sample_user(email="here@mail.com")
+        user3 = sample_user(email="test2@mail.com")
+        first = sample_scoreline(user1=user1, user2=user2)
+        second = sample_scoreline(user1=user3, user2=user1, tournament_name = "FIFA 20", game_name="FIFA 20")
+        sample_scoreline(user1=user2, user2=user3, tournament_name = "FIFA 21", game_name="FIFA 21")
+
+        res = self.client.get(SCORELINE_URL, {'player': f'{user1.id}'})
+
+        self.assertEqual(
+            [row['id'] for row in res.data['results']],
+            [first.id, second.id]
+        )
 
     def test_required_auth_to_create(self):
         """Test if login is required to create"""
@@ -181,3 +246,125 @@ class PrivateSuperUserScorelineTestCase(TestCase):
         ).exists()
         self.assertTrue(exists)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkScorelineTestCase(TestCase):
+    """Test the bulk scoreline upload as superuser"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            'test@londonappdev.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+        self.user2 = sample_user(email="here@mail.com")
+        self.user3 = sample_user(email="test2@mail.com")
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+
+    def payload(self, first_player, second_player, **scores):
+        """Return a bulk row payload"""
+        return {
+            'tournament': self.tournament.id,
+            'game': self.game.id,
+            'first_player': first_player.id,
+            'second_player': second_player.id,
+            **scores
+        }
+
+    def test_bulk_create_scorelines(self):
+        """Test creating many scorelines updates the standings"""
+        payload = [
+            self.payload(self.user, self.user2, first_player_score=5, second_player_score=2),
+            self.payload(self.user, self.user3, first_player_score=3, draw_score=1),
+            self.payload(self.user2, self.user3, second_player_score=4),
+        ]
+
+        res = self.client.post(SCORELINE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 3)
+        self.assertEqual(Scoreline.objects.count(), 3)
+        standing = PlayerTournamentStanding.objects.get(user=self.user)
+        self.assertEqual(standing.games_played, 2)
+        self.assertEqual(standing.won, 8)
+        self.assertEqual(standing.points, 25)
+
+    def test_bulk_create_query_count(self):
+        """Test validation queries do not grow with the number of rows"""
+        players = [sample_user(email=f"player{index}@mail.com") for index in range(10)]
+        payload = [
+            self.payload(first, second)
+            for first, second in zip(players, players[1:])
+        ]
+
+        with self.assertNumQueries(4):
+            serializer = ScorelineBulkSerializer(data=payload)
+            self.assertTrue(serializer.is_valid())
+
+    def test_bulk_create_reports_errors_per_row(self):
+        """Test invalid rows are reported and nothing is created"""
+        Scoreline.objects.create(
+            first_player=self.user,
+            second_player=self.user2,
+            tournament=self.tournament,
+            game=self.game
+        )
+        payload = [
+            self.payload(self.user2, self.user3, first_player_score=5),
+            self.payload(self.user, self.user3, first_player_score=9, second_player_score=3),
+            {**self.payload(self.user, self.user3), 'game': 999},
+            self.payload(self.user2, self.user3),
+            self.payload(self.user, self.user2),
+        ]
+
+        res = self.client.post(SCORELINE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('non_field_errors', res.data[1])
+        self.assertIn('game', res.data[2])
+        self.assertIn('non_field_errors', res.data[3])
+        self.assertIn('non_field_errors', res.data[4])
+        self.assertEqual(Scoreline.objects.count(), 1)
+
+    def test_bulk_create_concurrent_insert_is_bad_request(self):
+        """Test a row inserted after validation is reported per row"""
+        check_unique = ScorelineBulkSerializer._check_unique
+
+        def racing_check(serializer, rows, errors):
+            check_unique(serializer, rows, errors)
+            if not Scoreline.objects.exists():
+                Scoreline.objects.create(
+                    first_player=self.user,
+                    second_player=self.user3,
+                    tournament=self.tournament,
+                    game=self.game
+                )
+
+        payload = [
+            self.payload(self.user, self.user2),
+            self.payload(self.user, self.user3),
+        ]
+        with patch.object(
+            ScorelineBulkSerializer, '_check_unique', racing_check
+        ):
+            res = self.client.post(SCORELINE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('non_field_errors', res.data[1])
+        self.assertEqual(Scoreline.objects.count(), 1)
+
+    def test_bulk_create_requires_superuser(self):
+        """Test non superusers cannot bulk create"""
+        self.client.force_authenticate(self.user2)
+
+        res = self.client.post(
+            SCORELINE_BULK_URL,
+            [self.payload(self.user2, self.user3)],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
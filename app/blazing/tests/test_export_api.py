@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Game, Tournament, Scoreline
+
+
+def export_url(name, fmt):
+    """Return an export URL"""
+    return reverse(f'blazing:{name}-export', kwargs={'fmt': fmt})
+
+
+def sample_gamer(email, name):
+    """Create a sample gamer"""
+    return get_user_model().objects.create_user(
+        email, 'testpass', name=name, is_gamer=True
+    )
+
+
+class ExportTests(TestCase):
+    """Test the streaming export endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = sample_gamer('one@mail.com', 'One')
+        self.user2 = sample_gamer('two@mail.com', 'Two')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+        self.scoreline = Scoreline.objects.create(
+            first_player=self.user1,
+            second_player=self.user2,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=5,
+            second_player_score=2,
+            draw_score=3
+        )
+
+    def test_export_scorelines_csv(self):
+        """Test scorelines are streamed as CSV"""
+        res = self.client.get(export_url('scoreline', 'csv'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(self.scoreline.id))
+        self.assertEqual(rows[0]['first_player_email'], 'one@mail.com')
+        self.assertEqual(rows[0]['draw_score'], '3')
+
+    def test_export_scorelines_ndjson_filtered(self):
+        """Test scorelines are streamed as NDJSON with filters applied"""
+        Scoreline.objects.create(
+            first_player=self.user2,
+            second_player=self.user1,
+            tournament=Tournament.objects.create(name='FIFA 20'),
+            game=self.game
+        )
+
+        res = self.client.get(
+            export_url('scoreline', 'ndjson'),
+            {'tournament': f'{self.tournament.id}'}
+        )
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], self.scoreline.id)
+        self.assertEqual(row['tournament_name'], 'BS RANK March 2020')
+
+    def test_export_standings_csv(self):
+        """Test player standings are streamed as CSV"""
+        res = self.client.get(export_url('game-stats', 'csv'))
+
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        first = [row for row in rows if row['email'] == 'one@mail.com'][0]
+        self.assertEqual(first['won'], '5')
+        self.assertEqual(first['points'], '18')
+
+    def test_export_invalid_filter(self):
+        """Test a malformed filter is rejected"""
+        res = self.client.get(
+            export_url('game-stats', 'ndjson'), {'user': 'one'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Game, Tournament, Scoreline
+from blazing import fast_serializers, serializers
+
+SCORELINES_URL = reverse('blazing:scoreline-list')
+TOURNAMENTS_URL = reverse('blazing:tournament-list')
+
+
+def sample_gamer(email, name):
+    """Create a sample gamer"""
+    return get_user_model().objects.create_user(
+        email, 'testpass', name=name, is_gamer=True
+    )
+
+
+def render(data):
+    """Render data the way the API does"""
+    return JSONRenderer().render(data)
+
+
+class ReadPlanTests(TestCase):
+    """Test compiled read plans match the DRF serializers"""
+
+    def setUp(self):
+        self.user1 = sample_gamer('one@mail.com', 'Zoë   "One"')
+        self.user2 = sample_gamer('two@mail.com', '')
+        self.tournament = Tournament.objects.create(name='Liga Ñandú 2020')
+        self.game = Game.objects.create(name='MK11 \U0001f3ae')
+        for score in range(3):
+            Scoreline.objects.create(
+                first_player=self.user1,
+                second_player=self.user2,
+                tournament=self.tournament,
+                game=Game.objects.create(name=f'Game\u2028{score}'),
+                first_player_score=score,
+                second_player_score_goals=7
+            )
+        Scoreline.objects.create(
+            first_player=self.user2,
+            second_player=self.user2,
+            tournament=self.tournament,
+            game=self.game,
+            draw_score=1
+        )
+
+    def assertSameBytes(self, plan, serializer_class, queryset):
+        """Assert a plan renders the same bytes as a serializer"""
+        expected = render(serializer_class(queryset, many=True).data)
+
+        self.assertEqual(render(plan.dump(plan.values(queryset))), expected)
+
+    def test_plans_match_serializers(self):
+        """Test every plan renders byte identical JSON"""
+        cases = (
+            (fast_serializers.GAME, serializers.GameSerializer, Game),
+            (fast_serializers.TOURNAMENT, serializers.TournamentSerializer,
+             Tournament),
+            (fast_serializers.PLAYER, serializers.PlayerSerializer,
+             get_user_model()),
+            (fast_serializers.SCORELINE, serializers.ScorelineSerializer,
+             Scoreline),
+        )
+        for plan, serializer_class, model in cases:
+            with self.subTest(model=model.__name__):
+                self.assertSameBytes(
+                    plan, serializer_class, model.objects.order_by('id')
+                )
+
+    def test_plan_reads_only_its_columns(self):
+        """Test the scoreline plan asks for flat related columns"""
+        columns = fast_serializers.SCORELINE.columns
+
+        self.assertIn('tournament__name', columns)
+        self.assertIn('first_player__email', columns)
+        self.assertNotIn('first_player__password', columns)
+
+    def test_scoreline_list_matches_serializer(self):
+        """Test the scoreline list page is unchanged by the fast path"""
+        client = APIClient()
+        expected = serializers.ScorelineSerializer(
+            Scoreline.objects.order_by('id'), many=True
+        ).data
+
+        res = client.get(SCORELINES_URL)
+
+        self.assertEqual(render(res.data['results']), render(expected))
+
+    def test_list_pagination_uses_rows(self):
+        """Test cursor pagination works over values rows"""
+        Tournament.objects.create(name='BS RANK April 2020')
+        client = APIClient()
+
+        res = client.get(TOURNAMENTS_URL, {'page_size': 1})
+        res = client.get(res.data['next'])
+
+        self.assertEqual(
+            [tournament['name'] for tournament in res.data['results']],
+            ['BS RANK April 2020']
+        )
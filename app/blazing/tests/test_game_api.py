@@ -23,10 +23,10 @@ class PublicGameTestCase(TestCase):
         Game.objects.create(name="New Game 2")
 
         res = self.client.get(GAMES_URL)
-        games = Game.objects.all()
+        games = Game.objects.all().order_by('id')
         serializer = GameSerializer(games, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_required_auth_to_create(self):
         """Test if login is required to create"""
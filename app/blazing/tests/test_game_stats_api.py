@@ -0,0 +1,506 @@
+import gzip
+import json
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import registry
+from core.models import (
+    Game,
+    PlayerStanding,
+    PlayerTournamentStanding,
+    Scoreline,
+    Tournament,
+)
+from core.standings import rebuild_standings
+from blazing import cache
+
+GAME_STATS_URL = reverse('blazing:game-stats-list')
+
+
+def sample_gamer(email, name):
+    """Create a sample gamer"""
+    return get_user_model().objects.create_user(
+        email, 'testpass', name=name, is_gamer=True
+    )
+
+
+class PublicGameStatsTests(TestCase):
+    """Test the publicly available game stats API"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.user1 = sample_gamer('one@mail.com', 'One')
+        self.user2 = sample_gamer('two@mail.com', 'Two')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+        self.scoreline = Scoreline.objects.create(
+            first_player=self.user1,
+            second_player=self.user2,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=5,
+            second_player_score=2,
+            draw_score=3,
+            first_player_score_goals=12,
+            second_player_score_goals=7
+        )
+
+    def test_retrieve_game_stats(self):
+        """Test stats are folded for both sides of a scoreline"""
+        res = self.client.get(GAME_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        first, second = sorted(res.data, key=lambda user: user['name'])
+
+        tournament = first['tournaments'][0]
+        self.assertEqual(tournament['tour_games_played'], 1)
+        self.assertEqual(tournament['tour_total_won'], 5)
+        self.assertEqual(tournament['tour_total_lost'], 2)
+        self.assertEqual(tournament['tour_total_draws'], 3)
+        game = tournament['games'][0]
+        self.assertEqual(game['total_goals_for'], 12)
+        self.assertEqual(game['total_goals_against'], 7)
+        self.assertEqual(game['total_goals_avg'], 5)
+        self.assertEqual(game['total_points'], 18)
+        self.assertEqual(game['scoreline'][0]['id'], self.scoreline.id)
+
+        game = second['tournaments'][0]['games'][0]
+        self.assertEqual(game['total_won'], 2)
+        self.assertEqual(game['total_lost'], 5)
+        self.assertEqual(game['total_goals_avg'], -5)
+        self.assertEqual(game['total_points'], 9)
+        self.assertEqual(game['games_played'], 1)
+
+    def test_untouched_games_are_empty(self):
+        """Test games a gamer never played are still listed"""
+        Game.objects.create(name='FIFA 20')
+
+        res = self.client.get(GAME_STATS_URL)
+
+        games = res.data[0]['tournaments'][0]['games']
+        self.assertEqual(len(games), 2)
+        untouched = [game for game in games if game['name'] == 'FIFA 20'][0]
+        self.assertEqual(untouched['scoreline'], [])
+        self.assertEqual(untouched['games_played'], 0)
+
+    def test_game_stats_query_count_is_constant(self):
+        """Test the query count does not grow with the league size"""
+        with self.assertNumQueries(6):
+            self.client.get(GAME_STATS_URL)
+
+        user3 = sample_gamer('three@mail.com', 'Three')
+        tournament = Tournament.objects.create(name='FIFA 20 League')
+        game = Game.objects.create(name='FIFA 20')
+        Scoreline.objects.create(
+            first_player=user3,
+            second_player=self.user1,
+            tournament=tournament,
+            game=game,
+            first_player_score=4
+        )
+
+        with self.assertNumQueries(6):
+            self.client.get(GAME_STATS_URL)
+
+
+class GameStatsCacheTests(TestCase):
+    """Test the game stats response cache"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.user = sample_gamer('one@mail.com', 'One')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+
+    def test_repeated_request_served_from_cache(self):
+        """Test a second request does not touch the database"""
+        res = self.client.get(GAME_STATS_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(GAME_STATS_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.content, res.content)
+        self.assertEqual(cached['ETag'], res['ETag'])
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test a matching ETag returns 304 without a body"""
+        res = self.client.get(GAME_STATS_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(
+                GAME_STATS_URL, HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached.content, b'')
+
+    def test_scoreline_write_invalidates_cache(self):
+        """Test saving a scoreline changes the cached payload"""
+        other = sample_gamer('two@mail.com', 'Two')
+        res = self.client.get(GAME_STATS_URL)
+
+        Scoreline.objects.create(
+            first_player=self.user,
+            second_player=other,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=4
+        )
+        updated = self.client.get(
+            GAME_STATS_URL, HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(updated['ETag'], res['ETag'])
+        data = json.loads(updated.content)
+        user = [user for user in data if user['name'] == 'One'][0]
+        self.assertEqual(user['tournaments'][0]['tour_total_won'], 4)
+
+    def test_rebuild_standings_invalidates_cache(self):
+        """Test fixing drifted standings changes the cached payload"""
+        other = sample_gamer('two@mail.com', 'Two')
+        Scoreline.objects.create(
+            first_player=self.user,
+            second_player=other,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=4
+        )
+        PlayerStanding.objects.update(won=0)
+        PlayerTournamentStanding.objects.update(won=0)
+        res = self.client.get(GAME_STATS_URL)
+
+        rebuild_standings()
+        updated = self.client.get(
+            GAME_STATS_URL, HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
+        data = json.loads(updated.content)
+        user = [user for user in data if user['name'] == 'One'][0]
+        self.assertEqual(user['tournaments'][0]['tour_total_won'], 4)
+
+    def test_scoreline_writes_bump_generation_once(self):
+        """Test a scoreline save or delete invalidates the stats once"""
+        other = sample_gamer('two@mail.com', 'Two')
+
+        with patch('blazing.cache.bump_generation') as bump:
+            scoreline = Scoreline.objects.create(
+                first_player=self.user,
+                second_player=other,
+                tournament=self.tournament,
+                game=self.game,
+                first_player_score=4
+            )
+            created = bump.call_count
+            scoreline.second_player_score = 2
+            scoreline.save()
+            updated = bump.call_count - created
+            scoreline.delete()
+            deleted = bump.call_count - created - updated
+
+        self.assertEqual((created, updated, deleted), (1, 1, 1))
+
+    def test_game_rename_invalidates_cache(self):
+        """Test renaming a game changes the cached payload"""
+        self.client.get(GAME_STATS_URL)
+
+        self.game.name = 'MK12'
+        self.game.save()
+        res = self.client.get(GAME_STATS_URL)
+
+        data = json.loads(res.content)
+        self.assertEqual(data[0]['tournaments'][0]['games'][0]['name'], 'MK12')
+
+
+class GameStatsFilterTests(TestCase):
+    """Test scoping the game stats with query parameters"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.user1 = sample_gamer('one@mail.com', 'One')
+        self.user2 = sample_gamer('two@mail.com', 'Two')
+        self.user3 = sample_gamer('three@mail.com', 'Three')
+        self.tournament1 = Tournament.objects.create(name='BS RANK March 2020')
+        self.tournament2 = Tournament.objects.create(name='BS RANK April 2020')
+        self.game1 = Game.objects.create(name='MK11')
+        self.game2 = Game.objects.create(name='FIFA 20')
+        Scoreline.objects.create(
+            first_player=self.user1,
+            second_player=self.user2,
+            tournament=self.tournament1,
+            game=self.game1,
+            first_player_score=5
+        )
+
+    def test_filter_by_user(self):
+        """Test returning stats for selected users only"""
+        res = self.client.get(GAME_STATS_URL, {'user': f'{self.user1.id}'})
+
+        self.assertEqual([user['name'] for user in res.data], ['One'])
+
+    def test_filter_by_tournament_and_game(self):
+        """Test scoping stats to a tournament and game"""
+        res = self.client.get(GAME_STATS_URL, {
+            'tournament': f'{self.tournament1.id}',
+            'game': f'{self.game1.id}',
+        })
+
+        tournaments = res.data[0]['tournaments']
+        self.assertEqual(len(tournaments), 1)
+        self.assertEqual(tournaments[0]['name'], self.tournament1.name)
+        self.assertEqual(len(tournaments[0]['games']), 1)
+        self.assertEqual(tournaments[0]['games'][0]['total_won'], 5)
+
+    def test_exclude_scorelines(self):
+        """Test scorelines can be left out of the response"""
+        res = self.client.get(GAME_STATS_URL, {'include_scorelines': 'false'})
+
+        game = res.data[0]['tournaments'][0]['games'][0]
+        self.assertNotIn('scoreline', game)
+        self.assertEqual(game['total_won'], 5)
+
+    def test_invalid_filter_returns_bad_request(self):
+        """Test a malformed id list is rejected"""
+        res = self.client.get(GAME_STATS_URL, {'user': 'one'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination_over_gamers(self):
+        """Test gamers are paginated when a page size is given"""
+        res = self.client.get(GAME_STATS_URL, {'page_size': 2})
+
+        self.assertEqual(
+            [user['name'] for user in res.data['results']], ['One', 'Two']
+        )
+        self.assertIsNotNone(res.data['next'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [user['name'] for user in res.data['results']], ['Three']
+        )
+        self.assertIsNone(res.data['next'])
+
+
+def detail_url(user_id):
+    """Return the game stats detail URL for a user"""
+    return reverse('blazing:game-stats-detail', args=[user_id])
+
+
+class PlayerGameStatsTests(TestCase):
+    """Test the single player game stats API"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.user1 = sample_gamer('one@mail.com', 'One')
+        self.user2 = sample_gamer('two@mail.com', 'Two')
+        self.user3 = sample_gamer('three@mail.com', 'Three')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        Tournament.objects.create(name='BS RANK April 2020')
+        self.game = Game.objects.create(name='MK11')
+        Game.objects.create(name='FIFA 20')
+        Scoreline.objects.create(
+            first_player=self.user1,
+            second_player=self.user2,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=5,
+            second_player_score=2
+        )
+
+    def test_retrieve_player_stats(self):
+        """Test only the tournaments and games played are returned"""
+        res = self.client.get(detail_url(self.user2.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Two')
+        self.assertEqual(len(res.data['tournaments']), 1)
+        tournament = res.data['tournaments'][0]
+        self.assertEqual(tournament['name'], self.tournament.name)
+        self.assertEqual(tournament['tour_total_won'], 2)
+        self.assertEqual(len(tournament['games']), 1)
+        self.assertEqual(len(tournament['games'][0]['scoreline']), 1)
+
+    def test_retrieve_player_without_games(self):
+        """Test a gamer who never played has no tournaments"""
+        res = self.client.get(detail_url(self.user3.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tournaments'], [])
+
+    def test_retrieve_non_gamer_not_found(self):
+        """Test users who are not gamers are not found"""
+        user = get_user_model().objects.create_user('x@mail.com', 'testpass')
+
+        res = self.client.get(detail_url(user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_player_query_count_is_bounded(self):
+        """Test the query count does not grow with the player history"""
+        with self.assertNumQueries(6):
+            self.client.get(detail_url(self.user1.id))
+
+        for index in range(3):
+            tournament = Tournament.objects.create(name=f'League {index}')
+            Scoreline.objects.create(
+                first_player=self.user1,
+                second_player=self.user3,
+                tournament=tournament,
+                game=self.game
+            )
+
+        with self.assertNumQueries(6):
+            self.client.get(detail_url(self.user1.id))
+
+    def test_me_requires_authentication(self):
+        """Test the me endpoint needs a token user"""
+        res = self.client.get(reverse('blazing:game-stats-me'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_me_returns_authenticated_player(self):
+        """Test the me endpoint returns the token user stats"""
+        self.client.force_authenticate(self.user1)
+
+        res = self.client.get(reverse('blazing:game-stats-me'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'One')
+
+        self.client.force_authenticate(self.user2)
+        res = self.client.get(reverse('blazing:game-stats-me'))
+
+        self.assertEqual(json.loads(res.content)['name'], 'Two')
+
+
+@override_settings(COMPRESSION_ENCODINGS=('gzip',), COMPRESSION_MIN_SIZE=0)
+class GameStatsCompressionTests(TestCase):
+    """Test compressed game stats are kept in the stats cache"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.user = sample_gamer('one@mail.com', 'One')
+        Tournament.objects.create(name='BS RANK March 2020')
+        Game.objects.create(name='MK11')
+
+    def test_cache_hit_serves_stored_compressed_body(self):
+        """Test a cached payload is only compressed once"""
+        res = self.client.get(GAME_STATS_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        with patch('core.compression.compress') as compress:
+            cached = self.client.get(
+                GAME_STATS_URL, HTTP_ACCEPT_ENCODING='gzip'
+            )
+            plain = self.client.get(GAME_STATS_URL)
+
+        compress.assert_not_called()
+        self.assertEqual(cached['Content-Encoding'], 'gzip')
+        self.assertEqual(cached.content, res.content)
+        self.assertEqual(gzip.decompress(cached.content), plain.content)
+        self.assertNotIn('Content-Encoding', plain)
+
+    def test_weak_etag_returns_not_modified(self):
+        """Test the weakened ETag of a compressed response still matches"""
+        res = self.client.get(GAME_STATS_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        cached = self.client.get(
+            GAME_STATS_URL,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+
+        self.assertTrue(res['ETag'].startswith('W/'))
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'stats': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'test_game_stats_cache',
+    },
+})
+class StatsGenerationTests(TestCase):
+    """Test the stats generation with a cache shared between workers"""
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+
+    def test_bump_never_reuses_a_generation(self):
+        """Test every bump moves to a generation not seen before"""
+        seen = {cache.get_generation()}
+
+        for _ in range(20):
+            cache.bump_generation()
+            seen.add(cache.get_generation())
+
+        self.assertEqual(len(seen), 21)
+
+    def test_missing_generation_restarts(self):
+        """Test an evicted counter is recreated with a fresh value"""
+        before = cache.get_generation()
+        caches['stats'].delete(cache.GENERATION_KEY)
+
+        self.assertNotEqual(cache.get_generation(), before)
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'stats': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'test_game_stats_cache',
+    },
+})
+class DatabaseCacheBudgetTests(TestCase):
+    """Test the query budget with the stats cache in the database"""
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+        registry.reset()
+        self.client = APIClient()
+        tournament = Tournament.objects.create(name='BS RANK March 2020')
+        game = Game.objects.create(name='MK11')
+        gamers = [
+            sample_gamer(f'{index}@mail.com', f'Gamer {index}')
+            for index in range(3)
+        ]
+        for first, second in zip(gamers, gamers[1:]):
+            Scoreline.objects.create(
+                first_player=first,
+                second_player=second,
+                tournament=tournament,
+                game=game,
+                first_player_score=1,
+            )
+
+    def test_cache_queries_do_not_count_towards_budget(self):
+        """Test cold and warm requests stay within the view budget"""
+        cold = self.client.get(GAME_STATS_URL)
+        warm = self.client.get(GAME_STATS_URL)
+
+        self.assertEqual(cold.status_code, status.HTTP_200_OK)
+        self.assertEqual(warm.json(), cold.json())
+        view = 'blazing:game-stats-list'
+        self.assertGreater(registry.cache_queries[view], 0)
+        self.assertLessEqual(
+            registry.queries[view] - registry.cache_queries[view],
+            2 * settings.QUERY_BUDGETS[f'GET {view}'],
+        )
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Game, Tournament, Scoreline
+
+HEAD_TO_HEAD_URL = reverse('blazing:head-to-head-list')
+
+
+def sample_user(email):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(email, 'testpass')
+
+
+class HeadToHeadTests(TestCase):
+    """Test the head to head API"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.one = sample_user('one@mail.com')
+        self.two = sample_user('two@mail.com')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+        self.other_game = Game.objects.create(name='FIFA 20')
+        Scoreline.objects.create(
+            first_player=self.one,
+            second_player=self.two,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=5,
+            second_player_score=2,
+            draw_score=3,
+            first_player_score_goals=10,
+            second_player_score_goals=4
+        )
+        self.reverse_scoreline = Scoreline.objects.create(
+            first_player=self.two,
+            second_player=self.one,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=6,
+            second_player_score=1,
+            first_player_score_goals=8,
+            second_player_score_goals=3
+        )
+        Scoreline.objects.create(
+            first_player=self.two,
+            second_player=self.one,
+            tournament=self.tournament,
+            game=self.other_game,
+            first_player_score=4
+        )
+
+    def test_head_to_head_folds_both_orientations(self):
+        """Test matches count whichever side each player was on"""
+        with self.assertNumQueries(1):
+            res = self.client.get(HEAD_TO_HEAD_URL, {
+                'player_a': self.one.id,
+                'player_b': self.two.id,
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        totals = res.data['totals']
+        self.assertEqual(totals['games_played'], 3)
+        self.assertEqual(totals['player_a_won'], 6)
+        self.assertEqual(totals['player_b_won'], 12)
+        self.assertEqual(totals['draws'], 3)
+        self.assertEqual(totals['player_a_goals'], 13)
+        self.assertEqual(totals['player_b_goals'], 12)
+        self.assertEqual(len(res.data['records']), 2)
+
+    def test_head_to_head_is_symmetric(self):
+        """Test swapping the players swaps the record"""
+        res = self.client.get(HEAD_TO_HEAD_URL, {
+            'player_a': self.two.id,
+            'player_b': self.one.id,
+            'game': self.game.id,
+        })
+
+        self.assertEqual(len(res.data['records']), 1)
+        record = res.data['records'][0]
+        self.assertEqual(record['game']['name'], 'MK11')
+        self.assertEqual(record['player_a_won'], 8)
+        self.assertEqual(record['player_b_won'], 6)
+
+    def test_head_to_head_follows_deletes(self):
+        """Test deleting a scoreline updates the record"""
+        self.reverse_scoreline.delete()
+
+        res = self.client.get(HEAD_TO_HEAD_URL, {
+            'player_a': self.one.id,
+            'player_b': self.two.id,
+            'game': self.game.id,
+        })
+
+        self.assertEqual(res.data['totals']['games_played'], 1)
+        self.assertEqual(res.data['totals']['player_a_won'], 5)
+
+    def test_head_to_head_requires_two_players(self):
+        """Test both players are required and must differ"""
+        res = self.client.get(HEAD_TO_HEAD_URL, {
+            'player_a': self.one.id,
+            'player_b': self.one.id,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Game, Tournament, Scoreline
+
+LEADERBOARD_URL = reverse('blazing:leaderboard-list')
+
+
+def sample_gamer(email, name):
+    """Create a sample gamer"""
+    return get_user_model().objects.create_user(
+        email, 'testpass', name=name, is_gamer=True
+    )
+
+
+class LeaderboardTests(TestCase):
+    """Test the leaderboard API"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.one = sample_gamer('one@mail.com', 'One')
+        self.two = sample_gamer('two@mail.com', 'Two')
+        self.three = sample_gamer('three@mail.com', 'Three')
+        self.four = sample_gamer('four@mail.com', 'Four')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+        self.other_game = Game.objects.create(name='FIFA 20')
+        # One and Two are level on points, One has the better goal difference
+        self.play(self.one, self.three, 3, 0, goals=(9, 2))
+        self.play(self.two, self.three, 3, 0, goals=(6, 2))
+        # Four only plays the other game
+        self.play(self.four, self.one, 5, 0, game=self.other_game)
+
+    def play(self, first, second, first_score, second_score, goals=(0, 0),
+             game=None, tournament=None):
+        """Record a scoreline"""
+        return Scoreline.objects.create(
+            first_player=first,
+            second_player=second,
+            tournament=tournament or self.tournament,
+            game=game or self.game,
+            first_player_score=first_score,
+            second_player_score=second_score,
+            first_player_score_goals=goals[0],
+            second_player_score_goals=goals[1]
+        )
+
+    def test_tournament_and_game_leaderboard(self):
+        """Test ties break on points then goal difference"""
+        res = self.client.get(LEADERBOARD_URL, {
+            'tournament': self.tournament.id,
+            'game': self.game.id,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual(
+            [entry['name'] for entry in results], ['One', 'Two', 'Three']
+        )
+        self.assertEqual([entry['rank'] for entry in results], [1, 2, 3])
+        self.assertEqual(results[0]['points'], 9)
+        self.assertEqual(results[0]['goal_difference'], 7)
+
+    def test_tournament_leaderboard(self):
+        """Test the tournament ranking covers every game"""
+        res = self.client.get(
+            LEADERBOARD_URL, {'tournament': self.tournament.id}
+        )
+
+        self.assertEqual(res.data['results'][0]['name'], 'Four')
+        self.assertEqual(res.data['results'][0]['points'], 15)
+
+    def test_game_leaderboard_top(self):
+        """Test limiting a game ranking to the top players"""
+        res = self.client.get(LEADERBOARD_URL, {
+            'game': self.other_game.id,
+            'top': 1,
+        })
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], 'Four')
+
+    def test_equal_players_share_rank(self):
+        """Test players level on every tie breaker share a rank"""
+        tournament = Tournament.objects.create(name='BS RANK April 2020')
+        self.play(self.one, self.three, 3, 0, (5, 2), tournament=tournament)
+        self.play(self.two, self.three, 3, 0, (5, 2), tournament=tournament)
+
+        res = self.client.get(LEADERBOARD_URL, {'tournament': tournament.id})
+
+        self.assertEqual(
+            [entry['rank'] for entry in res.data['results']], [1, 1, 3]
+        )
+
+    def test_rank_of_user(self):
+        """Test returning the rank of a single user"""
+        with self.assertNumQueries(3):
+            res = self.client.get(LEADERBOARD_URL, {
+                'tournament': self.tournament.id,
+                'game': self.game.id,
+                'user': self.two.id,
+                'top': 1,
+            })
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['user']['name'], 'Two')
+        self.assertEqual(res.data['user']['rank'], 2)
+
+    def test_rank_of_user_who_never_played(self):
+        """Test a user without a standing has no rank"""
+        res = self.client.get(LEADERBOARD_URL, {
+            'game': self.game.id,
+            'user': self.four.id,
+        })
+
+        self.assertIsNone(res.data['user'])
+
+    def test_leaderboard_requires_tournament_or_game(self):
+        """Test a ranking needs a tournament or a game"""
+        res = self.client.get(LEADERBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,325 @@
+import json
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Game, LiveEvent, Tournament, Scoreline
+from blazing import live
+
+LIVE_URL = reverse('blazing:live-list')
+
+
+def sample_user(email):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(email, 'testpass')
+
+
+def parse_event(chunk):
+    """Return the name, id and data of a server sent event"""
+    fields = dict(
+        line.split(': ', 1) for line in chunk.decode().strip().split('\n')
+    )
+    return fields['event'], fields.get('id'), json.loads(fields['data'])
+
+
+class BrokerTests(TestCase):
+    """Test the in process live broker"""
+
+    def setUp(self):
+        self.broker = live.LocalBroker(max_events=2)
+
+    def test_publish_filters_by_tournament(self):
+        """Test subscribers only get events for their tournament"""
+        everything = self.broker.subscribe()
+        filtered = self.broker.subscribe(tournament=2)
+
+        self.broker.publish({'tournament': 1, 'standings': []})
+
+        self.assertEqual(everything.get(0)['id'], 1)
+        self.assertIsNone(filtered.get(0))
+
+    def test_slow_subscriber_is_lagged(self):
+        """Test a full queue is dropped and reported as lagged"""
+        subscription = self.broker.subscribe()
+        for index in range(3):
+            self.broker.publish({'tournament': 1, 'standings': []})
+
+        self.assertIs(subscription.get(0), live.LAGGED)
+        self.assertIsNone(subscription.get(0))
+
+    def test_unsubscribe(self):
+        """Test unsubscribed subscribers stop receiving events"""
+        subscription = self.broker.subscribe()
+        self.broker.unsubscribe(subscription)
+
+        self.broker.publish({'tournament': 1, 'standings': []})
+
+        self.assertFalse(self.broker.has_subscribers())
+        self.assertIsNone(subscription.get(0))
+
+
+@override_settings(LIVE_HEARTBEAT=0, LIVE_MAX_DURATION=60)
+class LiveApiTests(TestCase):
+    """Test the live standings stream"""
+
+    def setUp(self):
+        broker = patch.object(live, '_broker', live.LocalBroker())
+        self.broker = broker.start()
+        self.addCleanup(broker.stop)
+        streams = patch.object(live, '_streams', set())
+        streams.start()
+        self.addCleanup(streams.stop)
+        self.client = APIClient()
+        self.one = sample_user('one@mail.com')
+        self.two = sample_user('two@mail.com')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.other = Tournament.objects.create(name='BS RANK April 2020')
+        self.game = Game.objects.create(name='MK11')
+        self.scoreline = Scoreline.objects.create(
+            first_player=self.one,
+            second_player=self.two,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=5,
+            second_player_score=2
+        )
+
+    def test_stream_starts_with_snapshot(self):
+        """Test late joiners get the current standings first"""
+        res = self.client.get(LIVE_URL, {'tournament': self.tournament.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        name, event_id, data = parse_event(next(res.streaming_content))
+        self.assertEqual(name, 'snapshot')
+        self.assertEqual(data[0]['tournament'], self.tournament.id)
+        points = {row['user']: row['points'] for row in data[0]['standings']}
+        self.assertEqual(points, {self.one.id: 15, self.two.id: 6})
+
+    def test_stream_sends_changed_standings(self):
+        """Test saved scorelines are pushed as standing totals"""
+        res = self.client.get(LIVE_URL, {'tournament': self.tournament.id})
+        content = iter(res.streaming_content)
+        next(content)
+
+        self.scoreline.second_player_score = 4
+        self.scoreline.save()
+        live.publish_standings([
+            (self.two.id, self.tournament.id, self.game.id),
+        ])
+        name, event_id, data = parse_event(next(content))
+
+        self.assertEqual(name, 'standings')
+        self.assertEqual(event_id, '1')
+        self.assertEqual(data['standings'], [{
+            'user': self.two.id,
+            'game': self.game.id,
+            'games_played': 1,
+            'won': 4,
+            'lost': 5,
+            'draws': 0,
+            'goals_for': 0,
+            'goals_against': 0,
+            'goal_difference': 0,
+            'points': 12,
+        }])
+
+    def test_stream_filters_by_tournament(self):
+        """Test subscribers to another tournament get heartbeats only"""
+        res = self.client.get(LIVE_URL, {'tournament': self.other.id})
+        content = iter(res.streaming_content)
+        name, event_id, data = parse_event(next(content))
+
+        live.publish_standings([
+            (self.one.id, self.tournament.id, self.game.id),
+        ])
+
+        self.assertEqual(data, [])
+        self.assertEqual(next(content), b': heartbeat\n\n')
+
+    def test_deleted_standings_are_zeroed(self):
+        """Test a standing that no longer exists is sent as zeros"""
+        res = self.client.get(LIVE_URL)
+        content = iter(res.streaming_content)
+        next(content)
+
+        self.scoreline.delete()
+        live.publish_standings([
+            (self.one.id, self.tournament.id, self.game.id),
+        ])
+        name, event_id, data = parse_event(next(content))
+
+        self.assertEqual(data['standings'][0]['points'], 0)
+        self.assertEqual(data['standings'][0]['games_played'], 0)
+
+    @override_settings(LIVE_MAX_STREAMS=1)
+    def test_streams_over_the_limit_are_refused(self):
+        """Test a process refuses streams once its slots are taken"""
+        first = self.client.get(LIVE_URL)
+        busy = self.client.get(LIVE_URL)
+        first.close()
+        again = self.client.get(LIVE_URL)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            busy.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        again.close()
+        self.assertEqual(live._streams, set())
+
+    def test_invalid_tournament_returns_bad_request(self):
+        """Test a malformed tournament filter is rejected"""
+        res = self.client.get(LIVE_URL, {'tournament': 'one'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(LIVE_HEARTBEAT=0.05, LIVE_MAX_STREAMS=1)
+class LiveAsgiTests(TransactionTestCase):
+    """Test streams served through the ASGI entry point"""
+
+    def setUp(self):
+        broker = patch.object(live, '_broker', live.LocalBroker())
+        broker.start()
+        self.addCleanup(broker.stop)
+        streams = patch.object(live, '_streams', set())
+        streams.start()
+        self.addCleanup(streams.stop)
+
+    def test_disconnect_frees_the_stream_slot(self):
+        """Test a client going away gives its slot back"""
+        from app.asgi import application
+
+        async def stream():
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http',
+                'http_version': '1.1',
+                'method': 'GET',
+                'path': LIVE_URL,
+                'query_string': b'',
+                'headers': [(b'host', b'testserver')],
+            })
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            await communicator.receive_output(5)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(5)
+            return start['status']
+
+        self.assertEqual(async_to_sync(stream)(), status.HTTP_200_OK)
+        self.assertEqual(live._streams, set())
+
+
+class LivePublishTests(TransactionTestCase):
+    """Test standings are published once the write commits"""
+
+    def setUp(self):
+        broker = patch.object(live, '_broker', live.LocalBroker())
+        self.broker = broker.start()
+        self.addCleanup(broker.stop)
+
+    def test_saving_scoreline_publishes_standings(self):
+        """Test both players are published after a scoreline is saved"""
+        subscription = self.broker.subscribe()
+        one = sample_user('one@mail.com')
+        two = sample_user('two@mail.com')
+        tournament = Tournament.objects.create(name='BS RANK March 2020')
+        game = Game.objects.create(name='MK11')
+
+        Scoreline.objects.create(
+            first_player=one,
+            second_player=two,
+            tournament=tournament,
+            game=game,
+            first_player_score=3
+        )
+
+        event = subscription.get(0)
+        self.assertEqual(event['tournament'], tournament.id)
+        self.assertEqual(
+            {row['user']: row['won'] for row in event['standings']},
+            {one.id: 3, two.id: 0},
+        )
+        self.assertIsNone(subscription.get(0))
+
+
+class DatabaseBrokerTests(TransactionTestCase):
+    """Test events shared between processes through the database"""
+
+    def setUp(self):
+        caches['stats'].clear()
+
+    def broker(self, **kwargs):
+        """Return a database broker that polls often"""
+        broker = live.DatabaseBroker(interval=0.01, **kwargs)
+        self.addCleanup(self.stop, broker)
+        return broker
+
+    def stop(self, broker):
+        """Drop the subscribers so the poller thread finishes"""
+        poller = broker._poller
+        for subscription in list(broker._subscriptions):
+            broker.unsubscribe(subscription)
+        if poller is not None:
+            poller.join(5)
+
+    def test_events_reach_other_processes(self):
+        """Test an event published by one broker reaches another"""
+        publisher = self.broker()
+        subscriber = self.broker()
+        subscription = subscriber.subscribe(tournament=1)
+
+        publisher.publish({'tournament': 2, 'standings': []})
+        publisher.publish({'tournament': 1, 'standings': [{'user': 3}]})
+
+        event = subscription.get(5)
+        self.assertEqual(event['tournament'], 1)
+        self.assertEqual(event['standings'], [{'user': 3}])
+        self.assertIsNone(subscription.get(0.05))
+
+    def test_poller_stops_without_subscribers(self):
+        """Test the poller thread ends with the last subscription"""
+        broker = self.broker()
+        subscription = broker.subscribe()
+        poller = broker._poller
+
+        broker.unsubscribe(subscription)
+        poller.join(5)
+
+        self.assertFalse(poller.is_alive())
+        self.assertIsNone(broker._poller)
+
+    def test_old_events_are_removed(self):
+        """Test only the newest events are kept"""
+        broker = self.broker(retention=2)
+
+        for index in range(4):
+            broker.publish({'tournament': 1, 'standings': []})
+
+        self.assertEqual(LiveEvent.objects.count(), 2)
+
+    def test_nothing_stored_without_listeners(self):
+        """Test standings are not stored while no process listens"""
+        broker = self.broker()
+        with patch.object(live, '_broker', broker):
+            live.publish_standings([(1, 1, 1)])
+
+        self.assertFalse(broker.has_subscribers())
+        self.assertEqual(LiveEvent.objects.count(), 0)
+
+    def test_listeners_in_other_processes_are_seen(self):
+        """Test a subscriber in one process makes another publish"""
+        publisher = self.broker()
+        subscriber = self.broker()
+        subscriber.subscribe()
+
+        self.assertTrue(publisher.has_subscribers())
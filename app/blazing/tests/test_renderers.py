@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Game, Tournament, Scoreline
+from blazing.renderers import Fragment, FragmentJSONRenderer, encode
+
+GAME_STATS_URL = reverse('blazing:game-stats-list')
+
+
+def sample_gamer(email, name):
+    """Create a sample gamer"""
+    return get_user_model().objects.create_user(
+        email, 'testpass', name=name, is_gamer=True
+    )
+
+
+class FragmentJSONRendererTests(TestCase):
+    """Test spliced fragments render the same as plain JSON"""
+
+    def assertSameJSON(self, data, decoded, media_type=None):
+        """Assert data renders the same bytes as its decoded form"""
+        self.assertEqual(
+            FragmentJSONRenderer().render(data, media_type),
+            JSONRenderer().render(decoded, media_type),
+        )
+
+    def test_plain_data_matches_json_renderer(self):
+        """Test data without fragments is rendered unchanged"""
+        data = {'name': 'Zoë ', 'total': 1.5, 'games': [None, True]}
+
+        self.assertSameJSON(data, data)
+
+    def test_fragments_are_spliced(self):
+        """Test fragments render the same as the data they encode"""
+        scorelines = [{'id': 1, 'name': 'Ñandú "one" '}, {'id': 2}]
+        data = {
+            'tournaments': [{
+                'scoreline': Fragment(encode(scorelines)),
+                'empty': Fragment(b'[]'),
+                'total': 3,
+            }],
+            'last': Fragment(encode([4])),
+        }
+        decoded = {
+            'tournaments': [
+                {'scoreline': scorelines, 'empty': [], 'total': 3}
+            ],
+            'last': [4],
+        }
+
+        self.assertSameJSON(data, decoded)
+
+    def test_indented_output_decodes_fragments(self):
+        """Test pretty printed output matches the plain renderer"""
+        data = {'scoreline': Fragment(encode([{'id': 1}]))}
+
+        self.assertSameJSON(
+            data, {'scoreline': [{'id': 1}]}, 'application/json; indent=2'
+        )
+
+    def test_fragment_reads_as_list(self):
+        """Test a fragment can be read like the list it encodes"""
+        fragment = Fragment(encode([{'id': 1}, {'id': 2}]))
+
+        self.assertEqual(len(fragment), 2)
+        self.assertEqual(fragment[1]['id'], 2)
+        self.assertEqual(fragment, [{'id': 1}, {'id': 2}])
+        self.assertEqual(JSONRenderer().render(fragment), fragment.content)
+
+
+class GameStatsFragmentTests(TestCase):
+    """Test game stats are built from cached scoreline fragments"""
+
+    def setUp(self):
+        caches['stats'].clear()
+        self.client = APIClient()
+        self.user1 = sample_gamer('one@mail.com', 'Zoë')
+        self.user2 = sample_gamer('two@mail.com', 'Two ')
+        tournament = Tournament.objects.create(name='BS RANK March 2020')
+        for name in ('MK11', 'FIFA 20'):
+            Scoreline.objects.create(
+                first_player=self.user1,
+                second_player=self.user2,
+                tournament=tournament,
+                game=Game.objects.create(name=name),
+                first_player_score=5,
+                second_player_score_goals=7
+            )
+
+    def test_response_matches_json_renderer(self):
+        """Test the spliced response equals rendering the data"""
+        res = self.client.get(GAME_STATS_URL)
+
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+
+    def test_fragments_shared_between_views(self):
+        """Test the player view reuses fragments from the list"""
+        self.client.get(GAME_STATS_URL)
+        detail_url = reverse('blazing:game-stats-detail', args=[self.user1.id])
+
+        with self.assertNumQueries(5):
+            res = self.client.get(detail_url)
+
+        games = res.data['tournaments'][0]['games']
+        self.assertEqual(games[0]['scoreline'][0]['first_player']['name'],
+                         'Zoë')
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
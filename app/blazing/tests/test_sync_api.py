@@ -0,0 +1,186 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import changes
+from core.models import Game, Tournament, Scoreline, ScorelineChange
+
+SCORELINE_CHANGES_URL = reverse('blazing:scoreline-changes')
+SCORELINE_BULK_URL = reverse('blazing:scoreline-bulk')
+
+
+def sample_user(email):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(email, 'testpass')
+
+
+class ScorelineSyncTests(TestCase):
+    """Test the scoreline change feed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.one = sample_user('one@mail.com')
+        self.two = sample_user('two@mail.com')
+        self.tournament = Tournament.objects.create(name='BS RANK March 2020')
+        self.game = Game.objects.create(name='MK11')
+        self.scoreline = self.play(self.one, self.two)
+
+    def play(self, first, second, **scores):
+        """Create a scoreline between two players"""
+        return Scoreline.objects.create(
+            first_player=first,
+            second_player=second,
+            tournament=self.tournament,
+            game=self.game,
+            **scores
+        )
+
+    def sync(self, since=None, **params):
+        """Fetch the changes after a sync token"""
+        if since is not None:
+            params['since'] = since
+        res = self.client.get(SCORELINE_CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_first_sync_returns_everything(self):
+        """Test syncing without a token returns every scoreline"""
+        data = self.sync()
+
+        self.assertEqual([row['id'] for row in data['created']], [
+            self.scoreline.id,
+        ])
+        self.assertEqual(data['created'][0]['first_player']['email'],
+                         'one@mail.com')
+        self.assertEqual(data['updated'], [])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_sync_returns_only_new_changes(self):
+        """Test a sync token skips what the client already has"""
+        token = self.sync()['next']
+        created = self.play(self.two, self.one)
+        self.scoreline.first_player_score = 4
+        self.scoreline.save()
+
+        data = self.sync(token)
+
+        self.assertEqual([row['id'] for row in data['created']], [created.id])
+        self.assertEqual([row['id'] for row in data['updated']], [
+            self.scoreline.id,
+        ])
+        self.assertEqual(data['updated'][0]['first_player_score'], 4)
+        self.assertEqual(self.sync(data['next'])['created'], [])
+
+    def test_deleted_scorelines_are_tombstoned(self):
+        """Test deletes are returned as ids only"""
+        token = self.sync()['next']
+        created = self.play(self.two, self.one)
+        deleted = sorted([self.scoreline.id, created.id])
+        created.delete()
+        self.scoreline.delete()
+
+        data = self.sync(token)
+
+        self.assertEqual(data['created'], [])
+        self.assertEqual(data['updated'], [])
+        self.assertEqual(data['deleted'], deleted)
+
+    def test_sync_pages_with_limit(self):
+        """Test large change sets are split across pages"""
+        self.play(self.two, self.one)
+        self.play(self.one, self.one)
+
+        first = self.sync(limit=2)
+        second = self.sync(first['next'], limit=2)
+
+        self.assertEqual(len(first['created']), 2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(second['created']), 1)
+        self.assertFalse(second['has_more'])
+
+    def test_bulk_upload_is_logged(self):
+        """Test scorelines created in bulk show up in the feed"""
+        token = self.sync()['next']
+        admin = get_user_model().objects.create_superuser(
+            'admin@mail.com', 'testpass'
+        )
+        self.client.force_authenticate(admin)
+        self.client.post(SCORELINE_BULK_URL, [{
+            'tournament': self.tournament.id,
+            'game': self.game.id,
+            'first_player': self.two.id,
+            'second_player': self.one.id,
+        }], format='json')
+
+        data = self.sync(token)
+
+        created = Scoreline.objects.get(first_player=self.two)
+        self.assertEqual([row['id'] for row in data['created']], [created.id])
+
+    def test_sync_query_count(self):
+        """Test a sync reads the log and the scorelines once each"""
+        for index in range(3):
+            self.play(sample_user(f'{index}@mail.com'), self.one)
+
+        with self.assertNumQueries(2):
+            self.client.get(SCORELINE_CHANGES_URL)
+
+    def test_invalid_token_returns_bad_request(self):
+        """Test a tampered sync token is rejected"""
+        token = self.sync()['next']
+
+        res = self.client.get(SCORELINE_CHANGES_URL, {'since': token + 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_are_served_once_committed(self):
+        """Test a committed change is in the very next sync"""
+        token = self.sync()['next']
+        scoreline = self.play(self.two, self.one)
+
+        data = self.sync(token)
+
+        self.assertEqual(
+            [row['id'] for row in data['created']], [scoreline.id]
+        )
+
+    def test_seeded_scorelines_are_synced(self):
+        """Test scorelines loaded by seed_league reach the change feed"""
+        token = self.sync()['next']
+        call_command(
+            'seed_league', '--gamers', '3', '--tournaments', '1',
+            '--games', '1', '--skip-standings', stdout=StringIO()
+        )
+
+        data = self.sync(token)
+
+        self.assertEqual(len(data['created']), 3)
+
+
+class ChangeLogLockTests(TestCase):
+    """Test change log sequences are committed in order"""
+
+    def test_record_locks_change_log_until_commit(self):
+        """Test writers hold the change log lock until they commit"""
+        if connection.vendor != 'postgresql':
+            self.skipTest('Only PostgreSQL needs the change log lock')
+
+        with transaction.atomic():
+            changes.record([1], ScorelineChange.CREATE)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT mode FROM pg_locks WHERE pid = pg_backend_pid() '
+                    'AND relation = %s::regclass',
+                    [ScorelineChange._meta.db_table],
+                )
+                modes = {row[0] for row in cursor.fetchall()}
+
+        self.assertIn('ExclusiveLock', modes)
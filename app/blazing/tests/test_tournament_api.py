@@ -23,10 +23,10 @@ class PublicTournamentTestCase(TestCase):
         Tournament.objects.create(name="New Tournament 2")
 
         res = self.client.get(TOURNAMENTS_URL)
-        tournaments = Tournament.objects.all()
+        tournaments = Tournament.objects.all().order_by('id')
         serializer = TournamentSerializer(tournaments, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_required_auth_to_create(self):
         """Test if login is required to create"""
@@ -9,6 +9,13 @@ router.register('tournaments', views.TournamentViewSet)
 router.register('games', views.GameViewSet)
 router.register('scorelines', views.ScorelineViewSet)
 router.register('game-stats', views.GameStatsViewSet, base_name="game-stats")
+router.register(
+    'leaderboards', views.LeaderboardViewSet, base_name="leaderboard"
+)
+router.register(
+    'head-to-head', views.HeadToHeadViewSet, base_name="head-to-head"
+)
+router.register('live', views.LiveViewSet, base_name="live")
 
 app_name = 'blazing'
 
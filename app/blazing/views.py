@@ -1,57 +1,177 @@
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from core.models import Tournament, Game, Scoreline
+from core.models import Tournament, Game, Scoreline, PlayerStanding
+from blazing import cache
+from blazing import exports
+from blazing import fast_serializers
+from blazing import head_to_head
+from blazing import leaderboards
+from blazing import live
+from blazing import pagination
 from blazing import serializers
 from blazing import permissions
-from user.serializers import UserSerializer
+from blazing import renderers
+from blazing import stats
+from blazing import sync
+from user.authentication import CachingTokenAuthentication
 
 from django.contrib.auth import get_user_model
-
-from django.db.models import Avg, Count, Min, Sum
 from django.db.models import Q
-
-
-class TournamentViewSet(viewsets.GenericViewSet, 
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext as _
+
+
+def _params_to_ints(qs):
+    """Convert a comma separated list of string IDs to integers"""
+    try:
+        return [int(str_id) for str_id in qs.split(',')]
+    except ValueError:
+        raise ValidationError(_('Expected a comma separated list of ids'))
+
+
+def _int_param(request, name, default=None):
+    """Return a single integer query parameter"""
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: [_('Expected an integer')]})
+
+
+class StreamsBusy(APIException):
+    """Raised when a process has no live stream slot left"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many live streams are open, try again later.')
+    default_code = 'streams_busy'
+
+
+class ReadPlanListMixin:
+    """List with a compiled read plan instead of the serializer"""
+    read_plan = None
+
+    def list(self, request, *args, **kwargs):
+        """Return the filtered rows, paginated when configured"""
+        rows = self.read_plan.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.read_plan.dump(page))
+        return Response(self.read_plan.dump(rows))
+
+
+class TournamentViewSet(ReadPlanListMixin,
+                    viewsets.GenericViewSet, 
                     mixins.CreateModelMixin, 
                     mixins.ListModelMixin):
     """Manages Tournaments in database"""
     serializer_class = serializers.TournamentSerializer
+    read_plan = fast_serializers.TOURNAMENT
     queryset = Tournament.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    pagination_class = pagination.IdCursorPagination
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (permissions.allowSafeMethods,)
 
 
-class GameViewSet(viewsets.GenericViewSet, 
+class GameViewSet(ReadPlanListMixin,
+                    viewsets.GenericViewSet, 
                     mixins.CreateModelMixin, 
                     mixins.ListModelMixin):
-    """Manages Tournaments in database"""
+    """Manages Games in database"""
     serializer_class = serializers.GameSerializer
+    read_plan = fast_serializers.GAME
     queryset = Game.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    pagination_class = pagination.IdCursorPagination
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (permissions.allowSafeMethods,)
 
 
-class ScorelineViewSet(viewsets.GenericViewSet, 
+class ScorelineViewSet(ReadPlanListMixin,
+                    viewsets.GenericViewSet, 
                     mixins.CreateModelMixin, 
                     mixins.ListModelMixin):
     """Manages Scorelines in database"""
     serializer_class = serializers.ScorelineSerializer
-    queryset = Scoreline.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    read_plan = fast_serializers.SCORELINE
+    queryset = Scoreline.objects.select_related(
+        'tournament', 'game', 'first_player', 'second_player'
+    ).order_by('id')
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (permissions.allowSafeMethods,)
+    pagination_class = pagination.IdCursorPagination
+    max_changes = 1000
+
+    def get_queryset(self):
+        """Retrieve scorelines filtered by tournament, game and player"""
+        queryset = self.queryset
+        tournament = self.request.query_params.get('tournament')
+        game = self.request.query_params.get('game')
+        player = self.request.query_params.get('player')
+        if tournament:
+            queryset = queryset.filter(
+                tournament__in=_params_to_ints(tournament)
+            )
+        if game:
+            queryset = queryset.filter(game__in=_params_to_ints(game))
+        if player:
+            player_ids = _params_to_ints(player)
+            queryset = queryset.filter(
+                Q(first_player__in=player_ids) |
+                Q(second_player__in=player_ids)
+            )
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
         if self.action == 'create':
             return serializers.ScorelineCreateSerializer
-        
+        if self.action == 'bulk':
+            return serializers.ScorelineBulkSerializer
+
         return self.serializer_class
 
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        """Create many scorelines in one request"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scorelines = serializer.save()
+
+        return Response(
+            {'created': len(scorelines)},
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(
+        detail=False,
+        url_path='export/(?P<fmt>csv|ndjson)',
+        renderer_classes=(renderers.PassthroughRenderer,),
+    )
+    def export(self, request, fmt=None):
+        """Stream the filtered scorelines as CSV or NDJSON"""
+        return exports.export_response(
+            self.get_queryset(), exports.SCORELINE_COLUMNS, fmt, 'scorelines'
+        )
+
+    @action(detail=False)
+    def changes(self, request):
+        """Return the scorelines changed since a sync token"""
+        token = request.query_params.get('since')
+        sequence = sync.read_token(token) if token else 0
+        limit = min(
+            max(_int_param(request, 'limit', 500), 1), self.max_changes
+        )
+        return Response(sync.changes_since(sequence, limit))
+
     # def perform_create(self, serializer):
     #     """Create a new recipe"""
     #     validated_data = self.request.data
@@ -73,132 +193,168 @@ class ScorelineViewSet(viewsets.GenericViewSet,
     #     )
 
 
-class GameStatsViewSet(viewsets.ViewSet):
+class GameStatsViewSet(viewsets.GenericViewSet):
     """game Stats ViewSet"""
 
     serializer_class = serializers.ScorelineSerializer
+    pagination_class = pagination.GamerCursorPagination
+    renderer_classes = (renderers.FragmentJSONRenderer, BrowsableAPIRenderer)
+    authentication_classes = (CachingTokenAuthentication,)
+    lookup_value_regex = r'\d+'
+
+    def get_queryset(self):
+        """Return the gamers to report on"""
+        users = get_user_model().objects.filter(is_gamer=True).order_by('id')
+        user = self.request.query_params.get('user')
+        if user:
+            users = users.filter(id__in=_params_to_ints(user))
+        return users
+
+    def _filter_by_param(self, queryset, param):
+        """Filter a queryset by a comma separated list of ids"""
+        value = self.request.query_params.get(param)
+        if value:
+            queryset = queryset.filter(id__in=_params_to_ints(value))
+        return queryset
+
+    def _include_scorelines(self):
+        """Return whether scorelines were asked for"""
+        return self.request.query_params.get(
+            'include_scorelines', 'true'
+        ).lower() not in ('false', '0', 'no')
 
     def list(self, request):
-        """Return a hello message."""
-
-        users = get_user_model().objects.all().filter(is_gamer=True)
-
-        tournaments = Tournament.objects.all()
-
-        data = []
-        for user in users:
-            # Get all user gamers available
-            userData = {}
-            userData['name'] = user.name
-            userData['tournaments'] = []
-
-            # Get tournaments for user
-            for tournament in tournaments:
-                tournamentData = {}
-                tournamentData['name'] = tournament.name
-                # Get tournaments games played
-                tour_games_played = Scoreline.objects.filter(
-                    Q(tournament=tournament.id) & (Q(first_player=user.id) | Q(second_player=user.id))
-                ).count()
-                tour_user_first_player_score = Scoreline.objects.filter(
-                                        Q(tournament=tournament.id) & Q(first_player=user.id)
-                                    ).aggregate(Sum('first_player_score'))
-                tour_user_second_player_score = Scoreline.objects.filter(
-                                        Q(tournament=tournament.id) & Q(second_player=user.id)
-                                    ).aggregate(Sum('second_player_score'))
-                tour_user_draw_score = Scoreline.objects.filter(
-                                        Q(tournament=tournament.id) & (Q(first_player=user.id) | Q(second_player=user.id))
-                                    ).aggregate(Sum('draw_score'))
-
-                # Calculate loss
-                tour_loss_user_first_player_score = Scoreline.objects.filter(
-                                        Q(tournament=tournament.id) & Q(first_player=user.id)
-                                    ).aggregate(Sum('second_player_score'))
-                tour_loss_user_second_player_score = Scoreline.objects.filter(
-                                        Q(tournament=tournament.id) & Q(second_player=user.id)
-                                    ).aggregate(Sum('first_player_score'))
-
-                tournamentData['tour_games_played'] = tour_games_played
-                tournamentData['tour_total_won'] = int(tour_user_first_player_score['first_player_score__sum'] or 0) + int(tour_user_second_player_score['second_player_score__sum'] or 0)
-                tournamentData['tour_total_lost'] = int(tour_loss_user_first_player_score['second_player_score__sum'] or 0) + int(tour_loss_user_second_player_score['first_player_score__sum'] or 0)
-                tournamentData['tour_total_draws'] = int(tour_user_draw_score['draw_score__sum'] or 0)
-
-    
-                tournamentData['games'] = []
-                userData['tournaments'].append(tournamentData)
-
-                # Get all games available for tournament
-                games = Game.objects.all()
-                for game in games:
-                    gameData = {}
-                    gameData['name'] = game.name
-                    gameData['scoreline'] = []
-                    tournamentData['games'].append(gameData)
-
-                    # Get all scorelines available for game
-                    scoreline = Scoreline.objects.filter(
-                        Q(tournament=tournament.id) & Q(game=game.id) & (Q(first_player=user.id) | Q(second_player=user.id))
-                    )
-                    scoreline_serializer = serializers.ScorelineSerializer(scoreline, many=True)
-                    gameData['scoreline'] = scoreline_serializer.data
-
-                    # Get Win Draws and game played stats
-                    user_first_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(first_player=user.id)
-                                        ).aggregate(Sum('first_player_score'))
-                    user_second_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(second_player=user.id)
-                                        ).aggregate(Sum('second_player_score'))
-                    user_draw_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & (Q(first_player=user.id) | Q(second_player=user.id))
-                                        ).aggregate(Sum('draw_score'))
-                    games_played = Scoreline.objects.filter(
-                        Q(tournament=tournament.id) & Q(game=game.id) & (Q(first_player=user.id) | Q(second_player=user.id))
-                    ).count()
-
-                    # Calculate loss
-                    loss_user_first_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(first_player=user.id)
-                                        ).aggregate(Sum('second_player_score'))
-                    loss_user_second_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(second_player=user.id)
-                                        ).aggregate(Sum('first_player_score'))
-
-                    # Calculate Goals
-                    goals_user_first_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(first_player=user.id)
-                                        ).aggregate(Sum('first_player_score_goals'))
-                    goals_user_second_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(second_player=user.id)
-                                        ).aggregate(Sum('second_player_score_goals'))
-
-                    # Calculate Goals Against
-                    goals_against_user_first_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(first_player=user.id)
-                                        ).aggregate(Sum('second_player_score_goals'))
-                    goals_against_user_second_player_score = Scoreline.objects.filter(
-                                            Q(tournament=tournament.id) & Q(game=game.id) & Q(second_player=user.id)
-                                        ).aggregate(Sum('first_player_score_goals'))
-
-                    # print("-----------------------------------------------")
-                    # print(games_played)
-                    # print("-----------------------------------------------")
-
-
-                    gameData['total_won'] = int(user_first_player_score['first_player_score__sum'] or 0) + int(user_second_player_score['second_player_score__sum'] or 0)
-                    gameData['total_goals_for'] = int(goals_user_first_player_score['first_player_score_goals__sum'] or 0) + int(goals_user_second_player_score['second_player_score_goals__sum'] or 0)
-                    gameData['total_goals_against'] = int(goals_against_user_first_player_score['second_player_score_goals__sum'] or 0) + int(goals_against_user_second_player_score['first_player_score_goals__sum'] or 0)
-                    gameData['total_goals_avg'] = int(gameData['total_goals_for'] or 0) - int(gameData['total_goals_against'] or 0)
-                    gameData['total_draws'] = int(user_draw_score['draw_score__sum'] or 0)
-                    gameData['total_lost'] = int(loss_user_first_player_score['second_player_score__sum'] or 0) + int(loss_user_second_player_score['first_player_score__sum'] or 0)
-
-                    gameData['total_points'] = int(gameData['total_won'] or 0) * 3 + int(gameData['total_draws'] or 0)
-                    
-                    gameData['games_played'] = games_played
-
-
-            data.append(userData)
-
-            
-
+        """Return stats for every gamer per tournament and game"""
+        def build_response():
+            users = self.get_queryset()
+            page = self.paginate_queryset(users)
+            data = stats.build_game_stats(
+                users if page is None else page,
+                self._filter_by_param(Tournament.objects.all(), 'tournament'),
+                self._filter_by_param(Game.objects.all(), 'game'),
+                include_scorelines=self._include_scorelines(),
+            )
+            if page is not None:
+                return self.get_paginated_response(data)
+            return Response(data)
+
+        return cache.cached_response(request, build_response)
+
+    def _player_response(self, pk):
+        """Return the stats response for a single gamer"""
+        user = get_object_or_404(self.get_queryset(), pk=pk)
+        data = stats.build_player_stats(
+            user,
+            self._filter_by_param(Tournament.objects.all(), 'tournament'),
+            self._filter_by_param(Game.objects.all(), 'game'),
+            include_scorelines=self._include_scorelines(),
+        )
         return Response(data)
+
+    def retrieve(self, request, pk=None):
+        """Return stats for a single gamer"""
+        return cache.cached_response(
+            request, lambda: self._player_response(pk)
+        )
+
+    @action(
+        detail=False,
+        url_path='export/(?P<fmt>csv|ndjson)',
+        renderer_classes=(renderers.PassthroughRenderer,),
+    )
+    def export(self, request, fmt=None):
+        """Stream the filtered player standings as CSV or NDJSON"""
+        standings = PlayerStanding.objects.filter(
+            user__in=self.get_queryset()
+        ).order_by('id')
+        for param in ('tournament', 'game'):
+            value = request.query_params.get(param)
+            if value:
+                standings = standings.filter(**{
+                    f'{param}__in': _params_to_ints(value)
+                })
+        return exports.export_response(
+            standings, exports.STANDING_COLUMNS, fmt, 'standings'
+        )
+
+    @action(detail=False, permission_classes=(IsAuthenticated,))
+    def me(self, request):
+        """Return stats for the authenticated gamer"""
+        return cache.cached_response(
+            request,
+            lambda: self._player_response(request.user.pk),
+            vary=(request.user.pk,),
+        )
+
+
+class LeaderboardViewSet(viewsets.ViewSet):
+    """Ranked players for a tournament and/or game"""
+    authentication_classes = (CachingTokenAuthentication,)
+    max_top = 100
+
+    def list(self, request):
+        """Return the top players and optionally the rank of one user"""
+        tournament = _int_param(request, 'tournament')
+        game = _int_param(request, 'game')
+        if tournament is None and game is None:
+            raise ValidationError(
+                _('A tournament or game is required to rank players')
+            )
+        limit = min(max(_int_param(request, 'top', 10), 1), self.max_top)
+        user = _int_param(request, 'user')
+
+        def build_response():
+            standings = leaderboards.standings_for(tournament, game)
+            data = {
+                'tournament': tournament,
+                'game': game,
+                'results': leaderboards.top(standings, limit),
+            }
+            if user is not None:
+                data['user'] = leaderboards.rank_of(standings, user)
+            return Response(data)
+
+        return cache.cached_response(request, build_response)
+
+
+class HeadToHeadViewSet(viewsets.ViewSet):
+    """Record between two players"""
+    authentication_classes = (CachingTokenAuthentication,)
+
+    def list(self, request):
+        """Return the record of player_a against player_b"""
+        player_a = _int_param(request, 'player_a')
+        player_b = _int_param(request, 'player_b')
+        if player_a is None or player_b is None or player_a == player_b:
+            raise ValidationError(
+                _('Two different players are required for a head to head')
+            )
+        tournament = _int_param(request, 'tournament')
+        game = _int_param(request, 'game')
+
+        return cache.cached_response(request, lambda: Response(
+            head_to_head.matchup(player_a, player_b, tournament, game)
+        ))
+
+
+class LiveViewSet(viewsets.ViewSet):
+    """Standings pushed as server sent events when scorelines are saved
+
+    Each open stream holds a worker thread, so a process serves at most
+    LIVE_MAX_STREAMS of them and answers 503 beyond that.
+    """
+    authentication_classes = (CachingTokenAuthentication,)
+    renderer_classes = (renderers.PassthroughRenderer,)
+
+    def list(self, request):
+        """Stream a snapshot and then the changed standings"""
+        tournament = _int_param(request, 'tournament')
+        stream = live.open_stream(tournament)
+        if stream is None:
+            raise StreamsBusy()
+        response = StreamingHttpResponse(
+            stream, content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
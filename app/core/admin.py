@@ -31,7 +31,15 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class ScorelineAdmin(admin.ModelAdmin):
+    list_select_related = ('game', 'first_player', 'second_player')
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Game)
 admin.site.register(models.Tournament)
-admin.site.register(models.Scoreline)
+admin.site.register(models.Scoreline, ScorelineAdmin)
+admin.site.register(models.PlayerStanding)
+admin.site.register(models.PlayerTournamentStanding)
+admin.site.register(models.PlayerGameStanding)
+admin.site.register(models.HeadToHead)
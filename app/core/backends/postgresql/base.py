@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from core.db import ConnectionHealthMixin
+
+
+class DatabaseWrapper(ConnectionHealthMixin, base.DatabaseWrapper):
+    """PostgreSQL backend with timed and health checked connections"""
@@ -0,0 +1,51 @@
+from django.db import router, transaction
+from django.dispatch import Signal
+
+from core.db import lock_for_writes
+from core.models import Scoreline, ScorelineChange
+
+
+SCORELINE_KEY = ('tournament_id', 'game_id', 'first_player_id',
+                 'second_player_id')
+
+# Sent with the ids of scorelines bulk loaded without saving each model
+scorelines_loaded = Signal(providing_args=['scoreline_ids'])
+
+
+def record(scoreline_ids, operation):
+    """Add change log entries for scorelines in one query
+
+    The change log is locked against other writers until the transaction
+    ends, so a sync that reads up to the highest visible sequence can
+    never step over one committed later.
+    """
+    with transaction.atomic(using=router.db_for_write(ScorelineChange)):
+        lock_for_writes(ScorelineChange)
+        ScorelineChange.objects.bulk_create([
+            ScorelineChange(scoreline_id=scoreline_id, operation=operation)
+            for scoreline_id in scoreline_ids
+        ])
+
+
+def saved_ids(scorelines):
+    """Return the ids of bulk created scorelines
+
+    bulk_create only sets them on PostgreSQL, elsewhere they are read
+    back by the unique key with one query.
+    """
+    if all(scoreline.pk for scoreline in scorelines):
+        return [scoreline.pk for scoreline in scorelines]
+    lookup = {
+        f'{field}__in': {getattr(row, field) for row in scorelines}
+        for field in SCORELINE_KEY
+    }
+    ids = {
+        tuple(row[:-1]): row[-1]
+        for row in Scoreline.objects.filter(**lookup).values_list(
+            *SCORELINE_KEY, 'id'
+        )
+    }
+    return [
+        ids[tuple(getattr(scoreline, field) for field in SCORELINE_KEY)]
+        for scoreline in scorelines
+    ]
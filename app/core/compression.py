@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def available_encodings():
+    """Return the configured encodings that can be produced, best first"""
+    return [
+        encoding for encoding in settings.COMPRESSION_ENCODINGS
+        if encoding != 'br' or brotli is not None
+    ]
+
+
+def accepted_encoding(request):
+    """Return the best encoding the request accepts, or None"""
+    accepted = {}
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    default = accepted.get('*', 0.0)
+    for encoding in available_encodings():
+        if accepted.get(encoding, default) > 0:
+            return encoding
+    return None
+
+
+def compress(content, encoding):
+    """Return content compressed with an encoding"""
+    if encoding == 'br':
+        return brotli.compress(
+            content, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    return compress_string(content)
+
+
+def compressible(response):
+    """Return whether a response is worth compressing
+
+    Streaming responses, such as exports and the live event stream, and
+    bodies that are already encoded, small or not text are left alone.
+    """
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+        return False
+    return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+
+def encode_response(response, encoding, content):
+    """Replace the body of a response with its compressed form"""
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = encoding
+    # A strong ETag is made weak, as the bytes now depend on the encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+def compress_response(request, response, encoded=None):
+    """Compress a response with the best encoding the request accepts
+
+    Bodies already compressed for an encoding can be passed in encoded,
+    keyed by encoding, and any compressed here are added to it. The body
+    is only replaced when compression makes it smaller.
+    """
+    if not compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return response
+
+    if encoded is None:
+        encoded = {}
+    if encoding not in encoded:
+        encoded[encoding] = compress(response.content, encoding)
+    if len(encoded[encoding]) < len(response.content):
+        encode_response(response, encoding, encoded[encoding])
+    return response
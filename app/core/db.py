@@ -0,0 +1,87 @@
+import time
+from threading import local
+
+from django.db import connections, router
+
+
+_metrics = local()
+
+
+def reset_connection_metrics():
+    """Start counting connection setup for a new request"""
+    _metrics.opened = 0
+    _metrics.connect_time = 0.0
+    _metrics.health_checks = 0
+
+
+def connection_metrics():
+    """Return the connection setup done since the last reset"""
+    return {
+        'opened': getattr(_metrics, 'opened', 0),
+        'connect_time': getattr(_metrics, 'connect_time', 0.0),
+        'health_checks': getattr(_metrics, 'health_checks', 0),
+    }
+
+
+def bulk_batch_size(model, rows, batch_size):
+    """Return a bulk_create batch size the database accepts
+
+    Django 2.2 uses an explicit batch_size as given, which goes over the
+    SQLite limit on query parameters for wide rows.
+    """
+    connection = connections[router.db_for_write(model)]
+    limit = connection.ops.bulk_batch_size(model._meta.concrete_fields, rows)
+    return max(min(batch_size, limit), 1)
+
+
+def lock_for_writes(model):
+    """Keep other writers off a table until the transaction ends
+
+    Rows with ids from a sequence then become visible in id order, so a
+    reader that walks the ids never steps over one committed later.
+    Readers are not blocked. Only PostgreSQL needs it, SQLite already
+    allows a single writer at a time. Call it inside a transaction.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor != 'postgresql':
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+
+
+class ConnectionHealthMixin:
+    """Time new connections and check idle ones before they are reused
+
+    Django only pings a persistent connection after an error, so one
+    dropped by the server or a pooler while idle fails the next request.
+    Connections idle for longer than CONN_HEALTH_CHECK_INTERVAL seconds
+    are pinged at the start of a request and reopened if they are gone.
+    """
+
+    checked_at = None
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _metrics.opened = getattr(_metrics, 'opened', 0) + 1
+        _metrics.connect_time = (
+            getattr(_metrics, 'connect_time', 0.0) +
+            time.perf_counter() - start
+        )
+        self.checked_at = time.monotonic()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if self.connection is None or self.in_atomic_block:
+            return
+
+        interval = self.settings_dict.get('CONN_HEALTH_CHECK_INTERVAL')
+        now = time.monotonic()
+        if interval is not None and self.checked_at is not None and \
+                now - self.checked_at >= interval:
+            _metrics.health_checks = getattr(_metrics, 'health_checks', 0) + 1
+            if not self.is_usable():
+                self.close()
+                return
+        self.checked_at = now
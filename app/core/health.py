@@ -0,0 +1,46 @@
+import math
+
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+_migrated = set()
+
+
+def check_database(alias='default', timeout=None):
+    """Open a real connection and run a trivial query
+
+    Raises OperationalError when the database cannot be reached. On
+    PostgreSQL a timeout caps how long opening the connection may block.
+    """
+    connection = connections[alias]
+    options = connection.settings_dict.setdefault('OPTIONS', {})
+    default = options.get('connect_timeout')
+    if timeout is not None and connection.vendor == 'postgresql':
+        # libpq counts whole seconds and treats 0 as no limit
+        options['connect_timeout'] = max(1, math.ceil(timeout))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        if default is None:
+            options.pop('connect_timeout', None)
+        else:
+            options['connect_timeout'] = default
+
+
+def pending_migrations(alias='default'):
+    """Return the migrations not yet applied to the database
+
+    Once everything is applied the answer cannot change for this code, so
+    later calls return at once without loading the migration graph.
+    """
+    if alias in _migrated:
+        return []
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    migrations = [migration for migration, backwards in plan]
+    if not migrations:
+        _migrated.add(alias)
+    return migrations
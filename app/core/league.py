@@ -0,0 +1,183 @@
+import random
+from itertools import combinations, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from core import changes
+from core.db import bulk_batch_size
+from core.models import Game, Scoreline, ScorelineChange, Tournament
+from core.standings import rebuild_standings
+
+
+EMAIL_DOMAIN = 'league.test'
+
+
+def random_scoreline(rng):
+    """Return the scores of one series of at most ten matches"""
+    matches = rng.randint(1, 10)
+    first = rng.randint(0, matches)
+    second = rng.randint(0, matches - first)
+    draws = matches - first - second
+    return {
+        'first_player_score': first,
+        'second_player_score': second,
+        'draw_score': draws,
+        'first_player_score_goals': first * 2 + rng.randint(0, matches),
+        'second_player_score_goals': second * 2 + rng.randint(0, matches),
+    }
+
+
+def bulk_create(model, rows, batch_size):
+    """Insert rows in batches no larger than the database accepts"""
+    model.objects.bulk_create(
+        rows, batch_size=bulk_batch_size(model, rows, batch_size)
+    )
+
+
+def insert_batches(model, rows, batch_size, progress=None):
+    """Insert rows from an iterator without holding them all in memory
+
+    Each batch is committed on its own and progress, if given, is called
+    with the running total. Returns the number of rows inserted.
+    """
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            bulk_create(model, batch, batch_size)
+        total += len(batch)
+        if progress is not None:
+            progress(total)
+
+
+def insert_scorelines(rows, batch_size, progress=None):
+    """Insert scorelines from an iterator the way the bulk endpoint does
+
+    Every batch is committed with its change log entries and sends
+    scorelines_loaded, so sync clients see the rows and cached stats are
+    dropped once it commits. Standings are left to rebuild_standings.
+    """
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            bulk_create(Scoreline, batch, batch_size)
+            ids = changes.saved_ids(batch)
+            changes.record(ids, ScorelineChange.CREATE)
+            changes.scorelines_loaded.send(
+                sender=Scoreline, scoreline_ids=ids
+            )
+        total += len(batch)
+        if progress is not None:
+            progress(total)
+
+
+def create_players(gamers, batch_size=1000, password='testpass',
+                   password_hash=None, domain=EMAIL_DOMAIN):
+    """Create gamers sharing one password hash and return their ids
+
+    Hashing is deliberately slow, so it is done once for every gamer
+    rather than once per gamer as create_user does.
+    """
+    user_model = get_user_model()
+    hashed = password_hash or make_password(password)
+    insert_batches(user_model, (
+        user_model(
+            email=f'gamer{index}@{domain}',
+            name=f'Gamer {index}',
+            password=hashed,
+            is_gamer=True,
+        )
+        for index in range(gamers)
+    ), batch_size)
+    # bulk_create only sets primary keys on PostgreSQL
+    return list(user_model.objects.filter(
+        email__endswith=f'@{domain}'
+    ).order_by('id').values_list('id', flat=True))
+
+
+def create_named(model, prefix, count, batch_size=1000):
+    """Create tournaments or games named with a prefix and return their ids"""
+    bulk_create(model, [
+        model(name=f'{prefix} {index}') for index in range(count)
+    ], batch_size)
+    return list(model.objects.filter(
+        name__startswith=f'{prefix} '
+    ).order_by('id').values_list('id', flat=True))
+
+
+def sampled_scorelines(user_ids, tournament_ids, game_ids, scorelines, rng):
+    """Yield scorelines drawn without repeats from every unique slot"""
+    gamers = len(user_ids)
+    games = len(game_ids)
+    opponents = gamers - 1
+    slots = len(tournament_ids) * games * gamers * opponents
+    for slot in sorted(rng.sample(range(slots), min(scorelines, slots))):
+        slot, offset = divmod(slot, opponents)
+        slot, first = divmod(slot, gamers)
+        tournament, game = divmod(slot, games)
+        yield Scoreline(
+            tournament_id=tournament_ids[tournament],
+            game_id=game_ids[game],
+            first_player_id=user_ids[first],
+            second_player_id=user_ids[(first + 1 + offset) % gamers],
+            **random_scoreline(rng)
+        )
+
+
+def round_robin_scorelines(user_ids, tournament_ids, game_ids, rng,
+                           double=False):
+    """Yield a scoreline for every pair of gamers in every tournament game
+
+    A double round robin adds the return fixture with the sides swapped.
+    """
+    for tournament in tournament_ids:
+        for game in game_ids:
+            for first, second in combinations(user_ids, 2):
+                fixtures = ((first, second), (second, first)) if double \
+                    else ((first, second),)
+                for home, away in fixtures:
+                    yield Scoreline(
+                        tournament_id=tournament,
+                        game_id=game,
+                        first_player_id=home,
+                        second_player_id=away,
+                        **random_scoreline(rng)
+                    )
+
+
+def round_robin_size(gamers, tournaments, games, double=False):
+    """Return how many scorelines a round robin league has"""
+    pairs = gamers * (gamers - 1) // 2
+    return tournaments * games * pairs * (2 if double else 1)
+
+
+def generate_league(gamers, tournaments, games, scorelines, seed=0,
+                    password='testpass', batch_size=1000):
+    """Create a league whose rows depend only on the arguments
+
+    Scorelines are drawn without repeats from every (tournament, game,
+    first player, second player) slot, so at most T * G * N * (N - 1) are
+    made. Standings are rebuilt once at the end rather than per row.
+    Returns the ids of the gamers, tournaments and games created.
+    """
+    rng = random.Random(seed)
+    user_ids = create_players(gamers, batch_size, password)
+    tournament_ids = create_named(
+        Tournament, 'League Tournament', tournaments, batch_size
+    )
+    game_ids = create_named(Game, 'League Game', games, batch_size)
+    insert_scorelines(sampled_scorelines(
+        user_ids, tournament_ids, game_ids, scorelines, rng
+    ), batch_size)
+    rebuild_standings()
+
+    return user_ids, tournament_ids, game_ids
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    """Django command to recompute standings from scorelines"""
+    help = 'Recompute player standings from scorelines and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing any changes',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.stdout.write('Rebuilding standings...')
+        report = rebuild_standings(dry_run=options['dry_run'])
+        for table, counts in report.items():
+            self.stdout.write(
+                f"{table}: {counts['created']} created, "
+                f"{counts['updated']} updated, {counts['deleted']} deleted"
+            )
+        self.stdout.write(self.style.SUCCESS('Standings rebuilt!'))
@@ -0,0 +1,111 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import league
+from core.models import Game, Tournament
+from core.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    """Django command to seed a large round robin league"""
+    help = 'Bulk create gamers, tournaments, games and round robin scorelines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gamers', type=int, default=200)
+        parser.add_argument('--tournaments', type=int, default=4)
+        parser.add_argument('--games', type=int, default=4)
+        parser.add_argument(
+            '--double',
+            action='store_true',
+            help='Play every pair twice with the sides swapped',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows inserted per query and committed together',
+        )
+        parser.add_argument(
+            '--name',
+            default='League',
+            help='Prefix for tournament and game names and gamer emails',
+        )
+        parser.add_argument(
+            '--password',
+            default='testpass',
+            help='Password every gamer can log in with',
+        )
+        parser.add_argument(
+            '--password-hash',
+            help='Stored password hash to use instead of hashing --password',
+        )
+        parser.add_argument(
+            '--skip-standings',
+            action='store_true',
+            help='Leave the standings for a later rebuild_standings',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        name = options['name']
+        domain = f'{name.lower()}.test'
+        if get_user_model().objects.filter(
+            email__endswith=f'@{domain}'
+        ).exists():
+            raise CommandError(
+                f'A league named {name} already exists, pick another --name'
+            )
+
+        batch_size = options['batch_size']
+        total = league.round_robin_size(
+            options['gamers'], options['tournaments'], options['games'],
+            options['double'],
+        )
+        started = time.perf_counter()
+
+        user_ids = league.create_players(
+            options['gamers'],
+            batch_size,
+            password=options['password'],
+            password_hash=options['password_hash'],
+            domain=domain,
+        )
+        tournament_ids = league.create_named(
+            Tournament, f'{name} Tournament', options['tournaments'],
+            batch_size,
+        )
+        game_ids = league.create_named(
+            Game, f'{name} Game', options['games'], batch_size
+        )
+        self.stdout.write(
+            f'Created {len(user_ids)} gamers, {len(tournament_ids)} '
+            f'tournaments and {len(game_ids)} games, '
+            f'seeding {total} scorelines...'
+        )
+
+        report_every = batch_size * 20
+
+        def progress(done):
+            if done % report_every < batch_size or done == total:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{done}/{total} scorelines '
+                    f'({done / elapsed:.0f} rows/s)'
+                )
+
+        league.insert_scorelines(league.round_robin_scorelines(
+            user_ids, tournament_ids, game_ids,
+            random.Random(options['seed']), double=options['double'],
+        ), batch_size, progress)
+
+        if not options['skip_standings']:
+            self.stdout.write('Rebuilding standings...')
+            rebuild_standings()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'League seeded in {time.perf_counter() - started:.1f}s!'
+        ))
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to run the app under gunicorn in production"""
+    help = 'Collect static files and serve the app with gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--asgi',
+            action='store_true',
+            help='Serve app.asgi with uvicorn workers instead of app.wsgi',
+        )
+        parser.add_argument(
+            '--skip-collectstatic',
+            action='store_true',
+            help='Serve the static files already in STATIC_ROOT',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes, defaults to two per core plus one',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            help='Threads per worker process',
+        )
+        parser.add_argument(
+            '--bind',
+            help='Address to listen on, defaults to 0.0.0.0:8000',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        env = dict(os.environ, SERVING_PROFILE='production')
+        if options['threads']:
+            # uvicorn workers ignore --threads, app.asgi sizes its pool
+            # from the environment instead
+            env['GUNICORN_THREADS'] = str(options['threads'])
+        if not options['skip_collectstatic']:
+            self.stdout.write('Collecting static files...')
+            subprocess.run(
+                [sys.executable, self.manage_py(), 'collectstatic',
+                 '--noinput', '--verbosity', '0'],
+                env=env,
+                check=True,
+            )
+
+        args = self.gunicorn_args(options)
+        self.stdout.write(self.style.SUCCESS(f"Serving: {' '.join(args)}"))
+        self.stdout.flush()
+        os.execve(sys.executable, args, env)
+
+    def manage_py(self):
+        """Return the path of manage.py"""
+        return os.path.join(settings.BASE_DIR, 'manage.py')
+
+    def gunicorn_args(self, options):
+        """Build the gunicorn command line for the options"""
+        args = [
+            sys.executable, '-m', 'gunicorn',
+            '--config', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'),
+            '--chdir', settings.BASE_DIR,
+        ]
+        if options['asgi']:
+            args += ['--worker-class', 'uvicorn.workers.UvicornWorker']
+        for option in ('workers', 'bind'):
+            if options[option]:
+                args += [f'--{option}', str(options[option])]
+        args.append('app.asgi:application' if options['asgi']
+                    else 'app.wsgi:application')
+        return args
@@ -1,22 +1,66 @@
 import time
 
-from django.db import connections
-from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from django.core.management.base import BaseCommand, CommandError
+
+from core import health
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60.0,
+            help='Seconds to wait in total before giving up',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5.0,
+            help='Longest pause between two attempts',
+        )
+        parser.add_argument(
+            '--check-migrations',
+            action='store_true',
+            help='Also wait until every migration has been applied',
+        )
+
     def handle(self, *args, **options):
         """Handle the command"""
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        deadline = time.monotonic() + options['timeout']
+        delay = 0.1
+        while True:
+            error = self.probe(
+                options['check_migrations'], deadline - time.monotonic()
+            )
+            if error is None:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(f'Database unavailable: {error}')
+            pause = min(delay, options['max_delay'], remaining)
+            self.stdout.write(
+                f'Database unavailable ({error}), '
+                f'waiting {pause:.1f} seconds...'
+            )
+            time.sleep(pause)
+            delay *= 2
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def probe(self, check_migrations, timeout):
+        """Return why the database is not ready, or None when it is"""
+        try:
+            health.check_database(timeout=max(timeout, 0))
+            if check_migrations:
+                pending = health.pending_migrations()
+                if pending:
+                    return f'{len(pending)} migrations pending'
+        except DatabaseError as exc:
+            connections['default'].close()
+            return str(exc).strip() or exc.__class__.__name__
+        return None
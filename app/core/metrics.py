@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view runs more queries than its budget allows"""
+
+
+def cache_tables():
+    """Return the tables of the database backed caches"""
+    return tuple(
+        options['LOCATION'] for options in settings.CACHES.values()
+        if options['BACKEND'].endswith('.DatabaseCache')
+    )
+
+
+class RequestMetrics:
+    """Timings collected while serving a single request
+
+    Instances are installed as a database execute wrapper so every query
+    run for the request is counted and timed. Queries against a database
+    cache table are also counted apart, they do not count towards the
+    query budget of the view.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.cache_tables = cache_tables()
+        self.queries = 0
+        self.cache_queries = 0
+        self._savepoint = False
+        self._after_cache = False
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+            self.count_cache_query(sql)
+
+    def count_cache_query(self, sql):
+        """Count the query apart when it belongs to a database cache
+
+        Inside a transaction the cache backend wraps its writes in a
+        savepoint, so the savepoint opened just before a cache query and
+        released just after one are counted as cache queries too.
+        """
+        if sql.startswith('SAVEPOINT'):
+            self._savepoint = True
+            return
+        if any(table in sql for table in self.cache_tables):
+            self.cache_queries += 1 + self._savepoint
+            self._after_cache = True
+        else:
+            if self._after_cache and sql.startswith(
+                    ('RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')):
+                self.cache_queries += 1
+            self._after_cache = False
+        self._savepoint = False
+
+    @property
+    def view_queries(self):
+        """Return the queries run by the view itself"""
+        return self.queries - self.cache_queries
+
+    def elapsed(self):
+        """Return the seconds since the request started"""
+        return time.perf_counter() - self.started
+
+
+def _labels(**labels):
+    """Format Prometheus labels"""
+    return ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels.items()
+    )
+
+
+class Registry:
+    """Request metrics for this process in the Prometheus text format
+
+    Each worker process keeps its own counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop every recorded value"""
+        with self._lock:
+            self.requests = defaultdict(int)
+            self.buckets = defaultdict(
+                lambda: [0] * len(DURATION_BUCKETS)
+            )
+            self.durations = defaultdict(float)
+            self.counts = defaultdict(int)
+            self.queries = defaultdict(int)
+            self.cache_queries = defaultdict(int)
+            self.db_time = defaultdict(float)
+            self.render_time = defaultdict(float)
+
+    def observe(self, view, method, status, metrics, total):
+        """Record a served request"""
+        with self._lock:
+            self.requests[(view, method, status)] += 1
+            buckets = self.buckets[view]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[index] += 1
+            self.durations[view] += total
+            self.counts[view] += 1
+            self.queries[view] += metrics.queries
+            self.cache_queries[view] += metrics.cache_queries
+            self.db_time[view] += metrics.db_time
+            self.render_time[view] += metrics.render_time
+
+    def render(self):
+        """Return the metrics in the Prometheus text format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            family('http_requests_total', 'counter',
+                   'Requests served by view, method and status.')
+            for (view, method, status), value in sorted(
+                    self.requests.items()):
+                labels = _labels(view=view, method=method, status=status)
+                lines.append(f'http_requests_total{{{labels}}} {value}')
+
+            name = 'http_request_duration_seconds'
+            family(name, 'histogram', 'Time spent serving requests by view.')
+            for view in sorted(self.counts):
+                for bound, value in zip(DURATION_BUCKETS, self.buckets[view]):
+                    labels = _labels(view=view, le=bound)
+                    lines.append(f'{name}_bucket{{{labels}}} {value}')
+                labels = _labels(view=view, le='+Inf')
+                lines.append(f'{name}_bucket{{{labels}}} {self.counts[view]}')
+                labels = _labels(view=view)
+                lines.append(f'{name}_sum{{{labels}}} {self.durations[view]}')
+                lines.append(f'{name}_count{{{labels}}} {self.counts[view]}')
+
+            for name, values, help_text in (
+                ('db_queries_total', self.queries,
+                 'SQL queries run by view.'),
+                ('db_cache_queries_total', self.cache_queries,
+                 'SQL queries against database cache tables by view.'),
+                ('db_query_seconds_total', self.db_time,
+                 'Time spent in SQL queries by view.'),
+                ('render_seconds_total', self.render_time,
+                 'Time spent rendering responses by view.'),
+            ):
+                family(name, 'counter', help_text)
+                for view, value in sorted(values.items()):
+                    lines.append(f'{name}{{{_labels(view=view)}}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def check_query_budget(method, view, queries):
+    """Log or raise when a view goes over its query budget"""
+    budget = settings.QUERY_BUDGETS.get(f'{method} {view}')
+    if budget is None or queries <= budget:
+        return
+    message = (
+        f'{method} {view} ran {queries} queries, '
+        f'over its budget of {budget}'
+    )
+    if settings.QUERY_BUDGET_MODE == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,112 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core import compression
+from core.db import connection_metrics
+from core.metrics import RequestMetrics, check_query_budget, registry
+
+
+def add_server_timing(response, name, seconds, description=None):
+    """Append a metric in milliseconds to the Server-Timing header"""
+    metric = f'{name};dur={seconds * 1000:.2f}'
+    if description:
+        metric += f';desc="{description}"'
+    existing = response.get('Server-Timing')
+    response['Server-Timing'] = (
+        f'{existing}, {metric}' if existing else metric
+    )
+
+
+class ConnectionMetricsMiddleware:
+    """Report the database connections opened while serving a request
+
+    Counters are reset when the previous request finishes, so the health
+    checks Django runs when a request starts are included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        metrics = connection_metrics()
+        add_server_timing(
+            response,
+            'db-connect',
+            metrics['connect_time'],
+            f"{metrics['opened']} opened, "
+            f"{metrics['health_checks']} checked",
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts
+
+    Brotli is preferred when the library is installed, then gzip. See
+    core.compression for the responses that are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        start = time.perf_counter()
+        compression.compress_response(request, response)
+        if response.has_header('Content-Encoding'):
+            add_server_timing(
+                response,
+                'compress',
+                time.perf_counter() - start,
+                response['Content-Encoding'],
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """Record queries, database, render and total time for each view
+
+    The timings are added to the Server-Timing header and to the metrics
+    registry, and the query count is checked against QUERY_BUDGETS leaving
+    out the queries of database backed caches.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.request_metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        total = metrics.elapsed()
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        registry.observe(
+            view, request.method, response.status_code, metrics, total
+        )
+        add_server_timing(
+            response, 'db', metrics.db_time, f'{metrics.queries} queries'
+        )
+        add_server_timing(response, 'render', metrics.render_time)
+        add_server_timing(response, 'total', total)
+        check_query_budget(request.method, view, metrics.view_queries)
+        return response
+
+    def process_template_response(self, request, response):
+        """Time rendering of DRF and template responses"""
+        metrics = request.request_metrics
+        start = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_time += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+INDEXES = (
+    ('scoreline_first_player_idx', ('first_player_id', 'tournament_id',
+                                    'game_id')),
+    ('scoreline_second_player_idx', ('second_player_id', 'tournament_id',
+                                     'game_id')),
+)
+
+
+def concurrently(schema_editor):
+    """Return the keyword that keeps an index build from blocking writes"""
+    if schema_editor.connection.vendor == 'postgresql':
+        return 'CONCURRENTLY '
+    return ''
+
+
+def create_indexes(apps, schema_editor):
+    """Build the player indexes without locking writes on Postgres"""
+    quote = schema_editor.quote_name
+    for name, columns in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {concurrently(schema_editor)}IF NOT EXISTS '
+            f'{quote(name)} ON {quote("core_scoreline")} '
+            f'({", ".join(quote(column) for column in columns)})'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    """Drop the player indexes"""
+    for name, columns in INDEXES:
+        schema_editor.execute(
+            f'DROP INDEX {concurrently(schema_editor)}IF EXISTS '
+            f'{schema_editor.quote_name(name)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_standings'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_indexes, drop_indexes),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='scoreline',
+                    index=models.Index(fields=['first_player', 'tournament', 'game'], name='scoreline_first_player_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='scoreline',
+                    index=models.Index(fields=['second_player', 'tournament', 'game'], name='scoreline_second_player_idx'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_scoreline_player_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerGameStanding',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.IntegerField(default=0)),
+                ('won', models.IntegerField(default=0)),
+                ('lost', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('goals_for', models.IntegerField(default=0)),
+                ('goals_against', models.IntegerField(default=0)),
+                ('goal_difference', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='playerstanding',
+            index=models.Index(fields=['tournament', 'game', '-points', '-goal_difference', '-goals_for'], name='standing_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playertournamentstanding',
+            index=models.Index(fields=['tournament', '-points', '-goal_difference', '-goals_for'], name='tournament_standing_rank_idx'),
+        ),
+        migrations.AddField(
+            model_name='playergamestanding',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_standings', to='core.Game'),
+        ),
+        migrations.AddField(
+            model_name='playergamestanding',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_standings', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='playergamestanding',
+            index=models.Index(fields=['game', '-points', '-goal_difference', '-goals_for'], name='game_standing_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='playergamestanding',
+            unique_together={('user', 'game')},
+        ),
+    ]
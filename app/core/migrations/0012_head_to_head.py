@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_leaderboard_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.IntegerField(default=0)),
+                ('low_won', models.IntegerField(default=0)),
+                ('high_won', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('low_goals', models.IntegerField(default=0)),
+                ('high_goals', models.IntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head', to='core.Game')),
+                ('player_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_high', to=settings.AUTH_USER_MODEL)),
+                ('player_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_low', to=settings.AUTH_USER_MODEL)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head', to='core.Tournament')),
+            ],
+            options={
+                'unique_together': {('player_low', 'player_high', 'tournament', 'game')},
+            },
+        ),
+    ]
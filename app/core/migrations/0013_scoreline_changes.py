@@ -0,0 +1,39 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:39
+
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    """Log every existing scoreline as created so first syncs see it"""
+    Scoreline = apps.get_model('core', 'Scoreline')
+    ScorelineChange = apps.get_model('core', 'ScorelineChange')
+    ids = Scoreline.objects.order_by('id').values_list('id', flat=True)
+    batch = []
+    for scoreline_id in ids.iterator():
+        batch.append(ScorelineChange(
+            scoreline_id=scoreline_id, operation='create'
+        ))
+        if len(batch) == 500:
+            ScorelineChange.objects.bulk_create(batch)
+            batch = []
+    ScorelineChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_head_to_head'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScorelineChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('scoreline_id', models.IntegerField()),
+                ('operation', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill_standings(apps, schema_editor):
+    """Build the standings tables from the scorelines already stored"""
+    from core.standings import rebuild_standings
+    rebuild_standings(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_scoreline_changes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_backfill_standings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('tournament_id', models.IntegerField()),
+                ('standings', models.TextField()),
+            ],
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 # For creating user manager classes
 from django.contrib.auth.models import AbstractBaseUser
@@ -109,6 +109,205 @@ class Scoreline(models.Model):
 
     class Meta:
         unique_together = ('tournament', 'game', 'first_player', 'second_player')
+        indexes = [
+            models.Index(
+                fields=['first_player', 'tournament', 'game'],
+                name='scoreline_first_player_idx',
+            ),
+            models.Index(
+                fields=['second_player', 'tournament', 'game'],
+                name='scoreline_second_player_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save the scoreline and its standings deltas in one transaction"""
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.game.name} {self.first_player.name} {self.first_player_score} - {self.second_player.name} {self.second_player_score} "
+
+
+class StandingStats(models.Model):
+    """Stat totals shared by the standings tables"""
+    games_played = models.IntegerField(default=0)
+    won = models.IntegerField(default=0)
+    lost = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    goals_for = models.IntegerField(default=0)
+    goals_against = models.IntegerField(default=0)
+    goal_difference = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class PlayerStanding(StandingStats):
+    """Player totals for one game of a tournament"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='standings'
+    )
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name='standings'
+    )
+    game = models.ForeignKey(
+        Game,
+        on_delete=models.CASCADE,
+        related_name='standings'
+    )
+
+    class Meta:
+        unique_together = ('user', 'tournament', 'game')
+        indexes = [
+            models.Index(
+                fields=[
+                    'tournament', 'game',
+                    '-points', '-goal_difference', '-goals_for',
+                ],
+                name='standing_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.tournament} {self.game} {self.points}"
+
+
+class PlayerTournamentStanding(StandingStats):
+    """Player totals across every game of a tournament"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tournament_standings'
+    )
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name='tournament_standings'
+    )
+
+    class Meta:
+        unique_together = ('user', 'tournament')
+        indexes = [
+            models.Index(
+                fields=[
+                    'tournament', '-points', '-goal_difference', '-goals_for',
+                ],
+                name='tournament_standing_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.tournament} {self.points}"
+
+
+class PlayerGameStanding(StandingStats):
+    """Player totals for one game across every tournament"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='game_standings'
+    )
+    game = models.ForeignKey(
+        Game,
+        on_delete=models.CASCADE,
+        related_name='game_standings'
+    )
+
+    class Meta:
+        unique_together = ('user', 'game')
+        indexes = [
+            models.Index(
+                fields=['game', '-points', '-goal_difference', '-goals_for'],
+                name='game_standing_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.game} {self.points}"
+
+
+class HeadToHead(models.Model):
+    """Record between two players for one game of a tournament
+
+    The pair is stored with the lower user id first so a match lands on
+    the same row whichever side each player was on.
+    """
+    player_low = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='head_to_head_low'
+    )
+    player_high = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='head_to_head_high'
+    )
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name='head_to_head'
+    )
+    game = models.ForeignKey(
+        Game,
+        on_delete=models.CASCADE,
+        related_name='head_to_head'
+    )
+    games_played = models.IntegerField(default=0)
+    low_won = models.IntegerField(default=0)
+    high_won = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    low_goals = models.IntegerField(default=0)
+    high_goals = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('player_low', 'player_high', 'tournament', 'game')
+
+    def __str__(self):
+        return (
+            f"{self.player_low} {self.low_won} - "
+            f"{self.high_won} {self.player_high}"
+        )
+
+
+class ScorelineChange(models.Model):
+    """Change log entry for a scoreline, read by the sync endpoint
+
+    The id is the change sequence. Deleted scorelines keep their entries
+    as tombstones so clients that synced before can drop them.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    OPERATIONS = (
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    scoreline_id = models.IntegerField()
+    operation = models.CharField(max_length=6, choices=OPERATIONS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id} {self.operation} {self.scoreline_id}"
+
+
+class LiveEvent(models.Model):
+    """Standings event shared between processes by the database broker
+
+    The id is the event sequence and standings holds the JSON encoded
+    rows, read back by every process with live subscribers.
+    """
+    id = models.BigAutoField(primary_key=True)
+    tournament_id = models.IntegerField()
+    standings = models.TextField()
 
     def __str__(self):
-        return f"{self.game.name} {self.first_player.name} {self.first_player_score} - {self.second_player.name} {self.second_player_score} "
\ No newline at end of file
+        return f"{self.id} {self.tournament_id}"
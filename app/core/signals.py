@@ -0,0 +1,62 @@
+from django.core.signals import request_finished
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.db import reset_connection_metrics
+from core.models import PlayerStanding, Scoreline, ScorelineChange
+from core import changes
+from core import standings
+
+
+@receiver(pre_save, sender=Scoreline)
+def remember_previous_scoreline(sender, instance, **kwargs):
+    """Keep the stored scoreline so its standings can be reverted"""
+    instance._previous_scoreline = None
+    if instance.pk:
+        instance._previous_scoreline = sender.objects.filter(
+            pk=instance.pk
+        ).first()
+
+
+@receiver(post_save, sender=Scoreline)
+def update_standings_on_save(sender, instance, raw=False, **kwargs):
+    """Apply scoreline changes to the standings"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_scoreline', None)
+    keys = set()
+    if previous is not None:
+        keys.update(standings.apply_scorelines([previous], -1, send=False))
+    keys.update(standings.apply_scorelines([instance], send=False))
+    standings.standings_changed.send(
+        sender=PlayerStanding, keys=sorted(keys)
+    )
+
+
+@receiver(post_delete, sender=Scoreline)
+def update_standings_on_delete(sender, instance, **kwargs):
+    """Remove a deleted scoreline from the standings"""
+    standings.apply_scoreline(instance, sign=-1)
+
+
+@receiver(post_save, sender=Scoreline)
+def record_scoreline_save(sender, instance, created, raw=False, **kwargs):
+    """Log a saved scoreline for the sync endpoint"""
+    if raw:
+        return
+    changes.record(
+        [instance.pk],
+        ScorelineChange.CREATE if created else ScorelineChange.UPDATE,
+    )
+
+
+@receiver(post_delete, sender=Scoreline)
+def record_scoreline_delete(sender, instance, **kwargs):
+    """Leave a tombstone for a deleted scoreline"""
+    changes.record([instance.pk], ScorelineChange.DELETE)
+
+
+@receiver(request_finished)
+def reset_connection_metrics_on_finish(sender, **kwargs):
+    """Start the connection counters afresh for the next request"""
+    reset_connection_metrics()
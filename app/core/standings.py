@@ -0,0 +1,365 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.dispatch import Signal
+
+from core.db import bulk_batch_size
+from core.models import (
+    HeadToHead,
+    PlayerStanding,
+    PlayerTournamentStanding,
+    PlayerGameStanding,
+    Scoreline,
+)
+
+
+STAT_FIELDS = (
+    'won',
+    'lost',
+    'draws',
+    'goals_for',
+    'goals_against',
+    'games_played',
+)
+
+STANDING_FIELDS = STAT_FIELDS + ('goal_difference', 'points')
+
+PLAYER_KEYS = ('user_id', 'tournament_id', 'game_id')
+
+STANDING_TABLES = (
+    (PlayerStanding, PLAYER_KEYS),
+    (PlayerTournamentStanding, ('user_id', 'tournament_id')),
+    (PlayerGameStanding, ('user_id', 'game_id')),
+)
+
+STANDING_NAMES = ('player', 'tournament', 'game')
+
+# Sent with the (user id, tournament id, game id) keys of the player
+# standings a batch of scorelines changed
+standings_changed = Signal(providing_args=['keys'])
+
+HEAD_TO_HEAD_FIELDS = (
+    'games_played',
+    'low_won',
+    'high_won',
+    'draws',
+    'low_goals',
+    'high_goals',
+)
+
+HEAD_TO_HEAD_KEYS = (
+    'player_low_id',
+    'player_high_id',
+    'tournament_id',
+    'game_id',
+)
+
+
+def empty_stats():
+    """Return zeroed standing stats"""
+    return dict.fromkeys(STANDING_FIELDS, 0)
+
+
+def derive(stats):
+    """Fill in goal difference and points from the raw totals"""
+    stats['goal_difference'] = stats['goals_for'] - stats['goals_against']
+    stats['points'] = stats['won'] * 3 + stats['draws']
+    return stats
+
+
+def _side_totals(scorelines, player, opponent, count_filter=None):
+    """Group scorelines by one side of the match"""
+    return scorelines.order_by().values(
+        player, 'tournament', 'game'
+    ).annotate(
+        won=Sum(f'{player}_score'),
+        lost=Sum(f'{opponent}_score'),
+        draws=Sum('draw_score', filter=count_filter),
+        goals_for=Sum(f'{player}_score_goals'),
+        goals_against=Sum(f'{opponent}_score_goals'),
+        games_played=Count('id', filter=count_filter),
+    )
+
+
+def aggregate_totals(scorelines=None):
+    """Return stat totals keyed by (user id, tournament id, game id)
+
+    First player and second player rows are folded together. A scoreline
+    where both sides are the same user is only counted once for games
+    played and draws, the same as the per-user OR filter did.
+    """
+    if scorelines is None:
+        scorelines = Scoreline.objects.all()
+    totals = defaultdict(empty_stats)
+    sides = (
+        _side_totals(scorelines, 'first_player', 'second_player'),
+        _side_totals(
+            scorelines, 'second_player', 'first_player',
+            count_filter=~Q(first_player=F('second_player'))
+        ),
+    )
+    for player, rows in zip(('first_player', 'second_player'), sides):
+        for row in rows:
+            key = (row[player], row['tournament'], row['game'])
+            for field in STAT_FIELDS:
+                totals[key][field] += int(row[field] or 0)
+    for stats in totals.values():
+        derive(stats)
+    return totals
+
+
+def rollup(totals, keys):
+    """Sum per game totals into totals keyed by a subset of the fields"""
+    rolled = defaultdict(empty_stats)
+    for key, stats in totals.items():
+        values = dict(zip(PLAYER_KEYS, key))
+        rolled_key = tuple(values[field] for field in keys)
+        for field in STANDING_FIELDS:
+            rolled[rolled_key][field] += stats[field]
+    return rolled
+
+
+def scoreline_deltas(scoreline, sign=1):
+    """Return the standing deltas a scoreline adds for each player"""
+    deltas = defaultdict(empty_stats)
+    sides = (
+        ('first_player', 'second_player'),
+        ('second_player', 'first_player'),
+    )
+    for player, opponent in sides:
+        user = getattr(scoreline, f'{player}_id')
+        stats = deltas[user]
+        stats['won'] += getattr(scoreline, f'{player}_score')
+        stats['lost'] += getattr(scoreline, f'{opponent}_score')
+        stats['goals_for'] += getattr(scoreline, f'{player}_score_goals')
+        stats['goals_against'] += getattr(scoreline, f'{opponent}_score_goals')
+        if player == 'first_player' or user != scoreline.first_player_id:
+            stats['draws'] += scoreline.draw_score
+            stats['games_played'] += 1
+
+    for stats in deltas.values():
+        derive(stats)
+        for field in STANDING_FIELDS:
+            stats[field] *= sign
+    return deltas
+
+
+def head_to_head_key(scoreline):
+    """Return the orientation free key for a scoreline
+
+    Self play has no head to head record, so None is returned for it.
+    """
+    if scoreline.first_player_id == scoreline.second_player_id:
+        return None
+    low, high = sorted((scoreline.first_player_id, scoreline.second_player_id))
+    return (low, high, scoreline.tournament_id, scoreline.game_id)
+
+
+def head_to_head_delta(scoreline, sign=1):
+    """Return the head to head delta a scoreline adds"""
+    scores = {
+        scoreline.first_player_id: (
+            scoreline.first_player_score, scoreline.first_player_score_goals
+        ),
+        scoreline.second_player_id: (
+            scoreline.second_player_score, scoreline.second_player_score_goals
+        ),
+    }
+    low, high = head_to_head_key(scoreline)[:2]
+    return {
+        'games_played': sign,
+        'low_won': scores[low][0] * sign,
+        'high_won': scores[high][0] * sign,
+        'draws': scoreline.draw_score * sign,
+        'low_goals': scores[low][1] * sign,
+        'high_goals': scores[high][1] * sign,
+    }
+
+
+def _apply(model, lookup, stats, create, fields=STANDING_FIELDS):
+    """Add stats to the standing row matching lookup
+
+    The row is updated in place with a single query. Only when there is
+    no row yet, and create is set, is one inserted with the stats. A row
+    inserted by a concurrent writer in the meantime is updated instead.
+    """
+    changes = {field: F(field) + stats[field] for field in fields}
+    rows = model.objects.filter(**lookup)
+    if rows.update(**changes):
+        if not create:
+            rows.filter(games_played__lte=0).delete()
+        return
+    if not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                **lookup, **{field: stats[field] for field in fields}
+            )
+    except IntegrityError:
+        rows.update(**changes)
+
+
+def apply_scorelines(scorelines, sign=1, send=True):
+    """Apply scorelines to the standings tables and return the keys hit
+
+    Deltas are summed per standing row first, so a batch costs a fixed
+    number of queries per row touched rather than per scoreline. Rows
+    are written in key order, so writers touching the same rows lock
+    them in the same order and cannot deadlock. Removals only touch
+    existing rows so cascading deletes of a user, tournament or game
+    never recreate standings for them. standings_changed is sent unless
+    send is off, for callers that send it once for several batches.
+    """
+    deltas = defaultdict(empty_stats)
+    head_to_head = defaultdict(lambda: dict.fromkeys(HEAD_TO_HEAD_FIELDS, 0))
+    for scoreline in scorelines:
+        for user, stats in scoreline_deltas(scoreline, sign).items():
+            key = (user, scoreline.tournament_id, scoreline.game_id)
+            for field in STANDING_FIELDS:
+                deltas[key][field] += stats[field]
+        key = head_to_head_key(scoreline)
+        if key is not None:
+            for field, value in head_to_head_delta(scoreline, sign).items():
+                head_to_head[key][field] += value
+
+    with transaction.atomic():
+        for model, keys in STANDING_TABLES:
+            for key, stats in sorted(rollup(deltas, keys).items()):
+                _apply(
+                    model,
+                    dict(zip(keys, key)),
+                    stats,
+                    create=sign > 0,
+                )
+        for key, stats in sorted(head_to_head.items()):
+            _apply(
+                HeadToHead,
+                dict(zip(HEAD_TO_HEAD_KEYS, key)),
+                stats,
+                create=sign > 0,
+                fields=HEAD_TO_HEAD_FIELDS,
+            )
+        if send:
+            standings_changed.send(sender=PlayerStanding, keys=list(deltas))
+    return list(deltas)
+
+
+def apply_scoreline(scoreline, sign=1):
+    """Apply a single scoreline to the standings tables"""
+    apply_scorelines([scoreline], sign)
+
+
+def aggregate_head_to_head(scorelines=None):
+    """Return head to head totals keyed by the orientation free pair
+
+    One grouped query per orientation, so self play is left out.
+    """
+    if scorelines is None:
+        scorelines = Scoreline.objects.all()
+    totals = defaultdict(lambda: dict.fromkeys(HEAD_TO_HEAD_FIELDS, 0))
+    orientations = (
+        ('first_player', 'second_player',
+         Q(first_player__lt=F('second_player'))),
+        ('second_player', 'first_player',
+         Q(first_player__gt=F('second_player'))),
+    )
+    for low, high, orientation in orientations:
+        rows = scorelines.filter(orientation).order_by().values(
+            low, high, 'tournament', 'game'
+        ).annotate(
+            games_played=Count('id'),
+            low_won=Sum(f'{low}_score'),
+            high_won=Sum(f'{high}_score'),
+            draws=Sum('draw_score'),
+            low_goals=Sum(f'{low}_score_goals'),
+            high_goals=Sum(f'{high}_score_goals'),
+        )
+        for row in rows:
+            key = (row[low], row[high], row['tournament'], row['game'])
+            for field in HEAD_TO_HEAD_FIELDS:
+                totals[key][field] += int(row[field] or 0)
+    return totals
+
+
+def _reconcile(model, keys, expected, dry_run, fields=STANDING_FIELDS,
+               touched=None):
+    """Make a standings table match the expected totals
+
+    The keys of rows created, updated or deleted are added to touched.
+    """
+    existing = {}
+    for row in model.objects.values('id', *keys, *fields):
+        existing[tuple(row[key] for key in keys)] = row
+
+    missing = []
+    changed = []
+    for key, stats in expected.items():
+        row = existing.pop(key, None)
+        if row is None:
+            missing.append(model(**dict(zip(keys, key)), **stats))
+        elif any(row[field] != stats[field] for field in fields):
+            changed.append(model(id=row['id'], **stats))
+            if touched is not None:
+                touched.append(key)
+    stale = [row['id'] for row in existing.values()]
+    if touched is not None:
+        touched.extend(
+            tuple(getattr(row, key) for key in keys) for row in missing
+        )
+        touched.extend(existing)
+
+    if not dry_run:
+        model.objects.bulk_create(
+            missing, batch_size=bulk_batch_size(model, missing, 1000)
+        )
+        model.objects.bulk_update(changed, fields, batch_size=1000)
+        model.objects.filter(id__in=stale).delete()
+
+    return {
+        'created': len(missing),
+        'updated': len(changed),
+        'deleted': len(stale),
+    }
+
+
+def rebuild_standings(dry_run=False, apps=None):
+    """Recompute every standing from scorelines and fix any drift
+
+    When anything was fixed standings_changed is sent with the player
+    standing keys that changed, so cached stats are invalidated and live
+    scoreboards updated once the rebuild commits. Migrations pass their
+    apps registry to rebuild with the historical models, in which case
+    no signal is sent.
+    """
+    def model_for(model):
+        if apps is None:
+            return model
+        return apps.get_model('core', model.__name__)
+
+    scorelines = model_for(Scoreline).objects.all()
+    with transaction.atomic():
+        totals = aggregate_totals(scorelines)
+        touched = []
+        report = {
+            name: _reconcile(
+                model_for(model), keys, rollup(totals, keys), dry_run,
+                touched=touched if model is PlayerStanding else None,
+            )
+            for name, (model, keys) in zip(STANDING_NAMES, STANDING_TABLES)
+        }
+        report['head_to_head'] = _reconcile(
+            model_for(HeadToHead),
+            HEAD_TO_HEAD_KEYS,
+            aggregate_head_to_head(scorelines),
+            dry_run,
+            fields=HEAD_TO_HEAD_FIELDS,
+        )
+        fixed = any(
+            counts['created'] or counts['updated'] or counts['deleted']
+            for counts in report.values()
+        )
+        if fixed and not dry_run and apps is None:
+            standings_changed.send(sender=PlayerStanding, keys=touched)
+        return report
@@ -0,0 +1,304 @@
+import asyncio
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from blazing import cache as stats_cache
+from core.models import PlayerStanding, Scoreline, ScorelineChange
+
+
+GAME_STATS_URL = reverse('blazing:game-stats-list')
+
+
+@patch('core.management.commands.wait_for_db.time.sleep')
+class WaitForDbTests(SimpleTestCase):
+    """Test the wait for database command"""
+
+    @patch('core.health.check_database')
+    def test_wait_for_db_ready(self, check, sleep):
+        """Test waiting for the database when it is available"""
+        call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(check.call_count, 1)
+        sleep.assert_not_called()
+
+    @patch('core.health.check_database')
+    def test_wait_for_db_backs_off(self, check, sleep):
+        """Test the pause between attempts doubles"""
+        check.side_effect = [OperationalError] * 3 + [None]
+
+        call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(check.call_count, 4)
+        self.assertEqual(
+            [call[0][0] for call in sleep.call_args_list], [0.1, 0.2, 0.4]
+        )
+
+    @patch('core.health.check_database')
+    def test_wait_for_db_times_out(self, check, sleep):
+        """Test the command fails once the deadline has passed"""
+        check.side_effect = OperationalError('connection refused')
+
+        with self.assertRaisesMessage(CommandError, 'connection refused'):
+            call_command('wait_for_db', '--timeout', '0', stdout=StringIO())
+
+        sleep.assert_not_called()
+
+    @patch('core.health.check_database')
+    def test_wait_for_db_bounds_each_connect(self, check, sleep):
+        """Test every attempt may only block for the time left"""
+        call_command('wait_for_db', '--timeout', '5', stdout=StringIO())
+
+        timeout = check.call_args[1]['timeout']
+        self.assertGreater(timeout, 0)
+        self.assertLessEqual(timeout, 5)
+
+    @patch('core.health.pending_migrations')
+    @patch('core.health.check_database')
+    def test_wait_for_db_checks_migrations(self, check, pending, sleep):
+        """Test the command waits for pending migrations when asked"""
+        pending.side_effect = [['core.0012_head_to_head'], []]
+
+        call_command('wait_for_db', '--check-migrations', stdout=StringIO())
+
+        self.assertEqual(pending.call_count, 2)
+        self.assertEqual(sleep.call_count, 1)
+
+
+class ServeCommandTests(SimpleTestCase):
+    """Test the production serve command"""
+
+    def serve(self, *args):
+        """Run the serve command and return the gunicorn exec call"""
+        with patch('core.management.commands.serve.os.execve') as execve, \
+                patch('core.management.commands.serve.subprocess.run') as run:
+            call_command('serve', *args, stdout=StringIO())
+        return run, execve
+
+    def test_serve_collects_static_and_runs_wsgi(self):
+        """Test static files are collected before gunicorn starts"""
+        run, execve = self.serve()
+
+        collect = run.call_args[0][0]
+        self.assertIn('collectstatic', collect)
+        self.assertEqual(
+            run.call_args[1]['env']['SERVING_PROFILE'], 'production'
+        )
+        args = execve.call_args[0][1]
+        self.assertEqual(args[1:3], ['-m', 'gunicorn'])
+        self.assertEqual(args[-1], 'app.wsgi:application')
+        self.assertEqual(
+            execve.call_args[0][2]['SERVING_PROFILE'], 'production'
+        )
+
+    def test_serve_asgi_with_options(self):
+        """Test the ASGI entry point uses uvicorn workers"""
+        run, execve = self.serve(
+            '--asgi', '--skip-collectstatic', '--workers', '3'
+        )
+
+        run.assert_not_called()
+        args = execve.call_args[0][1]
+        self.assertIn('uvicorn.workers.UvicornWorker', args)
+        self.assertEqual(args[args.index('--workers') + 1], '3')
+        self.assertNotIn('--threads', args)
+        self.assertEqual(args[-1], 'app.asgi:application')
+
+    def test_serve_asgi_threads_size_the_pool(self):
+        """Test --threads reaches the ASGI thread pool"""
+        run, execve = self.serve(
+            '--asgi', '--skip-collectstatic', '--threads', '6'
+        )
+
+        self.assertEqual(execve.call_args[0][2]['GUNICORN_THREADS'], '6')
+
+
+class AsgiApplicationTests(SimpleTestCase):
+    """Test the ASGI entry point"""
+
+    def test_asgi_application_handles_request(self):
+        """Test a request is passed through to Django"""
+        from app.asgi import application
+
+        async def request():
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http',
+                'http_version': '1.1',
+                'method': 'GET',
+                'path': '/missing/',
+                'query_string': b'',
+                'headers': [(b'host', b'testserver')],
+            })
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            await communicator.receive_output(5)
+            return start
+
+        start = async_to_sync(request)()
+
+        self.assertEqual(start['status'], 404)
+
+    def test_asgi_application_runs_requests_concurrently(self):
+        """Test requests in one worker run on separate threads"""
+        from app.asgi import ThreadPoolWsgiToAsgi
+
+        # Each request waits for the other, so this only finishes when
+        # both are in flight at once
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wsgi_app(environ, start_response):
+            barrier.wait()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [threading.current_thread().name.encode()]
+
+        application = ThreadPoolWsgiToAsgi(wsgi_app, 2)
+
+        async def request():
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http',
+                'http_version': '1.1',
+                'method': 'GET',
+                'path': '/',
+                'query_string': b'',
+                'headers': [],
+            })
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(10)
+            body = await communicator.receive_output(10)
+            return start['status'], body['body']
+
+        async def requests():
+            return await asyncio.gather(request(), request())
+
+        responses = async_to_sync(requests)()
+
+        self.assertEqual([status for status, _ in responses], [200, 200])
+        self.assertNotEqual(responses[0][1], responses[1][1])
+
+    def test_asgi_response_closed_when_client_disconnects(self):
+        """Test a stream ends and is closed once the client goes away"""
+        from app.asgi import ThreadPoolWsgiToAsgi
+
+        closed = threading.Event()
+
+        class Stream:
+            def __iter__(self):
+                while True:
+                    time.sleep(0.01)
+                    yield b'tick'
+
+            def close(self):
+                closed.set()
+
+        def wsgi_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return Stream()
+
+        application = ThreadPoolWsgiToAsgi(wsgi_app, 1)
+
+        async def request():
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http',
+                'http_version': '1.1',
+                'method': 'GET',
+                'path': '/',
+                'query_string': b'',
+                'headers': [],
+            })
+            await communicator.send_input({'type': 'http.request'})
+            await communicator.receive_output(5)
+            await communicator.receive_output(5)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(5)
+
+        async_to_sync(request)()
+
+        self.assertTrue(closed.wait(5))
+
+
+class SeedLeagueTests(TestCase):
+    """Test the league seeding command"""
+
+    def seed(self, *args):
+        """Run the seed command with a small league"""
+        call_command(
+            'seed_league', '--gamers', '5', '--tournaments', '2',
+            '--games', '1', '--batch-size', '3', *args, stdout=StringIO()
+        )
+
+    def test_seed_round_robin(self):
+        """Test every pair plays once per tournament game"""
+        self.seed()
+
+        self.assertEqual(Scoreline.objects.count(), 20)
+        self.assertEqual(PlayerStanding.objects.count(), 10)
+        standing = PlayerStanding.objects.first()
+        self.assertEqual(standing.games_played, 4)
+
+    def test_seed_double_round_robin(self):
+        """Test a double round robin plays the return fixtures"""
+        self.seed('--double', '--skip-standings')
+
+        self.assertEqual(Scoreline.objects.count(), 40)
+        self.assertFalse(PlayerStanding.objects.exists())
+
+    def test_seed_shares_one_password_hash(self):
+        """Test gamers are stored with a single precomputed hash"""
+        self.seed('--name', 'Scale')
+
+        gamers = get_user_model().objects.filter(email__endswith='@scale.test')
+        self.assertEqual(gamers.count(), 5)
+        passwords = gamers.values_list('password', flat=True)
+        self.assertEqual(len(set(passwords)), 1)
+        self.assertTrue(gamers.first().check_password('testpass'))
+
+    def test_seed_existing_league_fails(self):
+        """Test seeding the same league twice is refused"""
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class SeedLeagueCacheTests(TransactionTestCase):
+    """Test seeding drops the cached stats once it commits"""
+
+    def test_seed_refreshes_cached_stats(self):
+        """Test stats cached before the seed are not served after it"""
+        caches['stats'].clear()
+        self.assertEqual(self.client.get(GAME_STATS_URL).json(), [])
+
+        call_command(
+            'seed_league', '--gamers', '3', '--tournaments', '1',
+            '--games', '1', stdout=StringIO()
+        )
+
+        self.assertEqual(len(self.client.get(GAME_STATS_URL).json()), 3)
+
+    def test_seed_without_standings_bumps_generation(self):
+        """Test the stats generation moves even with standings skipped"""
+        before = stats_cache.get_generation()
+
+        call_command(
+            'seed_league', '--gamers', '3', '--tournaments', '1',
+            '--games', '1', '--skip-standings', stdout=StringIO()
+        )
+
+        self.assertNotEqual(stats_cache.get_generation(), before)
+        self.assertEqual(
+            ScorelineChange.objects.filter(
+                operation=ScorelineChange.CREATE
+            ).count(),
+            Scoreline.objects.count(),
+        )
@@ -0,0 +1,105 @@
+import gzip
+from unittest import skipIf
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import compression
+from core.models import Tournament
+
+TOURNAMENTS_URL = reverse('blazing:tournament-list')
+EXPORT_URL = reverse('blazing:scoreline-export', args=['csv'])
+
+
+def accepted(header):
+    """Return the encoding chosen for an Accept-Encoding header"""
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+    return compression.accepted_encoding(request)
+
+
+class AcceptEncodingTests(TestCase):
+    """Test negotiating the response encoding"""
+
+    @override_settings(COMPRESSION_ENCODINGS=('gzip',))
+    def test_gzip(self):
+        """Test gzip is chosen when the client accepts it"""
+        self.assertEqual(accepted('gzip, deflate'), 'gzip')
+        self.assertEqual(accepted('*'), 'gzip')
+        self.assertIsNone(accepted('gzip;q=0, deflate'))
+        self.assertIsNone(accepted('identity'))
+        self.assertIsNone(accepted(''))
+
+    @skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test brotli is preferred over gzip when both are accepted"""
+        self.assertEqual(accepted('gzip, deflate, br'), 'br')
+        self.assertEqual(accepted('br;q=0, gzip;q=0.5'), 'gzip')
+        self.assertEqual(accepted('gzip, *;q=0.1'), 'br')
+
+
+@override_settings(COMPRESSION_ENCODINGS=('gzip',))
+class CompressionMiddlewareTests(TestCase):
+    """Test responses are compressed for clients that accept it"""
+
+    def setUp(self):
+        self.client = APIClient()
+        Tournament.objects.bulk_create([
+            Tournament(name=f'BS RANK {index}') for index in range(50)
+        ])
+
+    def test_large_response_compressed(self):
+        """Test a response over the threshold is gzipped"""
+        plain = self.client.get(TOURNAMENTS_URL)
+
+        res = self.client.get(TOURNAMENTS_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertIn('compress;dur=', res['Server-Timing'])
+        self.assertNotIn('Content-Encoding', plain)
+
+    def test_small_response_not_compressed(self):
+        """Test responses under the threshold are sent as they are"""
+        with self.settings(COMPRESSION_MIN_SIZE=1024 * 1024):
+            res = self.client.get(
+                TOURNAMENTS_URL, HTTP_ACCEPT_ENCODING='gzip'
+            )
+
+        self.assertNotIn('Content-Encoding', res)
+
+    def test_html_not_compressed(self):
+        """Test browsable API pages holding CSRF tokens are left alone"""
+        with self.settings(COMPRESSION_MIN_SIZE=0):
+            res = self.client.get(
+                TOURNAMENTS_URL, HTTP_ACCEPT='text/html',
+                HTTP_ACCEPT_ENCODING='gzip',
+            )
+
+        self.assertTrue(res['Content-Type'].startswith('text/html'))
+        self.assertNotIn('Content-Encoding', res)
+
+    def test_streaming_response_not_compressed(self):
+        """Test streamed exports are left alone"""
+        with self.settings(COMPRESSION_MIN_SIZE=0):
+            res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertTrue(res.streaming)
+        self.assertNotIn('Content-Encoding', res)
+
+    @skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli_response(self):
+        """Test brotli is used when configured and accepted"""
+        with self.settings(COMPRESSION_ENCODINGS=('br', 'gzip')):
+            plain = self.client.get(TOURNAMENTS_URL)
+            res = self.client.get(
+                TOURNAMENTS_URL, HTTP_ACCEPT_ENCODING='gzip, br'
+            )
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(res.content), plain.content
+        )
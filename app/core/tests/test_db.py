@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.db import (
+    ConnectionHealthMixin,
+    connection_metrics,
+    reset_connection_metrics,
+)
+
+
+class HealthCheckedWrapper(ConnectionHealthMixin, DatabaseWrapper):
+    """SQLite connection with the health check mixin"""
+
+
+def sample_connection(name, interval=30):
+    """Create a persistent health checked connection"""
+    return HealthCheckedWrapper({
+        'NAME': name,
+        'OPTIONS': {},
+        'TIME_ZONE': None,
+        'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECK_INTERVAL': interval,
+    }, alias='health')
+
+
+class ConnectionHealthTests(SimpleTestCase):
+    """Test timed and health checked connections"""
+
+    def setUp(self):
+        reset_connection_metrics()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.connection = sample_connection(
+            os.path.join(directory.name, 'health.sqlite3')
+        )
+        self.addCleanup(self.connection.close)
+
+    def test_connect_is_timed(self):
+        """Test opening a connection is counted and timed"""
+        self.connection.ensure_connection()
+
+        metrics = connection_metrics()
+        self.assertEqual(metrics['opened'], 1)
+        self.assertGreater(metrics['connect_time'], 0)
+
+    def test_recent_connection_is_not_pinged(self):
+        """Test a connection used recently is reused without a ping"""
+        self.connection.ensure_connection()
+
+        with patch.object(self.connection, 'is_usable') as is_usable:
+            self.connection.close_if_unusable_or_obsolete()
+
+        is_usable.assert_not_called()
+        self.assertIsNotNone(self.connection.connection)
+
+    def test_idle_broken_connection_is_closed(self):
+        """Test an idle connection that fails the ping is dropped"""
+        self.connection.ensure_connection()
+        self.connection.checked_at = time.monotonic() - 60
+
+        with patch.object(self.connection, 'is_usable', return_value=False):
+            self.connection.close_if_unusable_or_obsolete()
+
+        self.assertIsNone(self.connection.connection)
+        self.assertEqual(connection_metrics()['health_checks'], 1)
+
+    def test_idle_working_connection_is_kept(self):
+        """Test an idle connection that passes the ping is reused"""
+        self.connection.ensure_connection()
+        self.connection.checked_at = time.monotonic() - 60
+
+        self.connection.close_if_unusable_or_obsolete()
+
+        self.assertIsNotNone(self.connection.connection)
+        self.assertEqual(connection_metrics()['opened'], 1)
+
+
+class ConnectionMetricsMiddlewareTests(TestCase):
+    """Test connection metrics are reported on responses"""
+
+    def test_server_timing_reports_connections(self):
+        """Test responses carry the connection setup time"""
+        res = self.client.get(reverse('blazing:game-list'))
+
+        self.assertIn('db-connect;dur=', res['Server-Timing'])
+        self.assertIn('0 opened', res['Server-Timing'])
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+from core import health
+
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+
+
+class HealthCheckTests(TestCase):
+    """Test the liveness and readiness probes"""
+
+    def test_healthz_does_not_touch_database(self):
+        """Test the liveness probe answers without queries"""
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz_when_migrated(self):
+        """Test the readiness probe passes on a migrated database"""
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    @patch('core.health.check_database')
+    def test_readyz_database_unavailable(self, check):
+        """Test the readiness probe fails when the database is down"""
+        check.side_effect = OperationalError('connection refused')
+
+        with self.assertLogs('core.views', 'ERROR') as logs:
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['database'], 'unreachable')
+        self.assertNotIn('connection refused', res.content.decode())
+        self.assertIn('connection refused', logs.output[0])
+
+    @patch('core.health.pending_migrations')
+    def test_readyz_pending_migrations(self, pending):
+        """Test the readiness probe fails until migrations are applied"""
+        pending.return_value = ['core.0012_head_to_head']
+
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(
+            res.json()['pending_migrations'], ['core.0012_head_to_head']
+        )
+
+
+class CheckDatabaseTests(TestCase):
+    """Test the database probe"""
+
+    def test_timeout_bounds_postgres_connect(self):
+        """Test the timeout is passed to libpq while connecting"""
+        options = connection.settings_dict.setdefault('OPTIONS', {})
+        seen = []
+
+        def cursor():
+            seen.append(options.get('connect_timeout'))
+            raise OperationalError('timeout expired')
+
+        with patch.object(connection, 'vendor', 'postgresql'), \
+                patch.object(connection, 'cursor', cursor):
+            with self.assertRaises(OperationalError):
+                health.check_database(timeout=2.5)
+
+        self.assertEqual(seen, [3])
+        self.assertNotIn('connect_timeout', options)
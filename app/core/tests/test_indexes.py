@@ -0,0 +1,86 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+
+from core import models
+
+
+def seed_scorelines(users=40, tournaments=5, games=5, scorelines=2000):
+    """Seed a deterministic league without touching the standings"""
+    get_user_model().objects.bulk_create([
+        get_user_model()(email=f'player{index}@mail.com')
+        for index in range(users)
+    ])
+    models.Tournament.objects.bulk_create([
+        models.Tournament(name=f'Tournament {index}')
+        for index in range(tournaments)
+    ])
+    models.Game.objects.bulk_create([
+        models.Game(name=f'Game {index}') for index in range(games)
+    ])
+    user_ids = list(get_user_model().objects.values_list('id', flat=True))
+    tournament_ids = list(
+        models.Tournament.objects.values_list('id', flat=True)
+    )
+    game_ids = list(models.Game.objects.values_list('id', flat=True))
+
+    rnd = random.Random(0)
+    rows = {}
+    for _ in range(scorelines):
+        first, second = rnd.sample(user_ids, 2)
+        key = (rnd.choice(tournament_ids), rnd.choice(game_ids), first, second)
+        rows[key] = models.Scoreline(
+            tournament_id=key[0],
+            game_id=key[1],
+            first_player_id=first,
+            second_player_id=second,
+        )
+    models.Scoreline.objects.bulk_create(rows.values())
+    return user_ids[0], tournament_ids[0], game_ids[0]
+
+
+def query_plan(queryset):
+    """Return the plan for a queryset with planner statistics fresh"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return queryset.explain()
+
+
+class ScorelineIndexTests(TestCase):
+    """Test player stats queries use the composite scoreline indexes"""
+
+    def setUp(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest(
+                'Query plans are only checked on Postgres and SQLite'
+            )
+        self.user, self.tournament, self.game = seed_scorelines()
+
+    def assertUsesPlayerIndexes(self, queryset):
+        """Assert a query is served by the player indexes
+
+        The first player side may also be served by the unique index,
+        which leads with tournament and game, so either is accepted there.
+        """
+        plan = query_plan(queryset)
+
+        self.assertIn('scoreline_second_player_idx', plan)
+        self.assertRegex(plan, r'scoreline_first_player_idx|_uniq')
+
+    def test_player_tournament_lookup_uses_indexes(self):
+        """Test the player OR filter within a tournament uses indexes"""
+        self.assertUsesPlayerIndexes(models.Scoreline.objects.filter(
+            Q(first_player=self.user) | Q(second_player=self.user),
+            tournament=self.tournament,
+        ))
+
+    def test_player_tournament_game_lookup_uses_indexes(self):
+        """Test the player OR filter within a game uses indexes"""
+        self.assertUsesPlayerIndexes(models.Scoreline.objects.filter(
+            Q(first_player=self.user) | Q(second_player=self.user),
+            tournament=self.tournament,
+            game=self.game,
+        ))
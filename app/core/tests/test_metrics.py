@@ -0,0 +1,101 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import QueryBudgetExceeded, RequestMetrics, registry
+from core.models import Game
+
+
+GAMES_URL = reverse('blazing:game-list')
+METRICS_URL = reverse('metrics')
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test per view query and latency instrumentation"""
+
+    def setUp(self):
+        registry.reset()
+        Game.objects.create(name='MK11')
+
+    def test_server_timing_headers(self):
+        """Test responses carry query, render and total timings"""
+        res = self.client.get(GAMES_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="1 queries"', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_endpoint(self):
+        """Test served requests are exposed in the Prometheus format"""
+        self.client.get(GAMES_URL)
+        self.client.get(GAMES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn('# TYPE http_requests_total counter', body)
+        self.assertIn(
+            'http_requests_total{view="blazing:game-list",method="GET",'
+            'status="200"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{view="blazing:game-list"} 2',
+            body,
+        )
+        self.assertIn('db_queries_total{view="blazing:game-list"} 2', body)
+
+    @override_settings(
+        QUERY_BUDGETS={'GET blazing:game-list': 0},
+        QUERY_BUDGET_MODE='raise',
+    )
+    def test_query_budget_raises(self):
+        """Test going over a query budget fails the request in tests"""
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'game-list ran 1'):
+            self.client.get(GAMES_URL)
+
+    @override_settings(
+        QUERY_BUDGETS={'GET blazing:game-list': 0},
+        QUERY_BUDGET_MODE='log',
+    )
+    def test_query_budget_logs(self):
+        """Test going over a query budget is logged in production"""
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            res = self.client.get(GAMES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('over its budget of 0', logs.output[0])
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'stats': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'stats_cache',
+    },
+})
+class CacheQueryTests(TestCase):
+    """Test queries of database caches are counted apart"""
+
+    def test_cache_writes_and_their_savepoints_are_counted(self):
+        """Test the savepoint around a cache write belongs to the cache"""
+        metrics = RequestMetrics()
+        for sql in (
+            'SELECT "core_game"."id" FROM "core_game"',
+            'SELECT COUNT(*) FROM "stats_cache"',
+            'SAVEPOINT "s1"',
+            'SELECT "cache_key" FROM "stats_cache"',
+            'INSERT INTO "stats_cache" VALUES (%s)',
+            'RELEASE SAVEPOINT "s1"',
+            'SAVEPOINT "s2"',
+            'UPDATE "core_game" SET "name" = %s',
+            'RELEASE SAVEPOINT "s2"',
+        ):
+            metrics.count_cache_query(sql)
+
+        self.assertEqual(metrics.cache_queries, 5)
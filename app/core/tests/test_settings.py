@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+def load_settings(**environ):
+    """Import the settings in a fresh interpreter with extra environment"""
+    return subprocess.run(
+        [sys.executable, '-c', 'import app.settings'],
+        cwd=settings.BASE_DIR,
+        env=dict(os.environ, **environ),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+class ServingProfileSettingsTests(SimpleTestCase):
+    """Test the settings enforced by the production profile"""
+
+    def test_production_rejects_locmem_stats_cache(self):
+        """Test a per worker stats cache fails fast in production"""
+        result = load_settings(
+            SERVING_PROFILE='production', STATS_CACHE='locmem',
+            SECRET_KEY='production-key',
+        )
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn(b'STATS_CACHE=locmem', result.stderr)
+
+    def test_production_requires_secret_key(self):
+        """Test production refuses the secret key committed to the repo"""
+        environ = dict(os.environ, SERVING_PROFILE='production')
+        environ.pop('SECRET_KEY', None)
+        result = subprocess.run(
+            [sys.executable, '-c', 'import app.settings'],
+            cwd=settings.BASE_DIR,
+            env=environ,
+            stderr=subprocess.PIPE,
+        )
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn(b'SECRET_KEY must be set', result.stderr)
+
+    def test_production_defaults_to_shared_stats_cache(self):
+        """Test production uses the database cache unless told otherwise"""
+        environ = dict(
+            os.environ, SERVING_PROFILE='production',
+            SECRET_KEY='production-key',
+        )
+        environ.pop('STATS_CACHE', None)
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'from app import settings; '
+             "print(settings.CACHES['stats']['BACKEND'])"],
+            cwd=settings.BASE_DIR,
+            env=environ,
+            stdout=subprocess.PIPE,
+        )
+
+        self.assertEqual(
+            result.stdout.strip(),
+            b'django.core.cache.backends.db.DatabaseCache',
+        )
@@ -0,0 +1,219 @@
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase
+
+from core import models
+from core.standings import (
+    STANDING_FIELDS,
+    _apply,
+    apply_scorelines,
+    rebuild_standings,
+    standings_changed,
+)
+
+
+def sample_user(email='test@londonappdev.com', password='testpass'):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class StandingsTests(TestCase):
+    """Test standings are kept in step with scorelines"""
+
+    def setUp(self):
+        self.user1 = sample_user()
+        self.user2 = sample_user(email='here@mail.com')
+        self.tournament = models.Tournament.objects.create(
+            name='BS RANK March 2020'
+        )
+        self.game = models.Game.objects.create(name='MK11')
+        self.scoreline = models.Scoreline.objects.create(
+            first_player=self.user1,
+            second_player=self.user2,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=5,
+            second_player_score=2,
+            draw_score=3,
+            first_player_score_goals=12,
+            second_player_score_goals=7
+        )
+
+    def test_create_scoreline_adds_standings(self):
+        """Test creating a scoreline updates both players"""
+        first = models.PlayerStanding.objects.get(user=self.user1)
+        second = models.PlayerStanding.objects.get(user=self.user2)
+
+        self.assertEqual(first.games_played, 1)
+        self.assertEqual(first.won, 5)
+        self.assertEqual(first.lost, 2)
+        self.assertEqual(first.draws, 3)
+        self.assertEqual(first.goal_difference, 5)
+        self.assertEqual(first.points, 18)
+        self.assertEqual(second.won, 2)
+        self.assertEqual(second.goals_for, 7)
+        self.assertEqual(second.points, 9)
+
+        tournament = models.PlayerTournamentStanding.objects.get(
+            user=self.user1
+        )
+        self.assertEqual(tournament.points, 18)
+        game = models.PlayerGameStanding.objects.get(user=self.user2)
+        self.assertEqual(game.points, 9)
+
+    def test_update_scoreline_applies_delta(self):
+        """Test updating a scoreline replaces its previous totals"""
+        self.scoreline.first_player_score = 7
+        self.scoreline.draw_score = 1
+        self.scoreline.save()
+
+        first = models.PlayerStanding.objects.get(user=self.user1)
+        self.assertEqual(first.games_played, 1)
+        self.assertEqual(first.won, 7)
+        self.assertEqual(first.draws, 1)
+        self.assertEqual(first.points, 22)
+
+    def test_update_applies_with_one_query_per_row(self):
+        """Test an existing standing row is updated without a lookup"""
+        stats = dict.fromkeys(STANDING_FIELDS, 1)
+
+        with self.assertNumQueries(1):
+            _apply(
+                models.PlayerGameStanding,
+                {'user_id': self.user1.id, 'game_id': self.game.id},
+                stats,
+                create=True,
+            )
+
+        game = models.PlayerGameStanding.objects.get(user=self.user1)
+        self.assertEqual(game.points, 19)
+
+    def test_rows_are_written_in_key_order(self):
+        """Test rows are locked in the same order whoever plays first"""
+        reverse = models.Scoreline(
+            first_player=self.user2,
+            second_player=self.user1,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=1,
+        )
+
+        with patch('core.standings._apply') as apply:
+            apply_scorelines([reverse])
+
+        lookups = {}
+        for call in apply.call_args_list:
+            model, lookup = call[0][:2]
+            lookups.setdefault(model, []).append(tuple(lookup.values()))
+        for model, keys in lookups.items():
+            self.assertEqual(keys, sorted(keys), model.__name__)
+        self.assertEqual(len(lookups[models.PlayerStanding]), 2)
+
+    def test_delete_scoreline_removes_standings(self):
+        """Test deleting the only scoreline removes the standings"""
+        self.scoreline.delete()
+
+        self.assertFalse(models.PlayerStanding.objects.exists())
+        self.assertFalse(models.PlayerTournamentStanding.objects.exists())
+        self.assertFalse(models.PlayerGameStanding.objects.exists())
+
+    def test_delete_tournament_cascades(self):
+        """Test deleting a tournament does not recreate standings"""
+        self.tournament.delete()
+
+        self.assertFalse(models.PlayerStanding.objects.exists())
+        self.assertFalse(models.PlayerTournamentStanding.objects.exists())
+        self.assertFalse(models.PlayerGameStanding.objects.exists())
+
+    def test_rebuild_standings_fixes_drift(self):
+        """Test rebuilding standings reconciles edited rows"""
+        models.PlayerStanding.objects.filter(user=self.user1).update(won=0)
+        models.PlayerTournamentStanding.objects.filter(
+            user=self.user2
+        ).delete()
+
+        report = rebuild_standings()
+
+        self.assertEqual(report['player']['updated'], 1)
+        self.assertEqual(report['tournament']['created'], 1)
+        self.assertEqual(report['head_to_head']['updated'], 0)
+        first = models.PlayerStanding.objects.get(user=self.user1)
+        self.assertEqual(first.won, 5)
+        self.assertTrue(models.PlayerTournamentStanding.objects.filter(
+            user=self.user2
+        ).exists())
+
+    def test_rebuild_standings_sends_changed_keys(self):
+        """Test a rebuild that fixes drift reports the keys it changed"""
+        sent = []
+
+        def receiver(sender, keys, **kwargs):
+            sent.append(keys)
+
+        standings_changed.connect(receiver)
+        self.addCleanup(standings_changed.disconnect, receiver)
+        rebuild_standings()
+        models.PlayerStanding.objects.filter(user=self.user1).update(won=0)
+
+        rebuild_standings(dry_run=True)
+        rebuild_standings()
+
+        key = (self.user1.id, self.tournament.id, self.game.id)
+        self.assertEqual(sent, [[key]])
+
+    def test_backfill_migration_builds_standings(self):
+        """Test the data migration fills empty tables with historical models"""
+        for model in (models.PlayerStanding, models.PlayerTournamentStanding,
+                      models.PlayerGameStanding, models.HeadToHead):
+            model.objects.all().delete()
+        migration = import_module('core.migrations.0014_backfill_standings')
+        apps = MigrationExecutor(connection).loader.project_state(
+            ('core', '0014_backfill_standings')
+        ).apps
+
+        migration.backfill_standings(apps, None)
+
+        first = models.PlayerStanding.objects.get(user=self.user1)
+        self.assertEqual(first.points, 18)
+        self.assertEqual(models.PlayerTournamentStanding.objects.count(), 2)
+        self.assertEqual(models.PlayerGameStanding.objects.count(), 2)
+        self.assertEqual(models.HeadToHead.objects.get().low_won, 5)
+
+    def test_rebuild_head_to_head(self):
+        """Test rebuilding head to head folds both orientations"""
+        models.Scoreline.objects.create(
+            first_player=self.user2,
+            second_player=self.user1,
+            tournament=self.tournament,
+            game=self.game,
+            first_player_score=4
+        )
+        models.HeadToHead.objects.all().delete()
+
+        report = rebuild_standings()
+
+        self.assertEqual(report['head_to_head']['created'], 1)
+        record = models.HeadToHead.objects.get()
+        self.assertEqual(record.player_low, self.user1)
+        self.assertEqual(record.games_played, 2)
+        self.assertEqual(record.low_won, 5)
+        self.assertEqual(record.high_won, 6)
+
+    def test_rebuild_standings_command_dry_run(self):
+        """Test the dry run reports drift without writing"""
+        models.PlayerStanding.objects.filter(user=self.user1).update(won=0)
+        out = StringIO()
+
+        call_command('rebuild_standings', '--dry-run', stdout=out)
+
+        self.assertIn(
+            'player: 0 created, 1 updated, 0 deleted', out.getvalue()
+        )
+        first = models.PlayerStanding.objects.get(user=self.user1)
+        self.assertEqual(first.won, 0)
@@ -0,0 +1,45 @@
+import logging
+
+from django.db import DatabaseError
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import never_cache
+
+from core import health
+from core.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+
+@never_cache
+def healthz(request):
+    """Report the process is up without touching the database"""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readyz(request):
+    """Report whether the database is reachable and fully migrated"""
+    try:
+        health.check_database()
+        pending = health.pending_migrations()
+    except DatabaseError:
+        # The error can name hosts and users, so it only goes to the log
+        logger.exception('Readiness check failed')
+        return JsonResponse(
+            {'status': 'unavailable', 'database': 'unreachable'}, status=503
+        )
+    if pending:
+        return JsonResponse({
+            'status': 'unavailable',
+            'pending_migrations': [str(migration) for migration in pending],
+        }, status=503)
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def metrics(request):
+    """Expose the request metrics of this process to Prometheus"""
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
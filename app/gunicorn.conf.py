@@ -0,0 +1,30 @@
+"""
+Gunicorn config for the production serving profile.
+
+Every worker is a separate process with its own database connection,
+token cache and locmem cache, so throughput scales with the number of
+cores. Threads inside a worker overlap requests that are waiting on the
+database. The ASGI entry point swaps the worker class for uvicorn's and
+runs requests on a pool of GUNICORN_THREADS threads inside each worker.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
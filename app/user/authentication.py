@@ -0,0 +1,123 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class LRUCache:
+    """Thread safe least recently used cache with a time to live"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Remove every entry whose value matches predicate"""
+        with self._lock:
+            for key in [
+                key for key, (expires, value) in self._entries.items()
+                if predicate(value)
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = LRUCache(
+    maxsize=getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+def shared_cache():
+    """Return the cache shared between workers holding user generations"""
+    return caches[settings.TOKEN_GENERATION_CACHE]
+
+
+def generation_key(user_id):
+    """Return the shared cache key of a user's generation"""
+    return f'token-user:{user_id}'
+
+
+def user_generation(user_id):
+    """Return the current generation of a user, starting one if needed"""
+    cache = shared_cache()
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def forget_user(user_id):
+    """Drop cached tokens for a user in every worker
+
+    The local entries go at once, other workers see the new generation
+    on their next cache hit.
+    """
+    shared_cache().set(generation_key(user_id), uuid4().hex, None)
+    token_cache.delete_where(lambda value: value[0].pk == user_id)
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """Token authentication that remembers lookups for a short time
+
+    Entries live in a bounded per-process cache. Each one carries the
+    generation of its user in the cache shared between workers, which is
+    changed when a token is deleted or the user changes. A hit is only
+    used while the generation still matches, so every worker stops
+    accepting the token at once, without waiting for the time to live.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token, generation = cached
+            if shared_cache().get(generation_key(user.pk)) == generation:
+                return (copy.copy(user), token)
+            token_cache.delete(key)
+
+        user, token = super().authenticate_credentials(key)
+        generation = user_generation(user.pk)
+        token_cache.set(key, (copy.copy(user), token, generation))
+        return (user, token)
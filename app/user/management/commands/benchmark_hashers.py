@@ -0,0 +1,93 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+def hash_for(hasher_path, duration):
+    """Hash passwords for a while and return hashes per second"""
+    hasher = import_string(hasher_path)()
+    salt = hasher.salt()
+    count = 0
+    start = time.perf_counter()
+    while True:
+        hasher.encode('benchmark-password', salt)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return count / elapsed
+
+
+class Command(BaseCommand):
+    """Django command to measure password hashing throughput"""
+    help = 'Report hashes per second per core for the password hashers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--policy',
+            choices=sorted(settings.PASSWORD_HASHER_POLICIES),
+            action='append',
+            help='Hasher policy to measure, defaults to all of them',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=2.0,
+            help='Seconds to hash for per measurement',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes for the parallel measurement',
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        policies = options['policy'] or sorted(
+            settings.PASSWORD_HASHER_POLICIES
+        )
+        duration = options['duration']
+        processes = max(options['processes'], 1)
+        self.stdout.write(
+            f'Default policy: {settings.PASSWORD_HASHER}, '
+            f'{processes} processes, {duration}s per measurement'
+        )
+
+        for policy in policies:
+            hasher_path = settings.PASSWORD_HASHER_POLICIES[policy]
+            hasher = import_string(hasher_path)()
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError as exc:
+                    raise CommandError(f'{policy}: {exc}')
+
+            single = hash_for(hasher_path, duration)
+            with Pool(processes) as pool:
+                total = sum(pool.starmap(
+                    hash_for, [(hasher_path, duration)] * processes
+                ))
+
+            self.stdout.write(
+                f'{policy} ({self.describe(hasher)}): '
+                f'{single:.1f} hashes/s on one core '
+                f'({1000 / single:.1f} ms per login), '
+                f'{total / processes:.1f} hashes/s per core '
+                f'and {total:.1f} hashes/s over {processes} processes'
+            )
+
+    def describe(self, hasher):
+        """Return the cost settings of a hasher"""
+        if hasher.algorithm == 'argon2':
+            return (
+                f'time_cost={hasher.time_cost}, '
+                f'memory_cost={hasher.memory_cost}, '
+                f'parallelism={hasher.parallelism}'
+            )
+        if hasattr(hasher, 'rounds'):
+            return f'rounds={hasher.rounds}'
+        return f'iterations={hasher.iterations}'
@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import LRUCache, generation_key, token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+class LRUCacheTests(TestCase):
+    """Test the bounded token lookup cache"""
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the cache drops the oldest entry when full"""
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    @patch('user.authentication.time.monotonic')
+    def test_entries_expire(self, monotonic):
+        """Test entries are not returned after their time to live"""
+        monotonic.return_value = 100
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+
+        monotonic.return_value = 161
+
+        self.assertIsNone(cache.get('a'))
+
+
+class CachingTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@mail.com', 'testpass', name='name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_is_cached(self):
+        """Test a second request skips the token query"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_is_rejected(self):
+        """Test deleting a token removes it from the cache"""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test deactivating a user removes their tokens from the cache"""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_change_in_another_worker_is_seen(self):
+        """Test a user deactivated by another worker is rejected at once"""
+        self.client.get(ME_URL)
+
+        # Another worker deactivates the user, this one only shares the
+        # generation cache with it
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+        caches['stats'].set(generation_key(self.user.pk), 'other', None)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changed_user_is_reloaded(self):
+        """Test user changes are visible on the next request"""
+        self.client.get(ME_URL)
+
+        self.user.name = 'new name'
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'new name')
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+TOKEN_URL = reverse('user:token')
+
+ARGON2_FIRST = [
+    'user.hashers.TunedArgon2PasswordHasher',
+    'user.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+@override_settings(
+    PASSWORD_ARGON2_TIME_COST=1,
+    PASSWORD_ARGON2_MEMORY_COST=256,
+    PASSWORD_ARGON2_PARALLELISM=1,
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+class HasherPolicyTests(TestCase):
+    """Test the settings driven password hasher policy"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = {'email': 'test@mail.com', 'password': 'testpass'}
+
+    def login(self):
+        """Log in through the token endpoint"""
+        return self.client.post(TOKEN_URL, self.payload)
+
+    def stored_hasher(self):
+        """Return the hasher of the stored password"""
+        user = get_user_model().objects.get(email=self.payload['email'])
+        return identify_hasher(user.password)
+
+    @override_settings(PASSWORD_HASHERS=ARGON2_FIRST)
+    def test_new_passwords_use_configured_costs(self):
+        """Test new hashes use the costs from settings"""
+        get_user_model().objects.create_user(**self.payload)
+
+        hasher = self.stored_hasher()
+        self.assertEqual(hasher.algorithm, 'argon2')
+        user = get_user_model().objects.get(email=self.payload['email'])
+        self.assertIn('m=256,t=1,p=1', user.password)
+
+    def test_login_upgrades_hash_to_preferred_hasher(self):
+        """Test logging in rehashes a password with the preferred hasher"""
+        get_user_model().objects.create_user(**self.payload)
+        self.assertEqual(self.stored_hasher().algorithm, 'pbkdf2_sha256')
+
+        with self.settings(PASSWORD_HASHERS=ARGON2_FIRST):
+            res = self.login()
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.stored_hasher().algorithm, 'argon2')
+
+    @override_settings(PASSWORD_HASHERS=ARGON2_FIRST)
+    def test_login_upgrades_hash_when_costs_change(self):
+        """Test logging in rehashes a password when the costs change"""
+        get_user_model().objects.create_user(**self.payload)
+
+        with self.settings(PASSWORD_ARGON2_TIME_COST=2):
+            res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = get_user_model().objects.get(email=self.payload['email'])
+        self.assertIn('t=2', user.password)
+
+    def test_benchmark_command_reports_rate(self):
+        """Test the benchmark command reports hashes per second"""
+        out = StringIO()
+
+        call_command(
+            'benchmark_hashers',
+            '--policy', 'pbkdf2',
+            '--duration', '0.01',
+            '--processes', '1',
+            stdout=out,
+        )
+
+        self.assertIn('pbkdf2 (iterations=1000)', out.getvalue())
+        self.assertIn('hashes/s per core', out.getvalue())
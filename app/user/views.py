@@ -1,7 +1,8 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 
 # For authentication
 from rest_framework.authtoken.views import ObtainAuthToken
+from user.authentication import CachingTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
 from rest_framework.settings import api_settings
 
@@ -18,7 +19,7 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):